@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['phone_number'], name='user_phone_number_idx'),
+        ),
+    ]
@@ -28,5 +28,11 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["full_name", "phone_number"]
 
+    class Meta:
+        indexes = [
+            # phone_login looks users up by phone number
+            models.Index(fields=["phone_number"], name="user_phone_number_idx"),
+        ]
+
     def __str__(self):
         return self.email
@@ -2,6 +2,14 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from accounts.models import User
 from accounts.tokens import get_tokens_for_user
+from core.platform_stats import record_user_created
+
+
+def first_name(full_name):
+    """Extract first name from full_name"""
+    if full_name:
+        return full_name.split()[0]
+    return ''
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -11,12 +19,13 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'email', 'full_name', 'first_name', 'phone_number', 'role', 'is_verified', 'is_staff', 'is_superuser', 'created_at']
         read_only_fields = ['id', 'created_at', 'is_staff', 'is_superuser']
+        # Columns read by computed fields (see core.fieldsets), and the same
+        # computation over values() rows (see core.row_serializers)
+        field_columns = {'first_name': ['full_name']}
+        row_methods = {'first_name': first_name}
     
     def get_first_name(self, obj):
-        """Extract first name from full_name"""
-        if obj.full_name:
-            return obj.full_name.split()[0]
-        return ''
+        return first_name(obj.full_name)
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -46,6 +55,7 @@ class SignupSerializer(serializers.ModelSerializer):
             phone_number=validated_data.get('phone_number', ''),
             role=validated_data.get('role', 'donor')
         )
+        record_user_created(user)
         return user
 
 
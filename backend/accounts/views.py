@@ -8,6 +8,7 @@ from accounts.serializers import (
 )
 from accounts.tokens import get_tokens_for_user
 from accounts.models import User
+from campaigns.list_cache import invalidate_user
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.hashers import check_password
 
@@ -132,6 +133,7 @@ def update_profile(request):
             setattr(user, field, data[field])
     
     user.save()
+    invalidate_user(user.pk)
     serializer = UserSerializer(user)
     
     return Response({
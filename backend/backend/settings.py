@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 
@@ -185,6 +186,93 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 
+# ----------------------------
+# CACHE (Redis when REDIS_URL is set, per-process memory otherwise)
+# ----------------------------
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'fundtracer',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Lifetime of cached API responses; tag invalidation usually evicts sooner
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# HTTP caching of public GET responses: browsers revalidate with
+# ETag / Last-Modified, shared (edge) caches hold them for EDGE_CACHE_MAX_AGE
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', '0'))
+EDGE_CACHE_MAX_AGE = int(os.getenv('EDGE_CACHE_MAX_AGE', '300'))
+# Dotted path to a callable taking a list of surrogate keys to purge
+SURROGATE_PURGE_HANDLER = os.getenv('SURROGATE_PURGE_HANDLER')
+
+# Build list pages from values() rows (core.row_serializers) instead of
+# model instances and DRF serializers; the output is identical
+FAST_LIST_SERIALIZATION = os.getenv('FAST_LIST_SERIALIZATION', 'True') == 'True'
+
+# How long reads of sharded campaign counters may serve a cached shard sum
+COUNTER_SHARD_CACHE_TIMEOUT = int(os.getenv('COUNTER_SHARD_CACHE_TIMEOUT', '2'))
+
+# Seconds a stored Idempotency-Key response is replayed to retries
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400'))
+
+# Write-behind donation intake (donations.intake): create_donation answers
+# 202 with a tracking id and process_donation_intake stores the donations
+# in batches, buffered in a Redis stream: REDIS_URL is required.
+DONATION_INTAKE_BUFFER = os.getenv('DONATION_INTAKE_BUFFER', 'False') == 'True'
+DONATION_INTAKE_STREAM = os.getenv('DONATION_INTAKE_STREAM', 'fundtracer:donation-intake')
+DONATION_INTAKE_GROUP = os.getenv('DONATION_INTAKE_GROUP', 'donation-intake')
+# Entries a consumer has held unacknowledged this long are taken over by another
+DONATION_INTAKE_CLAIM_IDLE_MS = int(os.getenv('DONATION_INTAKE_CLAIM_IDLE_MS', '60000'))
+DONATION_INTAKE_STATUS_TTL = int(os.getenv('DONATION_INTAKE_STATUS_TTL', '86400'))
+
+# Receipts for completed donations (donations.receipts): issued by a
+# background 'thread', 'inline' after commit, or 'off' (generate_receipts
+# command only); PDFs are rendered by this many processes (0: in-process)
+RECEIPT_DISPATCH = os.getenv('RECEIPT_DISPATCH', 'thread')
+RECEIPT_RENDER_PROCESSES = int(os.getenv('RECEIPT_RENDER_PROCESSES', '2'))
+
+# First month of the fiscal year donor tax statements cover (1: calendar year)
+FISCAL_YEAR_START_MONTH = int(os.getenv('FISCAL_YEAR_START_MONTH', '1'))
+
+# Campaign balance snapshots (take_balance_snapshots) cover ledger entries
+# older than this many seconds, leaving time for open transactions to commit
+LEDGER_SNAPSHOT_LAG = int(os.getenv('LEDGER_SNAPSHOT_LAG', '300'))
+
+# Rows the admin dashboard totals are spread over (core.platform_stats)
+PLATFORM_STATS_SHARDS = int(os.getenv('PLATFORM_STATS_SHARDS', '8'))
+
+# refresh_analytics folds in donations and campaigns older than this many
+# seconds, leaving time for open transactions to commit
+ANALYTICS_REFRESH_LAG = int(os.getenv('ANALYTICS_REFRESH_LAG', '60'))
+
+# Donations or campaigns one bulk moderation request may change
+BULK_MODERATION_LIMIT = int(os.getenv('BULK_MODERATION_LIMIT', '1000'))
+
+# Moderation queue leases last this many seconds unless renewed by a
+# heartbeat; a claim takes at most MODERATION_CLAIM_LIMIT items
+MODERATION_LEASE_SECONDS = int(os.getenv('MODERATION_LEASE_SECONDS', '300'))
+MODERATION_CLAIM_LIMIT = int(os.getenv('MODERATION_CLAIM_LIMIT', '50'))
+
+# Admin list pages whose filter the planner expects to match this many rows
+# or more report an approximate count: the planner's estimate ('estimate')
+# or an exact count cached per filter for APPROXIMATE_COUNT_CACHE_TIMEOUT
+# seconds ('cache')
+APPROXIMATE_COUNT_THRESHOLD = int(os.getenv('APPROXIMATE_COUNT_THRESHOLD', '10000'))
+APPROXIMATE_COUNT_STRATEGY = os.getenv('APPROXIMATE_COUNT_STRATEGY', 'estimate')
+APPROXIMATE_COUNT_CACHE_TIMEOUT = int(os.getenv('APPROXIMATE_COUNT_CACHE_TIMEOUT', '300'))
+
+
 # ----------------------------
 # REST FRAMEWORK & JWT SETTINGS
 # ----------------------------
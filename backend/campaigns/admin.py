@@ -1,5 +1,8 @@
 from django.contrib import admin
 from .models import Campaign, CampaignCategory
+from .search import update_search_vector
+from .list_cache import invalidate_campaign_listing, invalidate_category
+from .counter_shards import set_counter_shards
 
 
 @admin.register(CampaignCategory)
@@ -7,9 +10,48 @@ class CampaignCategoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'created_at')
     search_fields = ('name',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Category name is part of every member campaign's search vector
+        renamed = change and 'name' in form.changed_data
+        if renamed:
+            update_search_vector(Campaign.objects.filter(category=obj))
+        invalidate_category(obj.pk, renamed=renamed)
+
+    def delete_model(self, request, obj):
+        category_id = obj.pk
+        super().delete_model(request, obj)
+        invalidate_category(category_id)
+
 
 @admin.register(Campaign)
 class CampaignAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'created_by', 'goal_amount', 'raised_amount', 'campaign_type', 'is_active', 'created_at')
     list_filter = ('campaign_type', 'is_active', 'category', 'created_at')
     search_fields = ('title', 'description', 'created_by__email')
+
+    def save_model(self, request, obj, form, change):
+        # The shard rows are created (and existing ones folded) by
+        # set_counter_shards, not by saving the field
+        counter_shards = obj.counter_shards
+        if 'counter_shards' in form.changed_data:
+            obj.counter_shards = form.initial.get('counter_shards', 0)
+        super().save_model(request, obj, form, change)
+        if counter_shards != obj.counter_shards:
+            set_counter_shards(obj.pk, counter_shards)
+            obj.counter_shards = counter_shards
+        update_search_vector(obj)
+        category_ids = {obj.category_id}
+        if 'category' in form.initial:
+            category_ids.add(form.initial['category'])
+        invalidate_campaign_listing(obj.pk, category_ids=category_ids)
+
+    def delete_model(self, request, obj):
+        campaign_id = obj.pk
+        super().delete_model(request, obj)
+        invalidate_campaign_listing(campaign_id, category_ids=[obj.category_id])
+
+    def delete_queryset(self, request, queryset):
+        category_ids = set(queryset.values_list('category_id', flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_campaign_listing(category_ids=category_ids)
@@ -0,0 +1,140 @@
+# ETag / Last-Modified validators for the public campaign GET endpoints.
+# Each runs one query over row versions and timestamps, never the serializer.
+#
+# Last-Modified is only sent where the body depends on nothing but rows with
+# an updated_at: a list loses rows without any timestamp moving, the creator
+# (User) has no updated_at, and milestone fields move with the clock. Those
+# endpoints validate on their ETag alone.
+import uuid
+
+from django.utils import timezone
+
+from campaigns.counter_shards import counter_totals
+from campaigns.list_cache import (
+    CATEGORIES_TAG, campaign_tag, category_tag, milestones_tag, user_tag,
+)
+from campaigns.models import Campaign, CampaignCategory, Milestone
+from core.http_cache import RowVersion, Validators, make_etag
+
+
+def _uuid(value):
+    # Canonical form of a URL id, so surrogate keys match the purge side
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _counter_state(campaign_id, counter_shards):
+    # Shard updates do not touch the Campaign row, so neither its version
+    # nor updated_at move; validate on the (briefly cached) totals instead
+    if not counter_shards:
+        return ''
+    totals = counter_totals([campaign_id]).get(campaign_id, {})
+    return ','.join(f'{field}={totals[field]}' for field in sorted(totals))
+
+
+def _due_state(due_date, is_completed, now):
+    # MilestoneSerializer's is_overdue / days_until_due change with the clock
+    if is_completed:
+        return 'done'
+    return f'{due_date < now}:{(due_date - now).days}'
+
+
+def campaign_validators(request, id):
+    """get_campaign: campaign, creator and category rows, plus is_owner; ETag only"""
+    id = _uuid(id)
+    row = id and Campaign.objects.filter(pk=id).values_list(
+        RowVersion(), RowVersion('created_by'), RowVersion('category'),
+        'created_by_id', 'category_id', 'counter_shards',
+    ).first()
+    if row is None:
+        return None
+
+    campaign_version, creator_version, category_version, creator_id, category_id, counter_shards = row
+    viewer = request.user.pk if request.user and request.user.is_authenticated else ''
+    return Validators(
+        etag=make_etag(
+            'campaign', campaign_version, creator_version, category_version, viewer,
+            _counter_state(id, counter_shards),
+        ),
+        last_modified=None,
+        surrogate_keys=[campaign_tag(id), category_tag(category_id), user_tag(creator_id)],
+    )
+
+
+def campaign_stats_validators(request, id):
+    """get_campaign_stats: the campaign row only"""
+    id = _uuid(id)
+    row = id and Campaign.objects.filter(pk=id).values_list(RowVersion(), 'updated_at', 'counter_shards').first()
+    if row is None:
+        return None
+
+    version, updated_at, counter_shards = row
+    return Validators(
+        etag=make_etag('campaign-stats', version, _counter_state(id, counter_shards)),
+        last_modified=None if counter_shards else updated_at,
+        surrogate_keys=[campaign_tag(id)],
+    )
+
+
+def category_list_validators(request):
+    """list_categories: every category row (the table is small); ETag only"""
+    rows = list(CampaignCategory.objects.order_by('pk').values_list('pk', RowVersion()))
+    return Validators(
+        etag=make_etag('categories', *[f'{pk}:{version}' for pk, version in rows]),
+        last_modified=None,
+        surrogate_keys=[CATEGORIES_TAG],
+    )
+
+
+def milestone_list_validators(request, campaign_id):
+    """milestones_list_create GET: the campaign's milestone rows; ETag only"""
+    campaign_id = _uuid(campaign_id)
+    if campaign_id is None:
+        return None
+    rows = list(
+        Milestone.objects.filter(campaign_id=campaign_id).order_by('pk').values_list(
+            'pk', RowVersion(), 'due_date', 'is_completed',
+        )
+    )
+    if not rows and not Campaign.objects.filter(pk=campaign_id).exists():
+        return None
+
+    now = timezone.now()
+    return Validators(
+        etag=make_etag('milestones', *[
+            f'{pk}:{version}:{_due_state(due_date, is_completed, now)}'
+            for pk, version, due_date, is_completed in rows
+        ]),
+        last_modified=None,
+        surrogate_keys=[milestones_tag(campaign_id)],
+    )
+
+
+def milestone_validators(request, campaign_id, milestone_id):
+    """get_milestone: the milestone plus its nested campaign, creator and category; ETag only"""
+    campaign_id, milestone_id = _uuid(campaign_id), _uuid(milestone_id)
+    row = campaign_id and milestone_id and Milestone.objects.filter(
+        pk=milestone_id, campaign_id=campaign_id,
+    ).values_list(
+        RowVersion(), RowVersion('campaign'), RowVersion('campaign__created_by'),
+        RowVersion('campaign__category'), 'due_date', 'is_completed',
+        'campaign__created_by_id', 'campaign__category_id',
+    ).first()
+    if row is None:
+        return None
+
+    (milestone_version, campaign_version, creator_version, category_version, due_date, is_completed,
+     creator_id, category_id) = row
+    return Validators(
+        etag=make_etag(
+            'milestone', milestone_version, campaign_version, creator_version, category_version,
+            _due_state(due_date, is_completed, timezone.now()),
+        ),
+        last_modified=None,
+        surrogate_keys=[
+            milestones_tag(campaign_id), campaign_tag(campaign_id),
+            category_tag(category_id), user_tag(creator_id),
+        ],
+    )
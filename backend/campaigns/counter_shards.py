@@ -0,0 +1,154 @@
+# Sharded donation counters for campaigns that take more concurrent donations
+# than a single row lock allows.
+#
+# A campaign with counter_shards = N keeps its folded totals on the Campaign
+# row and the deltas since the last fold in N CampaignCounterShard rows.
+# Each donation updates one shard, picked by hashing its id, so concurrent
+# donations lock different rows. fold_counter_shards() periodically moves
+# the deltas into the Campaign row. Reads add the two together through
+# counter_totals(), which is cached for COUNTER_SHARD_CACHE_TIMEOUT seconds.
+from decimal import ROUND_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+from campaigns.list_cache import invalidate_campaign
+from campaigns.models import Campaign, CampaignCounterShard
+
+
+SHARDED_COUNTERS = ('raised_amount', 'donation_count', 'completed_donation_count', 'unique_donor_count')
+TOTALS_KEY_PREFIX = 'campaigns:counter-totals'
+
+_COUNTER_OUTPUT_FIELDS = {
+    'raised_amount': DecimalField(max_digits=12, decimal_places=2),
+    'donation_count': IntegerField(),
+    'completed_donation_count': IntegerField(),
+    'unique_donor_count': IntegerField(),
+}
+
+
+def _totals_key(campaign_id):
+    return f'{TOTALS_KEY_PREFIX}:{campaign_id}'
+
+
+def shard_index(key, shards):
+    """The shard a donation (UUID `key`) updates first"""
+    return key.int % shards
+
+
+def _shard_budget(goal_amount, raised_amount, shards):
+    # Rounded up, so a campaign a few cents short of its goal stays open
+    remaining = max(goal_amount - raised_amount, Decimal('0'))
+    return (remaining / shards).quantize(Decimal('0.01'), rounding=ROUND_UP)
+
+
+def update_counter_shard(campaign_id, shards, key, enforce_goal=False, **updates):
+    """
+    Apply `updates` (F() expressions over SHARDED_COUNTERS) to one shard of
+    the campaign. With enforce_goal only a shard still under its budget
+    accepts, trying the donation's own shard first. Returns False when no
+    shard accepted.
+    """
+    first = shard_index(key, shards)
+    indexes = [(first + offset) % shards for offset in range(shards)] if enforce_goal else [first]
+    for index in indexes:
+        rows = CampaignCounterShard.objects.filter(campaign_id=campaign_id, index=index)
+        if enforce_goal:
+            rows = rows.filter(raised_amount__lt=F('budget'))
+        if rows.update(**updates, updated_at=Now()):
+            return True
+    return False
+
+
+def fold_counter_shards(campaign_id):
+    """
+    Move the campaign's shard deltas into its Campaign row and split what is
+    still missing to the goal into new shard budgets. Returns the folded
+    deltas, or None when the campaign has no shards.
+    """
+    with transaction.atomic():
+        campaign = Campaign.objects.select_for_update().only('goal_amount', 'raised_amount').get(pk=campaign_id)
+        shards = list(CampaignCounterShard.objects.select_for_update().filter(campaign_id=campaign_id))
+        if not shards:
+            return None
+
+        deltas = {field: sum(getattr(shard, field) for shard in shards) for field in SHARDED_COUNTERS}
+        if any(deltas.values()):
+            Campaign.objects.filter(pk=campaign_id).update(
+                **{field: F(field) + delta for field, delta in deltas.items()},
+                updated_at=Now(),
+            )
+        CampaignCounterShard.objects.filter(campaign_id=campaign_id).update(
+            **{field: 0 for field in SHARDED_COUNTERS},
+            budget=_shard_budget(campaign.goal_amount, campaign.raised_amount + deltas['raised_amount'], len(shards)),
+            updated_at=Now(),
+        )
+        if any(deltas.values()):
+            invalidate_campaign(campaign_id)
+    return deltas
+
+
+def set_counter_shards(campaign_id, shards):
+    """Switch a campaign to N counter shards (0 turns sharding off)"""
+    with transaction.atomic():
+        fold_counter_shards(campaign_id)
+        campaign = Campaign.objects.select_for_update().only('goal_amount', 'raised_amount').get(pk=campaign_id)
+        CampaignCounterShard.objects.filter(campaign_id=campaign_id).delete()
+        if shards:
+            budget = _shard_budget(campaign.goal_amount, campaign.raised_amount, shards)
+            CampaignCounterShard.objects.bulk_create([
+                CampaignCounterShard(campaign_id=campaign_id, index=index, budget=budget)
+                for index in range(shards)
+            ])
+        Campaign.objects.filter(pk=campaign_id).update(counter_shards=shards, updated_at=Now())
+        invalidate_campaign(campaign_id)
+
+
+def counter_totals(campaign_ids):
+    """
+    {campaign_id: {counter: total}} for sharded campaigns, the Campaign row
+    plus its shards read in one query, cached for a few seconds.
+    """
+    keys = {campaign_id: _totals_key(campaign_id) for campaign_id in campaign_ids}
+    cached = cache.get_many(keys.values())
+    totals = {campaign_id: cached[key] for campaign_id, key in keys.items() if key in cached}
+
+    missing = [campaign_id for campaign_id in keys if campaign_id not in totals]
+    if missing:
+        rows = Campaign.objects.filter(pk__in=missing).order_by().values('pk', *SHARDED_COUNTERS).annotate(**{
+            f'pending_{field}': Coalesce(Sum(f'shards__{field}'), Value(0), output_field=output_field)
+            for field, output_field in _COUNTER_OUTPUT_FIELDS.items()
+        })
+        fresh = {
+            row['pk']: {field: row[field] + row[f'pending_{field}'] for field in SHARDED_COUNTERS}
+            for row in rows
+        }
+        cache.set_many({keys[campaign_id]: value for campaign_id, value in fresh.items()},
+                       settings.COUNTER_SHARD_CACHE_TIMEOUT)
+        totals.update(fresh)
+    return totals
+
+
+def apply_counter_totals(campaigns):
+    """
+    Replace the folded counters of sharded campaigns (instances or values()
+    rows carrying counter_shards) with their current totals, in place.
+    """
+    def get(campaign, field):
+        return campaign[field] if isinstance(campaign, dict) else getattr(campaign, field)
+
+    sharded = [campaign for campaign in campaigns if get(campaign, 'counter_shards')]
+    if not sharded:
+        return
+    totals = counter_totals({get(campaign, 'id') for campaign in sharded})
+    for campaign in sharded:
+        current = totals.get(get(campaign, 'id'), {})
+        for field, value in current.items():
+            if isinstance(campaign, dict):
+                if field in campaign:
+                    campaign[field] = value
+            elif field not in campaign.get_deferred_fields():
+                setattr(campaign, field, value)
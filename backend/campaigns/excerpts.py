@@ -0,0 +1,17 @@
+# Fixed-length plain-text excerpts of campaign descriptions for list cards
+EXCERPT_LENGTH = 200
+ELLIPSIS = '…'
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """
+    First `length` characters of `text` with whitespace collapsed, cut back
+    to a word boundary and ending in an ellipsis when truncated.
+    """
+    text = ' '.join((text or '').split())
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if ' ' in cut and text[length - 1] != ' ':
+        cut = cut.rsplit(' ', 1)[0]
+    return cut.rstrip(' .,;:') + ELLIPSIS
@@ -0,0 +1,124 @@
+# Cache tags for campaign data, shared by the list page cache and the
+# Surrogate-Key headers of the public detail endpoints
+import hashlib
+
+from core.cache import invalidate_tags
+from core.fieldsets import parse_fieldset
+
+
+LIST_CACHE_KEY_PREFIX = 'campaigns:list:page'
+
+# Membership tags: a page depends on the set and order of campaigns matching
+# its filter. Row tags: a page depends on the content of the rows it shows.
+ALL_CAMPAIGNS_TAG = 'campaigns:list'
+SEARCH_TAG = 'campaigns:search'
+CATEGORIES_TAG = 'categories'
+
+
+def category_listing_tag(category_id):
+    return f'campaigns:list:category:{category_id}'
+
+
+def campaign_tag(campaign_id):
+    return f'campaign:{campaign_id}'
+
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+
+def milestones_tag(campaign_id):
+    return f'milestones:{campaign_id}'
+
+
+def list_cache_key(request):
+    """
+    Cache key for a list_campaigns request, or None when the response is
+    specific to the requesting user and must not be shared.
+    """
+    params = request.query_params
+    if params.get('created_by') == 'me' and request.user.is_authenticated:
+        return None
+
+    status_filter = params.get('status')
+    fields, exclude = parse_fieldset(request)
+    parts = [
+        request.scheme,
+        request.get_host(),
+        params.get('category', ''),
+        status_filter if status_filter in ('active', 'inactive') else '',
+        ' '.join(params.get('search', '').split()),
+        params.get('page', ''),
+        params.get('pagination', ''),
+        params.get('cursor', ''),
+        '*' if fields is None else ','.join(sorted(fields)),
+        ','.join(sorted(exclude)),
+        params.get('excerpt', '').lower(),
+    ]
+    digest = hashlib.md5('\x1f'.join(parts).encode('utf-8')).hexdigest()
+    return f'{LIST_CACHE_KEY_PREFIX}:{digest}'
+
+
+def listing_tags(request):
+    """Membership tags for the filter a list request applies"""
+    params = request.query_params
+    category = params.get('category')
+    tags = [category_listing_tag(category) if category else ALL_CAMPAIGNS_TAG]
+    if ' '.join(params.get('search', '').split()):
+        tags.append(SEARCH_TAG)
+    return tags
+
+
+# values() lookups row_tags needs when the page is built from rows
+ROW_TAG_PATHS = ('id', 'category_id', 'created_by_id')
+
+
+def row_tags(campaigns):
+    """Content tags for the campaigns shown on a page (instances or values() rows)"""
+    tags = set()
+    for campaign in campaigns:
+        if isinstance(campaign, dict):
+            pk, category_id, creator_id = (campaign[path] for path in ROW_TAG_PATHS)
+        else:
+            pk, category_id, creator_id = campaign.pk, campaign.category_id, campaign.created_by_id
+        tags.add(campaign_tag(pk))
+        tags.add(category_tag(category_id))
+        tags.add(user_tag(creator_id))
+    return tags
+
+
+def invalidate_campaign(campaign_id):
+    """A campaign's displayed values changed (amounts, counters, flags)"""
+    invalidate_tags(campaign_tag(campaign_id))
+
+
+def invalidate_campaign_listing(campaign_id=None, category_ids=()):
+    """
+    A campaign was added, removed, or changed in a way that moves it between
+    filters or search results. Pass the old and new category ids.
+    """
+    invalidate_tags(
+        ALL_CAMPAIGNS_TAG,
+        SEARCH_TAG,
+        campaign_tag(campaign_id) if campaign_id else None,
+        *[category_listing_tag(category_id) for category_id in category_ids],
+    )
+
+
+def invalidate_category(category_id, renamed=False):
+    """A category changed; a rename also changes search matches"""
+    invalidate_tags(category_tag(category_id), CATEGORIES_TAG, SEARCH_TAG if renamed else None)
+
+
+def invalidate_milestones(campaign_id):
+    """A milestone of the campaign was added, changed or removed"""
+    invalidate_tags(milestones_tag(campaign_id))
+
+
+def invalidate_user(user_id):
+    """A campaign creator's profile changed"""
+    invalidate_tags(user_tag(user_id))
@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from accounts.models import User
+from campaigns.models import Campaign, CampaignCategory
+from campaigns.search import search_campaigns, update_search_vector
+
+
+TOPIC_WORDS = (
+    'help children school books medical surgery treatment flood relief village water '
+    'clean well shelter food family hospital cancer kidney stray dogs cats rescue '
+    'vaccination forest trees plantation river cleanup education scholarship girls '
+    'library computers teachers ambulance oxygen earthquake cyclone blankets winter '
+    'orphanage elderly care community kitchen meals farmers drought seeds solar lamps'
+).split()
+
+# Filler vocabulary so topic words are as selective as they are in real descriptions
+FILLER_WORDS = [f'word{i}' for i in range(5000)]
+
+SEARCH_TERMS = ['surgery', 'flood relief', 'stray dogs', 'scholarship girls', 'solar', 'kidney treatment']
+
+
+class Command(BaseCommand):
+    help = 'Compare ranked full-text search against the legacy icontains search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaigns', type=int, default=100000, help='Number of campaigns to seed')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per search term')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded campaigns')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['campaigns'])
+            self.report(options['runs'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, total):
+        rng = random.Random(42)
+        user, _ = User.objects.get_or_create(
+            email='benchmark@fundtracer.local',
+            defaults={'full_name': 'Benchmark User', 'phone_number': ''},
+        )
+        categories = list(CampaignCategory.objects.all()) or [
+            CampaignCategory.objects.create(name='Benchmark')
+        ]
+
+        self.stdout.write(f'Seeding {total} campaigns...')
+        batch = []
+        for i in range(total):
+            batch.append(Campaign(
+                title=' '.join(rng.choices(TOPIC_WORDS, k=2) + rng.choices(FILLER_WORDS, k=3)).title(),
+                description=' '.join(rng.choices(TOPIC_WORDS, k=4) + rng.choices(FILLER_WORDS, k=116)),
+                goal_amount=rng.randint(1000, 100000),
+                campaign_type='INDIVIDUAL',
+                category=rng.choice(categories),
+                is_active=True,
+                created_by=user,
+            ))
+            if len(batch) == 5000:
+                Campaign.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Campaign.objects.bulk_create(batch)
+
+        update_search_vector(Campaign.objects.filter(created_by=user))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE campaigns_campaign')
+
+    def report(self, runs):
+        def icontains(term):
+            queryset = Campaign.objects.filter(
+                Q(title__icontains=term) | Q(description__icontains=term)
+            ).order_by('-created_at')
+            return queryset.count(), list(queryset[:10])
+
+        def full_text(term):
+            queryset = search_campaigns(Campaign.objects.all(), term).order_by('-search_rank', '-created_at')
+            return queryset.count(), list(queryset[:10])
+
+        self.stdout.write(f"{'term':<20}{'icontains ms (p50/p95)':>26}{'full-text ms (p50/p95)':>26}{'matches':>18}")
+        for term in SEARCH_TERMS:
+            legacy, legacy_count = self.time(icontains, term, runs)
+            ranked, ranked_count = self.time(full_text, term, runs)
+            self.stdout.write(
+                f'{term:<20}'
+                f'{legacy[0]:>13.2f} / {legacy[1]:<10.2f}'
+                f'{ranked[0]:>13.2f} / {ranked[1]:<10.2f}'
+                f'{legacy_count:>9}/{ranked_count:<8}'
+            )
+
+    def time(self, search, term, runs):
+        samples = []
+        count = 0
+        for _ in range(runs):
+            start = time.perf_counter()
+            count, _ = search(term)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return (statistics.median(samples), p95), count
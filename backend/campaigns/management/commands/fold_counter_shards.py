@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from campaigns.counter_shards import fold_counter_shards
+from campaigns.models import Campaign
+
+
+class Command(BaseCommand):
+    help = 'Fold the counter shards of sharded campaigns back into their Campaign rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running, folding every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            folded = 0
+            for campaign_id in Campaign.objects.filter(counter_shards__gt=0).values_list('pk', flat=True):
+                deltas = fold_counter_shards(campaign_id)
+                if deltas and any(deltas.values()):
+                    folded += 1
+            self.stdout.write(f'Folded shards of {folded} campaigns')
+            if options['every'] is None:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+POPULATE_SEARCH_VECTOR = """
+UPDATE campaigns_campaign AS c
+SET search_vector =
+    setweight(to_tsvector('english', COALESCE(c.title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE(c.description, '')), 'B') ||
+    setweight(to_tsvector('english', COALESCE(cat.name, '')), 'C')
+FROM campaigns_campaigncategory AS cat
+WHERE cat.id = c.category_id;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0008_milestone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='campaign_search_vector_idx'),
+        ),
+        migrations.RunSQL(POPULATE_SEARCH_VECTOR, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:22
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0009_campaign_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='campaign_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:23
+
+from django.db import migrations, models
+
+
+BACKFILL_DONATION_COUNTERS = """
+UPDATE campaigns_campaign AS c
+SET donation_count = d.total,
+    completed_donation_count = d.completed,
+    unique_donor_count = d.donors
+FROM (
+    SELECT campaign_id,
+           COUNT(*) AS total,
+           COUNT(*) FILTER (WHERE status = 'COMPLETED') AS completed,
+           COUNT(DISTINCT donor_id) AS donors
+    FROM donations_donation
+    GROUP BY campaign_id
+) AS d
+WHERE d.campaign_id = c.id;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0010_campaign_title_trigram_index'),
+        ('donations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='completed_donation_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='donation_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='unique_donor_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(BACKFILL_DONATION_COUNTERS, reverse_sql=migrations.RunSQL.noop),
+    ]
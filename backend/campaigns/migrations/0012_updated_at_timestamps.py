@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:31
+
+from django.db import migrations, models
+
+
+# Existing rows have not changed since creation as far as we know
+BACKFILL_UPDATED_AT = """
+UPDATE campaigns_campaign SET updated_at = created_at;
+UPDATE campaigns_campaigncategory SET updated_at = created_at;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0011_campaign_donation_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='campaigncategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL(BACKFILL_UPDATED_AT, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+from campaigns.excerpts import make_excerpt
+
+
+def backfill_excerpts(apps, schema_editor):
+    Campaign = apps.get_model('campaigns', 'Campaign')
+    batch = []
+    for campaign in Campaign.objects.only('pk', 'description').iterator(chunk_size=1000):
+        campaign.description_excerpt = make_excerpt(campaign.description)
+        batch.append(campaign)
+        if len(batch) == 1000:
+            Campaign.objects.bulk_update(batch, ['description_excerpt'])
+            batch = []
+    if batch:
+        Campaign.objects.bulk_update(batch, ['description_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0012_updated_at_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='description_excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
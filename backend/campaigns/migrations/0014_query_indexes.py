@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0013_campaign_description_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['is_active', 'created_at', 'id'], name='campaign_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='campaign_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(condition=models.Q(('is_active', True), ('raised_amount__lt', models.F('goal_amount'))), fields=['created_at', 'id'], name='campaign_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['is_completed', 'due_date'], name='milestone_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0014_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='counter_shards',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='CampaignCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('raised_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('donation_count', models.IntegerField(default=0)),
+                ('completed_donation_count', models.IntegerField(default=0)),
+                ('unique_donor_count', models.IntegerField(default=0)),
+                ('budget', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='campaigns.campaign')),
+            ],
+            options={
+                'unique_together': {('campaign', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0015_counter_shards'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(condition=models.Q(('fundtracer_verified', False), ('is_active', True)), fields=['created_at', 'id'], name='campaign_unverified_idx'),
+        ),
+    ]
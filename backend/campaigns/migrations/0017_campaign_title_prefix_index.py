@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-17 22:07
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0016_moderation_queue_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Lower('title'), name='text_pattern_ops'), name='campaign_title_prefix_idx'),
+        ),
+    ]
@@ -4,7 +4,10 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from campaigns.models import Campaign, Milestone
 from campaigns.serializers import MilestoneSerializer, MilestoneDetailSerializer
-from core.models import Notification
+from campaigns.conditional import milestone_list_validators, milestone_validators
+from campaigns.list_cache import invalidate_milestones
+from core.http_cache import conditional_get
+from core.notifications import notify_donors
 from django.utils import timezone
 from django.db import transaction
 
@@ -12,11 +15,13 @@ from django.db import transaction
 # -------------------- GET/CREATE MILESTONES FOR CAMPAIGN --------------------
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
+@conditional_get(milestone_list_validators)
 def milestones_list_create(request, campaign_id):
     """
     GET: Get all milestones for a campaign (public)
     POST: Create a new milestone for a campaign (creator only)
     /api/campaigns/<campaign_id>/milestones/
+    GET supports If-None-Match (304 Not Modified)
     """
     try:
         campaign = Campaign.objects.get(id=campaign_id)
@@ -57,6 +62,7 @@ def milestones_list_create(request, campaign_id):
             next_order = (last_milestone.order + 1) if last_milestone else 1
 
             milestone = serializer.save(campaign=campaign, order=next_order)
+            invalidate_milestones(campaign.pk)
 
             return Response({
                 'message': 'Milestone created successfully',
@@ -122,6 +128,7 @@ def create_milestone(request, campaign_id):
         next_order = (last_milestone.order + 1) if last_milestone else 1
 
         milestone = serializer.save(campaign=campaign, order=next_order)
+        invalidate_milestones(campaign.pk)
 
         return Response({
             'message': 'Milestone created successfully',
@@ -160,6 +167,7 @@ def update_milestone(request, campaign_id, milestone_id):
 
     if serializer.is_valid():
         milestone = serializer.save()
+        invalidate_milestones(campaign.pk)
         return Response({
             'message': 'Milestone updated successfully',
             'data': MilestoneDetailSerializer(milestone).data
@@ -215,16 +223,13 @@ def complete_milestone(request, campaign_id, milestone_id):
         milestone.save()
 
         # Notify all donors about the milestone completion
-        donors = campaign.donations.values_list('donor', flat=True).distinct()
-
-        for donor_id in donors:
-            Notification.objects.create(
-                recipient_id=donor_id,
-                campaign=campaign,
-                notification_type='MILESTONE_UPLOADED',
-                title=f'Milestone Completed: {milestone.title}',
-                message=f'The campaign "{campaign.title}" has uploaded a new milestone: {milestone.title}. {milestone.description}',
-            )
+        notify_donors(
+            campaign,
+            notification_type='MILESTONE_UPLOADED',
+            title=f'Milestone Completed: {milestone.title}',
+            message=f'The campaign "{campaign.title}" has uploaded a new milestone: {milestone.title}. {milestone.description}',
+        )
+        invalidate_milestones(campaign.pk)
 
     return Response({
         'message': 'Milestone completed successfully with image and donors notified',
@@ -235,14 +240,17 @@ def complete_milestone(request, campaign_id, milestone_id):
 # -------------------- GET MILESTONE DETAILS --------------------
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(milestone_validators)
 def get_milestone_detail(request, campaign_id, milestone_id):
     """
     Get details of a specific milestone
     GET /api/campaigns/<campaign_id>/milestones/<milestone_id>/
+    Supports If-None-Match (304 Not Modified)
     """
     try:
-        campaign = Campaign.objects.get(id=campaign_id)
-        milestone = Milestone.objects.get(id=milestone_id, campaign=campaign)
+        milestone = Milestone.objects.select_related(
+            'campaign__created_by', 'campaign__category'
+        ).get(id=milestone_id, campaign_id=campaign_id)
     except (Campaign.DoesNotExist, Milestone.DoesNotExist):
         return Response({
             'error': 'Campaign or milestone not found'
@@ -278,6 +286,7 @@ def delete_milestone(request, campaign_id, milestone_id):
         }, status=status.HTTP_403_FORBIDDEN)
 
     milestone.delete()
+    invalidate_milestones(campaign.pk)
 
     return Response({
         'message': 'Milestone deleted successfully'
@@ -1,12 +1,18 @@
 import uuid
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Lower
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from campaigns.excerpts import EXCERPT_LENGTH, make_excerpt
 
 
 class CampaignCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Campaign Categories"
@@ -35,6 +41,8 @@ class Campaign(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
     description = models.TextField()
+    # Precomputed from description on save, so list pages can skip the full text
+    description_excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, default='', editable=False)
     goal_amount = models.DecimalField(max_digits=12, decimal_places=2)
     raised_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     campaign_type = models.CharField(max_length=20, choices=CAMPAIGN_TYPE_CHOICES)
@@ -44,14 +52,56 @@ class Campaign(models.Model):
     fundtracer_verified = models.BooleanField(default=False)
     documents_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped by every write that changes what the API shows for the campaign
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='campaigns')
+    # Denormalized donation counters, maintained by donations.accounting
+    donation_count = models.PositiveIntegerField(default=0)
+    completed_donation_count = models.PositiveIntegerField(default=0)
+    unique_donor_count = models.PositiveIntegerField(default=0)
+    # 0: the counters above are updated in place. N > 0: donations update one
+    # of N CampaignCounterShard rows, folded back here periodically
+    counter_shards = models.PositiveSmallIntegerField(default=0)
+    # Maintained by campaigns.search.update_search_vector
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='campaign_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='campaign_title_trgm_idx'),
+            # Autocomplete prefixes too short for trigrams: lower(title) LIKE 'ab%'
+            models.Index(OpClass(Lower('title'), name='text_pattern_ops'), name='campaign_title_prefix_idx'),
+            # List pages filter on one column and walk (created_at, id) newest first
+            models.Index(fields=['is_active', 'created_at', 'id'], name='campaign_active_created_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], name='campaign_category_created_idx'),
+            # Active campaigns still short of their goal
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=Q(is_active=True, raised_amount__lt=F('goal_amount')),
+                name='campaign_open_created_idx',
+            ),
+            # The moderation queue: active campaigns awaiting verification, oldest first
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=Q(is_active=True, fundtracer_verified=False),
+                name='campaign_unverified_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if 'description' not in self.get_deferred_fields() and (
+            update_fields is None or 'description' in update_fields
+        ):
+            self.description_excerpt = make_excerpt(self.description)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'description_excerpt'}
+        super().save(*args, **kwargs)
+
     @property
     def progress_percentage(self):
         if self.goal_amount > 0:
@@ -64,6 +114,29 @@ class Campaign(models.Model):
         return self.raised_amount >= self.goal_amount
 
 
+class CampaignCounterShard(models.Model):
+    """
+    Donation counter deltas for a campaign in sharded counter mode, not yet
+    folded into the Campaign row (see campaigns.counter_shards). `budget` is
+    this shard's share of the amount still missing to the goal at the last
+    fold; the shard stops accepting donations once raised_amount reaches it.
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveSmallIntegerField()
+    raised_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    donation_count = models.IntegerField(default=0)
+    completed_donation_count = models.IntegerField(default=0)
+    unique_donor_count = models.IntegerField(default=0)
+    budget = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('campaign', 'index')
+
+    def __str__(self):
+        return f"{self.campaign_id} shard {self.index}"
+
+
 class Milestone(models.Model):
     """Milestones for campaign progress tracking"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -81,6 +154,10 @@ class Milestone(models.Model):
     class Meta:
         ordering = ['order']
         unique_together = ('campaign', 'order')
+        indexes = [
+            # Open milestones by due date (overdue checks)
+            models.Index(fields=['is_completed', 'due_date'], name='milestone_open_due_idx'),
+        ]
 
     def __str__(self):
         return f"{self.campaign.title} - Milestone {self.order}: {self.title}"
@@ -0,0 +1,49 @@
+# Bulk verification and rejection of campaigns by the admin API: one locking
+# SELECT and one UPDATE per batch, with the same side effects as the single
+# campaign views (dashboard counters, cache invalidation).
+from django.db import transaction
+from django.db.models.functions import Now
+
+from campaigns.list_cache import invalidate_campaign, invalidate_campaign_listing
+from campaigns.models import Campaign
+from core import platform_stats
+
+
+# The fields each action sets
+CAMPAIGN_MODERATION = {
+    'verify': {'fundtracer_verified': True},
+    'reject': {'fundtracer_verified': False, 'is_active': False},
+}
+
+
+def moderate_campaigns(campaign_ids, action):
+    """
+    Apply a CAMPAIGN_MODERATION action to the campaigns in one transaction.
+    Returns {campaign_id: outcome}, outcome being 'updated', 'unchanged' or
+    'not_found'.
+    """
+    updates = CAMPAIGN_MODERATION[action]
+    outcomes = {campaign_id: 'not_found' for campaign_id in campaign_ids}
+    with transaction.atomic():
+        current = Campaign.objects.select_for_update().filter(pk__in=outcomes).order_by('pk').values(
+            'pk', 'category_id', 'is_active', *updates,
+        )
+        changed = []
+        for campaign in current:
+            if all(campaign[field] == value for field, value in updates.items()):
+                outcomes[campaign['pk']] = 'unchanged'
+            else:
+                outcomes[campaign['pk']] = 'updated'
+                changed.append(campaign)
+        if not changed:
+            return outcomes
+
+        Campaign.objects.filter(pk__in=[campaign['pk'] for campaign in changed]).update(**updates, updated_at=Now())
+
+        deactivated = [campaign for campaign in changed if campaign['is_active'] and updates.get('is_active') is False]
+        if deactivated:
+            platform_stats.record_campaigns_deactivated([campaign['pk'] for campaign in deactivated])
+            invalidate_campaign_listing(category_ids={campaign['category_id'] for campaign in deactivated})
+        for campaign in changed:
+            invalidate_campaign(campaign['pk'])
+    return outcomes
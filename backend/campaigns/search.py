@@ -0,0 +1,130 @@
+# Full-text search over campaigns (PostgreSQL tsvector + GIN index)
+import hashlib
+
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Lower
+from campaigns.list_cache import ALL_CAMPAIGNS_TAG
+from campaigns.models import Campaign, CampaignCategory
+from core.cache import get_tagged, set_tagged, tag_versions
+
+
+SEARCH_CONFIG = 'english'
+
+# Weights: title ranks above description, category name lowest
+TITLE_WEIGHT = 'A'
+DESCRIPTION_WEIGHT = 'B'
+CATEGORY_WEIGHT = 'C'
+
+# Title autocomplete
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+SUGGEST_MAX_QUERY_LENGTH = 64
+SUGGEST_CACHE_TIMEOUT = 300
+# pg_trgm's default of 0.6 rejects common single-letter typos in short words
+SUGGEST_SIMILARITY_THRESHOLD = 0.3
+
+
+def campaign_search_vector():
+    """Expression computing a campaign's search vector from its own columns"""
+    category_name = Subquery(
+        CampaignCategory.objects.filter(pk=OuterRef('category_id')).values('name')[:1]
+    )
+    return (
+        SearchVector('title', weight=TITLE_WEIGHT, config=SEARCH_CONFIG) +
+        SearchVector('description', weight=DESCRIPTION_WEIGHT, config=SEARCH_CONFIG) +
+        SearchVector(category_name, weight=CATEGORY_WEIGHT, config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(campaigns):
+    """
+    Recompute the stored search vector in a single UPDATE.
+    Accepts a Campaign, a queryset of campaigns or an iterable of campaign ids.
+    """
+    if isinstance(campaigns, Campaign):
+        queryset = Campaign.objects.filter(pk=campaigns.pk)
+    elif hasattr(campaigns, 'model'):
+        queryset = campaigns
+    else:
+        queryset = Campaign.objects.filter(pk__in=list(campaigns))
+    return queryset.update(search_vector=campaign_search_vector())
+
+
+def search_campaigns(queryset, text, headline=True):
+    """
+    Filter a campaign queryset down to matches for `text`, annotated with
+    `search_rank` and (unless headline=False) a highlighted
+    `search_headline` snippet.
+    Accepts web-search syntax: quoted phrases, OR, and -exclusions.
+    """
+    query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+    queryset = queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query),
+    )
+    if headline:
+        queryset = queryset.annotate(
+            search_headline=SearchHeadline(
+                'description',
+                query,
+                config=SEARCH_CONFIG,
+                start_sel='<mark>',
+                stop_sel='</mark>',
+                max_words=35,
+                min_words=15,
+            ),
+        )
+    return queryset
+
+
+def normalize_suggest_query(text):
+    """Lowercase and collapse whitespace so equivalent prefixes share a cache entry"""
+    return ' '.join((text or '').lower().split())[:SUGGEST_MAX_QUERY_LENGTH]
+
+
+def suggest_titles(text, limit=SUGGEST_DEFAULT_LIMIT):
+    """
+    Top `limit` campaign titles for an autocomplete prefix, as id/title dicts.
+
+    Prefixes of three or more characters are matched with pg_trgm word
+    similarity through the title trigram index, which tolerates typos.
+    Shorter prefixes fall back to a prefix match on lower(title), which the
+    campaign_title_prefix_idx index serves.
+    Results are cached per normalized prefix until a campaign is added,
+    removed or retitled (the ALL_CAMPAIGNS_TAG listing tag).
+    """
+    prefix = normalize_suggest_query(text)
+    if not prefix:
+        return []
+
+    digest = hashlib.md5(prefix.encode('utf-8')).hexdigest()
+    cache_key = f'campaigns:suggest:{limit}:{digest}'
+    suggestions = get_tagged(cache_key)
+    if suggestions is not None:
+        return suggestions
+    versions = tag_versions([ALL_CAMPAIGNS_TAG])
+
+    if len(prefix) < 3:
+        queryset = Campaign.objects.annotate(lower_title=Lower('title')).filter(
+            lower_title__startswith=prefix,
+        ).order_by('title')
+    else:
+        queryset = Campaign.objects.filter(title__trigram_word_similar=prefix).annotate(
+            similarity=TrigramWordSimilarity(prefix, 'title'),
+        ).order_by('-similarity', 'title')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(SUGGEST_SIMILARITY_THRESHOLD)],
+            )
+        suggestions = [
+            {'id': str(pk), 'title': title}
+            for pk, title in queryset.values_list('id', 'title')[:limit]
+        ]
+    set_tagged(cache_key, suggestions, [ALL_CAMPAIGNS_TAG], versions=versions, timeout=SUGGEST_CACHE_TIMEOUT)
+    return suggestions
@@ -1,6 +1,21 @@
 from rest_framework import serializers
 from campaigns.models import Campaign, CampaignCategory, Milestone
 from accounts.serializers import UserSerializer
+from core.fieldsets import SparseFieldsetMixin
+from campaigns.search import update_search_vector
+from campaigns.list_cache import invalidate_campaign, invalidate_campaign_listing
+from campaigns.counter_shards import fold_counter_shards
+from core.platform_stats import record_campaign_activity_change, record_campaign_created
+
+
+def progress_percentage(raised_amount, goal_amount):
+    if goal_amount == 0:
+        return 0
+    return round((raised_amount / goal_amount) * 100, 2)
+
+
+def goal_reached(raised_amount, goal_amount):
+    return raised_amount >= goal_amount
 
 
 class CampaignCategorySerializer(serializers.ModelSerializer):
@@ -9,11 +24,15 @@ class CampaignCategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description']
 
 
-class CampaignListSerializer(serializers.ModelSerializer):
+class CampaignListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Campaign card for list pages. Honours a sparse fieldset in
+    context['fieldset'], and context['excerpt'] serves `description` from
+    the precomputed description_excerpt column.
+    """
     created_by = UserSerializer(read_only=True)
     category = CampaignCategorySerializer(read_only=True)
     progress_percentage = serializers.SerializerMethodField()
-    donation_count = serializers.SerializerMethodField()
     goal_reached = serializers.SerializerMethodField()
 
     class Meta:
@@ -23,17 +42,43 @@ class CampaignListSerializer(serializers.ModelSerializer):
             'progress_percentage', 'category', 'campaign_type', 'is_active',
             'image', 'fundtracer_verified', 'created_by', 'donation_count', 'goal_reached', 'created_at'
         ]
+        # Columns read by computed fields (see core.fieldsets), and the same
+        # computations over values() rows (see core.row_serializers)
+        field_columns = {
+            'progress_percentage': ['raised_amount', 'goal_amount'],
+            'goal_reached': ['raised_amount', 'goal_amount'],
+        }
+        row_methods = {
+            'progress_percentage': progress_percentage,
+            'goal_reached': goal_reached,
+        }
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('excerpt') and 'description' in fields:
+            fields['description'] = serializers.CharField(source='description_excerpt', read_only=True)
+        return fields
 
     def get_progress_percentage(self, obj):
-        if obj.goal_amount == 0:
-            return 0
-        return round((obj.raised_amount / obj.goal_amount) * 100, 2)
-
-    def get_donation_count(self, obj):
-        return obj.donations.count()
+        return progress_percentage(obj.raised_amount, obj.goal_amount)
 
     def get_goal_reached(self, obj):
-        return obj.goal_reached
+        return goal_reached(obj.raised_amount, obj.goal_amount)
+
+
+class CampaignSearchResultSerializer(CampaignListSerializer):
+    """List item plus relevance rank and a highlighted description snippet"""
+    search_rank = serializers.FloatField(read_only=True)
+    search_headline = serializers.CharField(read_only=True)
+
+    class Meta(CampaignListSerializer.Meta):
+        fields = CampaignListSerializer.Meta.fields + ['search_rank', 'search_headline']
+        # Annotations computed by campaigns.search.search_campaigns
+        field_columns = {
+            **CampaignListSerializer.Meta.field_columns,
+            'search_rank': [],
+            'search_headline': [],
+        }
 
 
 class CampaignDetailSerializer(serializers.ModelSerializer):
@@ -41,7 +86,6 @@ class CampaignDetailSerializer(serializers.ModelSerializer):
     category = CampaignCategorySerializer(read_only=True)
     progress_percentage = serializers.SerializerMethodField()
     is_owner = serializers.SerializerMethodField()
-    donation_count = serializers.SerializerMethodField()
     goal_reached = serializers.SerializerMethodField()
 
     class Meta:
@@ -63,9 +107,6 @@ class CampaignDetailSerializer(serializers.ModelSerializer):
             return obj.created_by == request.user
         return False
 
-    def get_donation_count(self, obj):
-        return obj.donations.count()
-
     def get_goal_reached(self, obj):
         return obj.goal_reached
 
@@ -73,6 +114,11 @@ class CampaignDetailSerializer(serializers.ModelSerializer):
 class CampaignCreateUpdateSerializer(serializers.ModelSerializer):
     category_id = serializers.IntegerField(write_only=True)
 
+    # Changes to these fields invalidate the stored search vector
+    SEARCHABLE_FIELDS = {'title', 'description', 'category_id'}
+    # Changes to these fields can move the campaign between list filters
+    LISTING_FIELDS = SEARCHABLE_FIELDS | {'is_active'}
+
     class Meta:
         model = Campaign
         fields = ['title', 'description', 'goal_amount', 'category_id', 'campaign_type', 'is_active', 'image']
@@ -84,13 +130,35 @@ class CampaignCreateUpdateSerializer(serializers.ModelSerializer):
             category_id=category_id,
             **validated_data
         )
+        update_search_vector(campaign)
+        record_campaign_created(campaign)
+        invalidate_campaign_listing(category_ids=[campaign.category_id])
         return campaign
 
     def update(self, instance, validated_data):
-        if 'category_id' in validated_data:
-            category_id = validated_data.pop('category_id')
-            instance.category_id = category_id
-        return super().update(instance, validated_data)
+        reindex = bool(self.SEARCHABLE_FIELDS & validated_data.keys())
+        relist = bool(self.LISTING_FIELDS & validated_data.keys())
+        old_category_id = instance.category_id
+        was_active = instance.is_active
+        # Save only the submitted columns so concurrent donation counter
+        # and raised_amount updates on the same row are not overwritten
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        if instance.is_active != was_active:
+            record_campaign_activity_change(instance, was_active)
+        if reindex:
+            update_search_vector(instance)
+        if 'goal_amount' in validated_data and instance.counter_shards:
+            # Re-split the amount missing to the new goal across the shards
+            fold_counter_shards(instance.pk)
+        if relist:
+            invalidate_campaign_listing(
+                instance.pk, category_ids={old_category_id, instance.category_id}
+            )
+        else:
+            invalidate_campaign(instance.pk)
+        return instance
 
 
 class MilestoneSerializer(serializers.ModelSerializer):
@@ -0,0 +1,438 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from campaigns.models import Campaign, CampaignCategory, Milestone
+from campaigns.search import SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT, search_campaigns, update_search_vector
+from core.cache import cache_stats
+from core.platform_stats import rebuild_platform_stats, recount, stats_drift, stored
+from donations.models import Donation
+
+
+class CampaignListCacheTests(TestCase):
+    """Tag invalidation of cached list_campaigns pages"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(
+            email='creator@example.com', full_name='Campaign Creator', phone_number='5550000001',
+        )
+        cls.donor = User.objects.create(
+            email='donor@example.com', full_name='Some Donor', phone_number='5550000002',
+        )
+        cls.medical = CampaignCategory.objects.create(name='Cache Medical')
+        cls.education = CampaignCategory.objects.create(name='Cache Education')
+        campaigns = Campaign.objects.bulk_create([
+            Campaign(
+                title=f'Campaign {i}', description='Description', goal_amount=Decimal('1000.00'),
+                campaign_type='NGO', is_active=True,
+                category=cls.medical if i % 2 else cls.education, created_by=cls.creator,
+            )
+            for i in range(25)
+        ])
+        # Newest first: the last created campaign is on page 1, the first on page 3
+        cls.first_page_campaign = campaigns[-1]
+        cls.last_page_campaign = campaigns[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.assertEqual(self.client.get('/api/campaigns/?page=2')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/campaigns/?page=2')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_donation_evicts_only_pages_showing_the_campaign(self):
+        self.client.get('/api/campaigns/?page=1')
+        self.client.get('/api/campaigns/?page=3')
+
+        donor = APIClient()
+        donor.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+        with self.captureOnCommitCallbacks(execute=True):
+            donor.post('/api/donations/', {
+                'campaign': str(self.last_page_campaign.id), 'amount': '25.00',
+            }, format='json')
+
+        self.assertEqual(self.client.get('/api/campaigns/?page=1')['X-Cache'], 'HIT')
+        response = self.client.get('/api/campaigns/?page=3')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        row = next(r for r in response.data['results'] if r['id'] == str(self.last_page_campaign.id))
+        self.assertEqual(row['donation_count'], 1)
+        self.assertEqual(cache_stats()['evictions'], 1)
+
+    def test_new_campaign_evicts_only_its_category_listing(self):
+        self.client.get(f'/api/campaigns/?category={self.medical.id}')
+        self.client.get(f'/api/campaigns/?category={self.education.id}')
+
+        creator = APIClient()
+        creator.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        with self.captureOnCommitCallbacks(execute=True):
+            creator.post('/api/campaigns/create/', {
+                'title': 'Brand new', 'description': 'Fresh', 'goal_amount': '500.00',
+                'category_id': self.medical.id, 'campaign_type': 'NGO', 'is_active': True,
+            }, format='json')
+
+        self.assertEqual(self.client.get(f'/api/campaigns/?category={self.education.id}')['X-Cache'], 'HIT')
+        response = self.client.get(f'/api/campaigns/?category={self.medical.id}')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['title'], 'Brand new')
+
+    def test_own_campaigns_are_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        self.assertEqual(self.client.get('/api/campaigns/?created_by=me')['X-Cache'], 'BYPASS')
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / Last-Modified revalidation of the public campaign GET endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(
+            email='creator@example.com', full_name='Campaign Creator', phone_number='5550000001',
+        )
+        cls.donor = User.objects.create(
+            email='donor@example.com', full_name='Some Donor', phone_number='5550000002',
+        )
+        cls.category = CampaignCategory.objects.create(name='Conditional Medical')
+        cls.campaign = Campaign.objects.create(
+            title='Clinic roof', description='Description', goal_amount=Decimal('1000.00'),
+            campaign_type='NGO', is_active=True, category=cls.category, created_by=cls.creator,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_matching_etag_answers_304_with_one_query(self):
+        url = f'/api/campaigns/{self.campaign.id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn(f'campaign:{self.campaign.id}', response['Surrogate-Key'].split())
+
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+        stats_url = f'/api/campaigns/{self.campaign.id}/stats/'
+        stats = self.client.get(stats_url)
+        not_modified = self.client.get(stats_url, HTTP_IF_MODIFIED_SINCE=stats['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_creator_profile_change_is_not_revalidated_as_unchanged(self):
+        url = f'/api/campaigns/{self.campaign.id}/'
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+
+        User.objects.filter(pk=self.creator.pk).update(full_name='Renamed Creator')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['data']['created_by']['full_name'], 'Renamed Creator')
+
+    def test_lists_revalidate_on_deletions(self):
+        url = '/api/campaigns/categories/'
+        spare = CampaignCategory.objects.create(name='Conditional Spare')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        spare.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+        url = f'/api/campaigns/{self.campaign.id}/milestones/'
+        milestone = Milestone.objects.create(
+            campaign=self.campaign, title='Roof frame', description='Frame is up',
+            due_date=timezone.now() + timedelta(days=30),
+        )
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        milestone.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_donation_changes_campaign_etag(self):
+        url = f'/api/campaigns/{self.campaign.id}/stats/'
+        etag = self.client.get(url)['ETag']
+
+        donor = APIClient()
+        donor.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+        donor.post('/api/donations/', {'campaign': str(self.campaign.id), 'amount': '25.00'}, format='json')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_owner_view_is_private_and_has_its_own_etag(self):
+        url = f'/api/campaigns/{self.campaign.id}/'
+        anonymous = self.client.get(url)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        owner = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous['ETag'])
+        self.assertEqual(owner.status_code, 200)
+        self.assertTrue(owner.data['data']['is_owner'])
+        self.assertIn('private', owner['Cache-Control'])
+
+    def test_milestone_creation_purges_milestone_key(self):
+        RECORDED_PURGES.clear()
+        creator = APIClient()
+        creator.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        with self.settings(SURROGATE_PURGE_HANDLER='campaigns.tests.record_purge'):
+            with self.captureOnCommitCallbacks(execute=True):
+                creator.post(f'/api/campaigns/{self.campaign.id}/milestones/', {
+                    'title': 'Roof frame', 'description': 'Frame is up',
+                    'due_date': '2030-01-01T00:00:00Z',
+                }, format='json')
+        self.assertIn([f'milestones:{self.campaign.id}'], RECORDED_PURGES)
+
+
+RECORDED_PURGES = []
+
+
+def record_purge(keys):
+    RECORDED_PURGES.append(keys)
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= / ?exclude= / ?excerpt= on list_campaigns, in the payload and in the SQL"""
+
+    @classmethod
+    def setUpTestData(cls):
+        creator = User.objects.create(
+            email='creator@example.com', full_name='Campaign Creator', phone_number='5550000001',
+        )
+        category = CampaignCategory.objects.create(name='Sparse Medical')
+        for i in range(3):
+            Campaign.objects.create(
+                title=f'Water well {i}', description='Clean drinking water for the whole village. ' * 20,
+                goal_amount=Decimal('1000.00'), campaign_type='NGO', is_active=True,
+                category=category, created_by=creator,
+            )
+        update_search_vector(Campaign.objects.all())
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/campaigns/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results'], queries.captured_queries[-1]['sql']
+
+    def test_fields_limit_payload_and_columns(self):
+        results, sql = self.get('fields=id,title,raised_amount')
+        self.assertEqual(set(results[0]), {'id', 'title', 'raised_amount'})
+        self.assertNotIn('"campaigns_campaign"."description"', sql)
+        self.assertNotIn('accounts_user', sql)
+
+    def test_nested_fields(self):
+        results, sql = self.get('fields=title,created_by.first_name')
+        self.assertEqual(results[0]['created_by'], {'first_name': 'Campaign'})
+        self.assertIn('"accounts_user"."full_name"', sql)
+        self.assertNotIn('"accounts_user"."email"', sql)
+
+    def test_exclude_drops_join(self):
+        results, sql = self.get('exclude=description,created_by,category')
+        self.assertNotIn('created_by', results[0])
+        self.assertIn('progress_percentage', results[0])
+        self.assertNotIn('JOIN', sql)
+
+    def test_excerpt_mode_skips_full_description(self):
+        results, sql = self.get('excerpt=true')
+        self.assertLessEqual(len(results[0]['description']), 200)
+        self.assertTrue(results[0]['description'].endswith('…'))
+        self.assertNotIn('"campaigns_campaign"."description",', sql)
+
+    def test_search_fields(self):
+        results, sql = self.get('search=water&fields=id,search_rank')
+        self.assertEqual(set(results[0]), {'id', 'search_rank'})
+        self.assertNotIn('ts_headline', sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/campaigns/?fields=title,created_by.password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('created_by.password', response.data['error'])
+
+
+class CampaignSearchTests(TestCase):
+    """Ranked full-text search and the stored search vector behind it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(
+            email='creator@example.com', full_name='Campaign Creator', phone_number='5550000001',
+        )
+        cls.category = CampaignCategory.objects.create(name='Search Relief')
+        cls.in_title, cls.in_description, cls.solar = Campaign.objects.bulk_create([
+            Campaign(
+                title=title, description=description, goal_amount=Decimal('1000.00'),
+                campaign_type='NGO', is_active=True, category=cls.category, created_by=cls.creator,
+            )
+            for title, description in [
+                ('Clean water for the village', 'Wells and pumps for families.'),
+                ('School rebuild', 'Classrooms, desks and a tank of clean water for the pupils.'),
+                ('Solar lamps', 'Lighting for the village school at night.'),
+            ]
+        ])
+        update_search_vector(Campaign.objects.all())
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def titles(self, text):
+        return [campaign.title for campaign in search_campaigns(Campaign.objects.all(), text).order_by('-search_rank')]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.titles('water'), ['Clean water for the village', 'School rebuild'])
+        # Stemmed: "wells" matches "well"
+        self.assertEqual(self.titles('well'), ['Clean water for the village'])
+
+    def test_headline_marks_the_matched_words(self):
+        results = self.client.get('/api/campaigns/', {'search': 'pupils'}).data['results']
+        self.assertEqual([result['title'] for result in results], ['School rebuild'])
+        self.assertIn('<mark>pupils</mark>', results[0]['search_headline'])
+
+        rows = search_campaigns(Campaign.objects.all(), 'water', headline=False).values()
+        self.assertNotIn('search_headline', rows[0])
+
+    def test_websearch_syntax(self):
+        self.assertEqual(self.titles('"clean water" -pupils'), ['Clean water for the village'])
+        self.assertEqual(sorted(self.titles('solar or wells')), ['Clean water for the village', 'Solar lamps'])
+        self.assertEqual(self.titles('village -lamps'), ['Clean water for the village'])
+
+    def test_vector_follows_create_and_update(self):
+        creator = APIClient()
+        creator.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        campaign_id = creator.post('/api/campaigns/create/', {
+            'title': 'Orchard saplings', 'description': 'Fruit trees for the valley.', 'goal_amount': '500.00',
+            'category_id': self.category.id, 'campaign_type': 'NGO', 'is_active': True,
+        }, format='json').data['data']['id']
+        self.assertEqual(self.titles('orchard'), ['Orchard saplings'])
+        # The category name is indexed too
+        self.assertIn('Orchard saplings', self.titles('relief'))
+
+        creator.put(f'/api/campaigns/{campaign_id}/update/', {'title': 'Mango grove'}, format='json')
+        self.assertEqual(self.titles('orchard'), [])
+        self.assertEqual(self.titles('mango'), ['Mango grove'])
+        # Description words still match after a change to an unsearched field
+        creator.put(f'/api/campaigns/{campaign_id}/update/', {'goal_amount': '900.00'}, format='json')
+        self.assertEqual(self.titles('fruit'), ['Mango grove'])
+
+
+class CampaignSuggestTests(TestCase):
+    """Typo-tolerant title autocomplete and its cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create(
+            email='creator@example.com', full_name='Campaign Creator', phone_number='5550000001',
+        )
+        category = CampaignCategory.objects.create(name='Suggest Relief')
+        cls.campaigns = Campaign.objects.bulk_create([
+            Campaign(
+                title=title, description='Description', goal_amount=Decimal('1000.00'),
+                campaign_type='NGO', is_active=True, category=category, created_by=cls.creator,
+            )
+            for title in ['Zebra crossing', 'Water wells', 'Watershed repair', 'Warm blankets'] + [
+                f'Zoo keeper {i}' for i in range(25)
+            ]
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def suggest(self, **params):
+        response = self.client.get('/api/campaigns/suggest/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [suggestion['title'] for suggestion in response.data['data']]
+
+    def test_typos_are_tolerated(self):
+        self.assertEqual(self.suggest(q='zebar')[0], 'Zebra crossing')
+        self.assertEqual(self.suggest(q='  WATR ')[:2], ['Water wells', 'Watershed repair'])
+
+    def test_short_prefixes_match_title_starts(self):
+        self.assertEqual(self.suggest(q='wa'), ['Warm blankets', 'Water wells', 'Watershed repair'])
+        self.assertEqual(self.suggest(q='ze'), ['Zebra crossing'])
+        self.assertEqual(self.suggest(q=' '), [])
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.suggest(q='zo')), SUGGEST_DEFAULT_LIMIT)
+        self.assertEqual(len(self.suggest(q='zo', limit=0)), 1)
+        self.assertEqual(len(self.suggest(q='zo', limit=500)), SUGGEST_MAX_LIMIT)
+        self.assertEqual(self.client.get('/api/campaigns/suggest/', {'q': 'zo', 'limit': 'all'}).status_code, 400)
+
+    def test_retitled_campaigns_are_not_served_from_cache(self):
+        self.assertEqual(self.suggest(q='ze'), ['Zebra crossing'])
+        creator = APIClient()
+        creator.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        with self.captureOnCommitCallbacks(execute=True):
+            creator.put(f'/api/campaigns/{self.campaigns[0].pk}/update/', {'title': 'Pedestrian crossing'}, format='json')
+        self.assertEqual(self.suggest(q='ze'), [])
+
+
+class BulkCampaignModerationTests(TestCase):
+    """Bulk verification and rejection of campaigns"""
+
+    @classmethod
+    def setUpTestData(cls):
+        creator = User.objects.create(
+            email='creator@example.com', full_name='Campaign Creator', phone_number='5550000001',
+        )
+        cls.admin = User.objects.create(
+            email='admin@example.com', full_name='Site Admin', phone_number='5550000000', is_staff=True,
+        )
+        cls.category = CampaignCategory.objects.create(name='Moderated')
+        cls.active, cls.inactive, cls.verified = Campaign.objects.bulk_create([
+            Campaign(
+                title=f'Campaign {i}', description='Description', goal_amount=Decimal('1000.00'),
+                campaign_type='NGO', is_active=i != 1, fundtracer_verified=i == 2,
+                category=cls.category, created_by=creator,
+            )
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def test_verify_by_ids(self):
+        ids = [str(self.active.pk), str(self.verified.pk)]
+        data = self.client.post('/api/admin/campaigns/bulk/verify/', {'ids': ids}, format='json').json()['data']
+        self.assertEqual(data['results'], {ids[0]: 'updated', ids[1]: 'unchanged'})
+        self.active.refresh_from_db()
+        self.assertTrue(self.active.fundtracer_verified)
+
+    def test_filters_that_would_match_everything_are_refused(self):
+        for bad_filter in ({'verified': False}, {'verifed': 'false'}, {'active': 'no'}):
+            with self.subTest(filter=bad_filter):
+                response = self.client.post('/api/admin/campaigns/bulk/reject/', {'filter': bad_filter}, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertTrue(Campaign.objects.filter(pk=self.active.pk, is_active=True).exists())
+
+    def test_reject_by_filter_updates_listing_and_stats(self):
+        rebuild_platform_stats()
+        listed = self.client.get(f'/api/campaigns/?category={self.category.pk}&status=active').data['results']
+        self.assertEqual(len(listed), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.post(
+                '/api/admin/campaigns/bulk/reject/', {'filter': {'category': self.category.pk}}, format='json',
+            ).json()['data']
+
+        # The inactive, unverified campaign had nothing to change
+        self.assertEqual(data['summary'], {'updated': 2, 'unchanged': 1})
+        self.assertFalse(Campaign.objects.filter(category=self.category, is_active=True).exists())
+        self.assertFalse(Campaign.objects.filter(category=self.category, fundtracer_verified=True).exists())
+        self.assertEqual(self.client.get(f'/api/campaigns/?category={self.category.pk}&status=active').data['results'], [])
+        self.assertEqual(stats_drift(stored(), recount()), [])
@@ -15,6 +15,9 @@ urlpatterns = [
     # Campaign creation
     path('create/', views.create_campaign, name='create_campaign'),
     
+    # Title autocomplete (must come before the single item path)
+    path('suggest/', views.suggest_campaigns, name='suggest_campaigns'),
+    
     # Campaign details, update, delete
     path('<str:id>/', views.get_campaign, name='get_campaign'),
     path('<str:id>/donations/', get_campaign_donations, name='campaign_donations'),
@@ -1,15 +1,33 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from campaigns.models import Campaign
 from campaigns.serializers import (
     CampaignListSerializer, CampaignDetailSerializer,
-    CampaignCreateUpdateSerializer, CampaignCategorySerializer
+    CampaignCreateUpdateSerializer, CampaignCategorySerializer,
+    CampaignSearchResultSerializer
+)
+from campaigns.search import (
+    search_campaigns, suggest_titles, SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT
+)
+from campaigns.counter_shards import apply_counter_totals
+from campaigns.conditional import (
+    campaign_validators, campaign_stats_validators, category_list_validators,
+)
+from campaigns.list_cache import (
+    list_cache_key, listing_tags, row_tags, ROW_TAG_PATHS,
+    invalidate_campaign_listing,
 )
 from core.permissions import IsOwner, IsNGO
-from django.db.models import Q
+from core.platform_stats import record_campaign_deleted
+from core.pagination import get_paginator, uses_cursor_pagination
+from core.cache import get_tagged, set_tagged, tag_versions
+from core.http_cache import conditional_get
+from core.fieldsets import parse_fieldset, fieldset_columns
+from core.row_serializers import RowSerializer
 
 
 # -------------------- LIST CAMPAIGNS --------------------
@@ -20,7 +38,39 @@ def list_campaigns(request):
     List all campaigns with pagination and filtering
     GET /api/campaigns/
     Query parameters: ?page=1&category=medical&search=title&status=active&created_by=me
+    Search results are ranked by relevance (title > description > category)
+    and carry a highlighted `search_headline` snippet.
+    Cursor mode: ?cursor= (first page), then follow the opaque next/previous links;
+    it pages on (created_at, id), so search results come newest first there
+    instead of by rank
+    Sparse fieldsets: ?fields=id,title,created_by.full_name or ?exclude=description
+    (only the columns needed are loaded); ?excerpt=true serves a short
+    precomputed `description` instead of the full text
+    Pages are cached until a campaign, donation, category or creator change
+    touches them; the X-Cache header reports HIT, MISS or BYPASS.
     """
+    cache_key = list_cache_key(request)
+    if cache_key:
+        cached = get_tagged(cache_key)
+        if cached is not None:
+            response = Response(cached)
+            response['X-Cache'] = 'HIT'
+            return response
+        versions = tag_versions(listing_tags(request))
+    
+    serializer_class = CampaignListSerializer
+    if request.query_params.get('search'):
+        serializer_class = CampaignSearchResultSerializer
+    context = {
+        'fieldset': parse_fieldset(request),
+        'excerpt': request.query_params.get('excerpt', '').lower() in ('1', 'true'),
+    }
+    probe = serializer_class(context=context)
+    if probe.unknown_fields:
+        return Response({
+            'error': f"Unknown fields: {', '.join(sorted(probe.unknown_fields))}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     queryset = Campaign.objects.all()
     
     # Filters
@@ -42,35 +92,89 @@ def list_campaigns(request):
         queryset = queryset.filter(is_active=False)
     
     if search:
-        queryset = queryset.filter(
-            Q(title__icontains=search) |
-            Q(description__icontains=search)
-        )
+        queryset = search_campaigns(queryset, search, headline='search_headline' in probe.fields)
+        # The keyset paginator orders on (created_at, id) itself
+        if not uses_cursor_pagination(request):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+    
+    rows = None
+    if settings.FAST_LIST_SERIALIZATION:
+        # created_at/id drive the cursors; the foreign keys feed the cache tags
+        rows = RowSerializer(probe, extra_paths=('created_at', 'counter_shards', *ROW_TAG_PATHS))
+        queryset = queryset.values(*rows.paths)
+    else:
+        queryset = queryset.select_related('created_by', 'category')
+        columns = fieldset_columns(probe)
+        if columns is not None:
+            only, related = columns
+            queryset = queryset.select_related(None).only(
+                *only, 'created_at', 'counter_shards', 'category', 'created_by'
+            )
+            if related:
+                queryset = queryset.select_related(*related)
     
     # Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = 10
+    paginator = get_paginator(request, page_size=10)
     paginated_queryset = paginator.paginate_queryset(queryset, request)
+    apply_counter_totals(paginated_queryset)
     
-    serializer = CampaignListSerializer(paginated_queryset, many=True)
+    if rows is not None:
+        data = rows.serialize(paginated_queryset)
+    else:
+        data = serializer_class(paginated_queryset, many=True, context=context).data
     
-    return paginator.get_paginated_response(serializer.data)
+    response = paginator.get_paginated_response(data)
+    if cache_key:
+        set_tagged(cache_key, response.data, row_tags(paginated_queryset), versions=versions)
+        response['X-Cache'] = 'MISS'
+    else:
+        response['X-Cache'] = 'BYPASS'
+    return response
+
+
+# -------------------- SUGGEST CAMPAIGN TITLES --------------------
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def suggest_campaigns(request):
+    """
+    Typo-tolerant title autocomplete for the search box
+    GET /api/campaigns/suggest/?q=zebr&limit=8
+    Returns id/title pairs only, cached per prefix
+    """
+    try:
+        limit = int(request.query_params.get('limit', SUGGEST_DEFAULT_LIMIT))
+    except ValueError:
+        return Response({
+            'error': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+    
+    suggestions = suggest_titles(request.query_params.get('q', ''), limit=limit)
+    
+    return Response({
+        'message': 'Suggestions retrieved successfully',
+        'data': suggestions
+    }, status=status.HTTP_200_OK)
 
 
 # -------------------- GET CAMPAIGN DETAILS --------------------
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(campaign_validators)
 def get_campaign(request, id):
     """
     Get campaign details
     GET /api/campaigns/<id>/
+    Supports If-None-Match (304 Not Modified)
     """
     try:
-        campaign = Campaign.objects.get(id=id)
+        campaign = Campaign.objects.select_related('created_by', 'category').get(id=id)
     except Campaign.DoesNotExist:
         return Response({
             'error': 'Campaign not found'
         }, status=status.HTTP_404_NOT_FOUND)
+    apply_counter_totals([campaign])
     
     serializer = CampaignDetailSerializer(
         campaign,
@@ -181,7 +285,11 @@ def delete_campaign(request, id):
             'error': 'You do not have permission to delete this campaign'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    campaign.delete()
+    campaign_id = campaign.pk
+    with transaction.atomic():
+        record_campaign_deleted(campaign)
+        campaign.delete()
+    invalidate_campaign_listing(campaign_id, category_ids=[campaign.category_id])
     
     return Response({
         'message': 'Campaign deleted successfully'
@@ -191,10 +299,12 @@ def delete_campaign(request, id):
 # -------------------- GET CAMPAIGN STATS --------------------
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(campaign_stats_validators)
 def get_campaign_stats(request, id):
     """
     Get campaign statistics
     GET /api/campaigns/<id>/stats/
+    Supports If-None-Match / If-Modified-Since (304 Not Modified)
     """
     try:
         campaign = Campaign.objects.get(id=id)
@@ -202,6 +312,7 @@ def get_campaign_stats(request, id):
         return Response({
             'error': 'Campaign not found'
         }, status=status.HTTP_404_NOT_FOUND)
+    apply_counter_totals([campaign])
     
     progress = 0
     if campaign.goal_amount > 0:
@@ -224,10 +335,12 @@ def get_campaign_stats(request, id):
 # -------------------- LIST CATEGORIES --------------------
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(category_list_validators)
 def list_categories(request):
     """
     List all campaign categories
     GET /api/categories/
+    Supports If-None-Match (304 Not Modified)
     """
     from campaigns.models import CampaignCategory
     
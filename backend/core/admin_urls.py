@@ -1,14 +1,27 @@
 from django.urls import path
 from core.admin_views import (
     admin_dashboard_stats,
+    admin_analytics,
     admin_list_donations,
     admin_approve_donation,
     admin_reject_donation,
+    admin_bulk_moderate_donations,
+    admin_ingest_settlements,
+    admin_tax_statements,
     admin_list_campaigns,
     admin_verify_campaign,
     admin_reject_campaign,
+    admin_bulk_moderate_campaigns,
+    admin_campaign_balance,
+    admin_claim_moderation,
+    admin_heartbeat_moderation,
+    admin_release_moderation,
     admin_list_users,
     admin_get_user_detail,
+    admin_cache_stats,
+    admin_export_donations,
+    admin_export_campaigns,
+    admin_export_users,
 )
 
 app_name = 'admin'
@@ -16,18 +29,35 @@ app_name = 'admin'
 urlpatterns = [
     # Dashboard
     path('stats/', admin_dashboard_stats, name='dashboard_stats'),
+    path('analytics/', admin_analytics, name='analytics'),
     
     # Donations Management
     path('donations/', admin_list_donations, name='list_donations'),
+    path('donations/export/', admin_export_donations, name='export_donations'),
+    path('donations/bulk/<str:action>/', admin_bulk_moderate_donations, name='bulk_moderate_donations'),
     path('donations/<str:donation_id>/approve/', admin_approve_donation, name='approve_donation'),
     path('donations/<str:donation_id>/reject/', admin_reject_donation, name='reject_donation'),
+    path('settlements/', admin_ingest_settlements, name='ingest_settlements'),
+    path('tax-statements/<int:year>/', admin_tax_statements, name='tax_statements'),
     
     # Campaigns Management
     path('campaigns/', admin_list_campaigns, name='list_campaigns'),
+    path('campaigns/export/', admin_export_campaigns, name='export_campaigns'),
+    path('campaigns/bulk/<str:action>/', admin_bulk_moderate_campaigns, name='bulk_moderate_campaigns'),
     path('campaigns/<str:campaign_id>/verify/', admin_verify_campaign, name='verify_campaign'),
     path('campaigns/<str:campaign_id>/reject/', admin_reject_campaign, name='reject_campaign'),
+    path('campaigns/<str:campaign_id>/balance/', admin_campaign_balance, name='campaign_balance'),
+    
+    # Moderation queue
+    path('moderation/<str:kind>/claim/', admin_claim_moderation, name='claim_moderation'),
+    path('moderation/<str:kind>/heartbeat/', admin_heartbeat_moderation, name='heartbeat_moderation'),
+    path('moderation/<str:kind>/release/', admin_release_moderation, name='release_moderation'),
     
     # Users Management
     path('users/', admin_list_users, name='list_users'),
+    path('users/export/', admin_export_users, name='export_users'),
     path('users/<int:user_id>/', admin_get_user_detail, name='user_detail'),
+    
+    # Response cache
+    path('cache/stats/', admin_cache_stats, name='cache_stats'),
 ]
@@ -2,16 +2,42 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from donations.models import Donation
 from accounts.models import User
-from campaigns.models import Campaign
+from campaigns.models import Campaign, CampaignCategory
 from donations.serializers import DonationSerializer
+from donations.accounting import change_donation_status
+from donations.ledger import balance_at
+from donations.moderation import MODERATION_STATUSES, moderate_donations
+from donations.settlements import (
+    SETTLEMENT_FORMATS, ingest_settlements, read_settlements, settlement_format,
+)
+from donations.tax_statements import FISCAL_YEARS, fiscal_year_label, statements_zip
 from accounts.serializers import UserSerializer
 from campaigns.serializers import CampaignDetailSerializer
+from campaigns.list_cache import invalidate_campaign, invalidate_campaign_listing
+from campaigns.moderation import CAMPAIGN_MODERATION, moderate_campaigns
+from core.analytics import (
+    GROUPINGS as ANALYTICS_GROUPINGS, INTERVALS as ANALYTICS_INTERVALS, MAX_HOURLY_RANGE, analytics, refreshed_until,
+)
+from core.cache import cache_stats, reset_cache_stats
+from core.platform_stats import platform_stats, record_campaign_activity_change
+from core import moderation_queue
+from core.exports import (
+    CAMPAIGN_EXPORT_COLUMNS, DONATION_EXPORT_COLUMNS, EXPORT_FORMATS, USER_EXPORT_COLUMNS, export_response,
+)
+from core.pagination import ApproximateCountPagination
+from core.row_serializers import RowSerializer
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db.models import Q, Sum, Count
-from datetime import timedelta
+from django.http import StreamingHttpResponse
+from datetime import datetime, time, timedelta
+from collections import Counter
+import csv
+import uuid
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 
 # -------------------- ADMIN VERIFICATION CHECK --------------------
@@ -20,6 +46,185 @@ def is_admin(user):
     return user and (user.is_staff or user.is_superuser)
 
 
+# -------------------- LIST FILTERS --------------------
+# Shared by the list views and the exports of the same data
+
+def _date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+    return parsed
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _moment_param(params, name):
+    """A datetime, or a date meaning the end of that day; now when absent"""
+    value = params.get(name)
+    if not value:
+        return timezone.now()
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        return _start_of_day(day + timedelta(days=1))
+    if moment is None:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD) or an ISO 8601 datetime')
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def filter_donations(queryset, params):
+    """?status= &campaign_id= &created_from= &created_to=; raises ValueError for bad dates"""
+    status_filter = params.get('status')
+    campaign_id = params.get('campaign_id')
+    created_from = _date_param(params, 'created_from')
+    created_to = _date_param(params, 'created_to')
+    
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    
+    if campaign_id:
+        queryset = queryset.filter(campaign_id=campaign_id)
+    
+    # Day bounds as timestamps, so (status, created_at) indexes still apply
+    if created_from:
+        queryset = queryset.filter(created_at__gte=_start_of_day(created_from))
+    
+    if created_to:
+        queryset = queryset.filter(created_at__lt=_start_of_day(created_to + timedelta(days=1)))
+    
+    return queryset
+
+
+def filter_campaigns(queryset, params):
+    """?verified=true|false &active=true|false &category=; raises ValueError for a bad category"""
+    verified = params.get('verified')
+    active = params.get('active')
+    category = _int_param(params, 'category')
+    
+    if verified == 'true':
+        queryset = queryset.filter(fundtracer_verified=True)
+    elif verified == 'false':
+        queryset = queryset.filter(fundtracer_verified=False)
+    
+    if active == 'true':
+        queryset = queryset.filter(is_active=True)
+    elif active == 'false':
+        queryset = queryset.filter(is_active=False)
+    
+    if category is not None:
+        queryset = queryset.filter(category_id=category)
+    
+    return queryset
+
+
+def filter_users(queryset, params):
+    """?role="""
+    role = params.get('role')
+    if role:
+        queryset = queryset.filter(role=role)
+    return queryset
+
+
+# -------------------- BULK MODERATION --------------------
+
+def _uuid_list(values):
+    """Distinct UUIDs of a request's id list, in order; raises ValueError"""
+    try:
+        return list(dict.fromkeys(uuid.UUID(str(value)) for value in values))
+    except ValueError:
+        raise ValueError('ids must be UUIDs')
+
+
+# The list view params a bulk filter may use, with their allowed values
+# (None: any string or integer)
+DONATION_BULK_FILTERS = {
+    'status': [status for status, _ in Donation.PAYMENT_STATUS],
+    'campaign_id': None,
+    'created_from': None,
+    'created_to': None,
+}
+CAMPAIGN_BULK_FILTERS = {
+    'verified': ['true', 'false'],
+    'active': ['true', 'false'],
+    'category': None,
+}
+
+
+def _check_bulk_filter(filters, allowed):
+    """
+    Refuse filters the list filter would ignore, so a typo or a JSON
+    boolean can not widen a bulk change to every row; raises ValueError
+    """
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError('filter must be an object with at least one condition')
+    unknown = sorted(set(filters) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown filter {', '.join(unknown)}; allowed: {', '.join(allowed)}")
+    for name, value in filters.items():
+        if isinstance(value, bool) or not isinstance(value, (str, int)) or value == '':
+            raise ValueError(f'filter {name} must be a non-empty string')
+        choices = allowed[name]
+        if choices is not None and value not in choices:
+            raise ValueError(f"filter {name} must be one of: {', '.join(choices)}")
+
+
+def _bulk_targets(data, queryset, filter_fn, allowed_filters):
+    """
+    (ids, more) named by a bulk request body: {"ids": [...]} or {"filter":
+    {...}} with the list view's params named in `allowed_filters`. A filter
+    takes its first BULK_MODERATION_LIMIT matches by id; `more` tells
+    whether it matched others.
+    """
+    limit = settings.BULK_MODERATION_LIMIT
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if (ids is None) == (filters is None):
+        raise ValueError('Provide either ids or filter')
+    
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValueError('ids must be a non-empty list')
+        if len(ids) > limit:
+            raise ValueError(f'At most {limit} ids per request')
+        return _uuid_list(ids), False
+    
+    _check_bulk_filter(filters, allowed_filters)
+    try:
+        matched = list(filter_fn(queryset, filters).order_by('pk').values_list('pk', flat=True)[:limit + 1])
+    except ValidationError as exc:
+        raise ValueError(' '.join(exc.messages))
+    return matched[:limit], len(matched) > limit
+
+
+def _bulk_response(message, outcomes, more):
+    return Response({
+        'message': message,
+        'data': {
+            'more': more,
+            'summary': Counter(outcomes.values()),
+            'results': {str(pk): outcome for pk, outcome in outcomes.items()},
+        }
+    }, status=status.HTTP_200_OK)
+
+
 # -------------------- DASHBOARD STATS --------------------
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -33,32 +238,95 @@ def admin_dashboard_stats(request):
             'error': 'Admin access required'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Total stats
-    total_users = User.objects.count()
-    total_campaigns = Campaign.objects.count()
-    total_donations = Donation.objects.count()
-    total_amount = Donation.objects.aggregate(Sum('amount'))['amount__sum'] or 0
+    # Kept current by the write paths; a fixed number of rows to add up
+    stats = platform_stats()
     
-    # Active campaigns
-    active_campaigns = Campaign.objects.filter(is_active=True).count()
+    return Response({
+        'total_users': stats['users'],
+        'total_campaigns': stats['campaigns'],
+        'total_donations': stats['donations'],
+        'total_amount_raised': str(stats['donation_amount']),
+        'active_campaigns': stats['active_campaigns'],
+        'pending_donations': stats['pending_donations'],
+        'activity_last_30_days': stats['window_donations'],
+        'total_amount_last_30_days': str(stats['window_donation_amount']),
+    }, status=status.HTTP_200_OK)
+
+
+# -------------------- ANALYTICS --------------------
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_analytics(request):
+    """
+    Donations, amount, unique donors and new campaigns per time bucket,
+    from the analytics rollups; start and end default to the last 30 days
+    GET /api/admin/analytics/?interval=day&group_by=category&start=2025-01-01&end=2025-12-31
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
     
-    # Pending donations
-    pending_donations = Donation.objects.filter(status='PENDING').count()
+    interval = request.query_params.get('interval', 'day')
+    group_by = request.query_params.get('group_by') or None
+    if interval not in ANALYTICS_INTERVALS:
+        return Response({
+            'error': f"interval must be one of: {', '.join(ANALYTICS_INTERVALS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if group_by is not None and group_by not in ANALYTICS_GROUPINGS:
+        return Response({
+            'error': f"group_by must be one of: {', '.join(ANALYTICS_GROUPINGS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Recent activity (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    activity_last_30_days = Donation.objects.filter(created_at__gte=thirty_days_ago).count()
-    amount_last_30_days = Donation.objects.filter(created_at__gte=thirty_days_ago).aggregate(Sum('amount'))['amount__sum'] or 0
+    try:
+        end_day = _date_param(request.query_params, 'end') or timezone.localdate()
+        start_day = _date_param(request.query_params, 'start') or end_day - timedelta(days=29)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    start, end = _start_of_day(start_day), _start_of_day(end_day + timedelta(days=1))
+    if start >= end:
+        return Response({
+            'error': 'start must not be after end'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if interval == 'hour' and end - start > MAX_HOURLY_RANGE:
+        return Response({
+            'error': f'Hourly analytics cover at most {MAX_HOURLY_RANGE.days} days'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = analytics(interval, group_by, start, end)
+    categories = {}
+    if group_by == 'category':
+        categories = {str(pk): name for pk, name in CampaignCategory.objects.values_list('pk', 'name')}
+    
+    buckets = []
+    for row in rows:
+        bucket = {
+            'bucket': timezone.localtime(row['bucket']),
+            'donation_count': row['donation_count'],
+            'amount': str(row['amount']),
+            'unique_donors': row['unique_donors'],
+        }
+        if group_by == 'category':
+            bucket['category_id'] = int(row['value'])
+            bucket['category_name'] = categories.get(row['value'])
+        elif group_by == 'payment_method':
+            bucket['payment_method'] = row['value']
+        if group_by != 'payment_method':
+            bucket['new_campaigns'] = row['new_campaigns']
+        buckets.append(bucket)
     
     return Response({
-        'total_users': total_users,
-        'total_campaigns': total_campaigns,
-        'total_donations': total_donations,
-        'total_amount_raised': str(total_amount),
-        'active_campaigns': active_campaigns,
-        'pending_donations': pending_donations,
-        'activity_last_30_days': activity_last_30_days,
-        'total_amount_last_30_days': str(amount_last_30_days),
+        'message': 'Analytics retrieved successfully',
+        'data': {
+            'interval': interval,
+            'group_by': group_by,
+            'start': start_day,
+            'end': end_day,
+            'refreshed_until': refreshed_until(),
+            'buckets': buckets,
+        }
     }, status=status.HTTP_200_OK)
 
 
@@ -69,29 +337,30 @@ def admin_list_donations(request):
     """
     List all donations with filters
     GET /api/admin/donations/?status=PENDING&campaign_id=123&page=1
+    Also created_from / created_to (ISO dates, inclusive)
     """
     if not is_admin(request.user):
         return Response({
             'error': 'Admin access required'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    queryset = Donation.objects.all().order_by('-created_at')
-    
-    # Filters
-    status_filter = request.query_params.get('status')
-    campaign_id = request.query_params.get('campaign_id')
-    
-    if status_filter:
-        queryset = queryset.filter(status=status_filter)
-    
-    if campaign_id:
-        queryset = queryset.filter(campaign_id=campaign_id)
+    try:
+        queryset = filter_donations(Donation.objects.order_by('-created_at'), request.query_params)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     # Pagination
-    paginator = PageNumberPagination()
+    paginator = ApproximateCountPagination()
     paginator.page_size = 20
-    paginated_queryset = paginator.paginate_queryset(queryset, request)
     
+    if settings.FAST_LIST_SERIALIZATION:
+        rows = RowSerializer(DonationSerializer())
+        paginated_queryset = paginator.paginate_queryset(queryset.values(*rows.paths), request)
+        return paginator.get_paginated_response(rows.serialize(paginated_queryset))
+    
+    paginated_queryset = paginator.paginate_queryset(queryset.select_related('donor', 'campaign'), request)
     serializer = DonationSerializer(paginated_queryset, many=True)
     
     return paginator.get_paginated_response(serializer.data)
@@ -116,9 +385,8 @@ def admin_approve_donation(request, donation_id):
             'error': 'Donation not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    donation.status = 'COMPLETED'
-    donation.transaction_id = request.data.get('transaction_id', donation.transaction_id)
-    donation.save()
+    change_donation_status(donation, 'COMPLETED', request.data.get('transaction_id'))
+    moderation_queue.release('donation', request.user, [donation.pk])
     
     serializer = DonationSerializer(donation)
     
@@ -144,14 +412,120 @@ def admin_reject_donation(request, donation_id):
             'error': 'Donation not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    donation.status = 'FAILED'
-    donation.save()
+    change_donation_status(donation, 'FAILED')
+    moderation_queue.release('donation', request.user, [donation.pk])
     
     serializer = DonationSerializer(donation)
     
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_bulk_moderate_donations(request, action):
+    """
+    Approve or reject many donations at once
+    POST /api/admin/donations/bulk/<approve|reject>/
+    Body: {"ids": [...]} or {"filter": {"status": "PENDING", "campaign_id": ...}}
+    Returns a summary and each donation's outcome: updated, unchanged or
+    not_found
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    new_status = MODERATION_STATUSES.get(action)
+    if new_status is None:
+        return Response({
+            'error': f"action must be one of: {', '.join(MODERATION_STATUSES)}"
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        ids, more = _bulk_targets(request.data, Donation.objects.all(), filter_donations, DONATION_BULK_FILTERS)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    outcomes = moderate_donations(ids, new_status)
+    moderation_queue.release('donation', request.user, list(outcomes))
+    return _bulk_response('Donations moderated', outcomes, more)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_ingest_settlements(request):
+    """
+    Apply a payment gateway settlement file
+    POST /api/admin/settlements/ (multipart: file, optional format=csv|jsonl)
+    Columns / keys: donation_id, status, transaction_id (optional)
+    Returns a summary and one result per row, in file order
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({
+            'error': 'A settlement file is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    file_format = settlement_format(upload.name, request.data.get('format'))
+    if file_format not in SETTLEMENT_FORMATS:
+        return Response({
+            'error': f"format must be one of: {', '.join(SETTLEMENT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = []
+    try:
+        for result in ingest_settlements(read_settlements(upload.file, file_format)):
+            results.append(result)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Chunks before the unreadable line have been applied
+        return Response({
+            'error': f'Settlement file unreadable after {len(results)} rows: {exc}',
+            'data': {'results': results}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    summary = Counter(result['result'] for result in results)
+    return Response({
+        'message': 'Settlement file processed',
+        'data': {
+            'rows': len(results),
+            'updated': summary['updated'],
+            'unchanged': summary['unchanged'],
+            'errors': summary['error'],
+            'results': results,
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_tax_statements(request, year):
+    """
+    Download every donor's tax statement for a fiscal year as one ZIP
+    GET /api/admin/tax-statements/<year>/
+    The archive is streamed while the statements are rendered
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if year not in FISCAL_YEARS:
+        return Response({
+            'error': 'Invalid fiscal year'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    response = StreamingHttpResponse(statements_zip(year), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="tax-statements-{fiscal_year_label(year)}.zip"'
+    return response
+
+
 # -------------------- CAMPAIGNS MANAGEMENT --------------------
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -165,28 +539,18 @@ def admin_list_campaigns(request):
             'error': 'Admin access required'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    queryset = Campaign.objects.all().order_by('-created_at')
-    
-    # Filters
-    verified = request.query_params.get('verified')
-    active = request.query_params.get('active')
-    category = request.query_params.get('category')
-    
-    if verified == 'true':
-        queryset = queryset.filter(fundtracer_verified=True)
-    elif verified == 'false':
-        queryset = queryset.filter(fundtracer_verified=False)
-    
-    if active == 'true':
-        queryset = queryset.filter(is_active=True)
-    elif active == 'false':
-        queryset = queryset.filter(is_active=False)
-    
-    if category:
-        queryset = queryset.filter(category_id=category)
+    try:
+        queryset = filter_campaigns(
+            Campaign.objects.select_related('created_by', 'category').order_by('-created_at'),
+            request.query_params,
+        )
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     # Pagination
-    paginator = PageNumberPagination()
+    paginator = ApproximateCountPagination()
     paginator.page_size = 20
     paginated_queryset = paginator.paginate_queryset(queryset, request)
     
@@ -219,7 +583,9 @@ def admin_verify_campaign(request, campaign_id):
         }, status=status.HTTP_404_NOT_FOUND)
     
     campaign.fundtracer_verified = True
-    campaign.save()
+    campaign.save(update_fields=['fundtracer_verified', 'updated_at'])
+    invalidate_campaign(campaign.pk)
+    moderation_queue.release('campaign', request.user, [campaign.pk])
     
     serializer = CampaignDetailSerializer(
         campaign,
@@ -248,9 +614,14 @@ def admin_reject_campaign(request, campaign_id):
             'error': 'Campaign not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
+    was_active = campaign.is_active
     campaign.fundtracer_verified = False
     campaign.is_active = False
-    campaign.save()
+    campaign.save(update_fields=['fundtracer_verified', 'is_active', 'updated_at'])
+    if was_active:
+        record_campaign_activity_change(campaign, was_active)
+    invalidate_campaign_listing(campaign.pk, category_ids=[campaign.category_id])
+    moderation_queue.release('campaign', request.user, [campaign.pk])
     
     serializer = CampaignDetailSerializer(
         campaign,
@@ -260,6 +631,207 @@ def admin_reject_campaign(request, campaign_id):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_bulk_moderate_campaigns(request, action):
+    """
+    Verify or reject many campaigns at once
+    POST /api/admin/campaigns/bulk/<verify|reject>/
+    Body: {"ids": [...]} or {"filter": {"verified": "false", "category": 1}}
+    Returns a summary and each campaign's outcome: updated, unchanged or
+    not_found
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if action not in CAMPAIGN_MODERATION:
+        return Response({
+            'error': f"action must be one of: {', '.join(CAMPAIGN_MODERATION)}"
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        ids, more = _bulk_targets(request.data, Campaign.objects.all(), filter_campaigns, CAMPAIGN_BULK_FILTERS)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    outcomes = moderate_campaigns(ids, action)
+    moderation_queue.release('campaign', request.user, list(outcomes))
+    return _bulk_response('Campaigns moderated', outcomes, more)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_campaign_balance(request, campaign_id):
+    """
+    A campaign's balance from the donation ledger as of ?as_of= (default: now)
+    GET /api/admin/campaigns/<campaign_id>/balance/?as_of=2025-03-31
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        at = _moment_param(request.query_params, 'as_of')
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not Campaign.objects.filter(id=campaign_id).exists():
+        return Response({
+            'error': 'Campaign not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    balance = balance_at(campaign_id, at)
+    return Response({
+        'message': 'Campaign balance retrieved successfully',
+        'data': {
+            'campaign_id': campaign_id,
+            'as_of': at,
+            'raised_amount': str(balance.raised_amount),
+            'completed_donation_count': balance.completed_donation_count,
+            'donation_count': balance.donation_count,
+        }
+    }, status=status.HTTP_200_OK)
+
+
+# -------------------- MODERATION QUEUE --------------------
+# URL kind -> moderation_queue kind
+QUEUE_KINDS = {'campaigns': 'campaign', 'donations': 'donation'}
+
+
+def _queue_items(request, kind, ids):
+    """The claimed items serialized like the list views, in queue order"""
+    if kind == 'donation':
+        items = Donation.objects.select_related('donor', 'campaign').in_bulk(ids)
+        return DonationSerializer([items[pk] for pk in ids if pk in items], many=True).data
+    items = Campaign.objects.select_related('created_by', 'category').in_bulk(ids)
+    return CampaignDetailSerializer(
+        [items[pk] for pk in ids if pk in items], many=True, context={'request': request},
+    ).data
+
+
+def _queue_request(request, kind):
+    """(queue kind, ids or None) of a queue request; raises ValueError"""
+    ids = request.data.get('ids')
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError('ids must be a list')
+        ids = _uuid_list(ids)
+    return QUEUE_KINDS[kind], ids
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_claim_moderation(request, kind):
+    """
+    Claim the next unclaimed items of a moderation queue, oldest first
+    POST /api/admin/moderation/<campaigns|donations>/claim/ {"limit": 10}
+    Campaigns awaiting verification or pending donations, leased to the
+    caller for MODERATION_LEASE_SECONDS; other admins' claims skip them
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if kind not in QUEUE_KINDS:
+        return Response({
+            'error': f"queue must be one of: {', '.join(QUEUE_KINDS)}"
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        limit = int(request.data.get('limit', 10))
+    except (TypeError, ValueError):
+        limit = 0
+    if not 1 <= limit <= settings.MODERATION_CLAIM_LIMIT:
+        return Response({
+            'error': f'limit must be between 1 and {settings.MODERATION_CLAIM_LIMIT}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    ids, expires_at = moderation_queue.claim(QUEUE_KINDS[kind], request.user, limit)
+    return Response({
+        'message': f'{len(ids)} items claimed',
+        'data': {
+            'expires_at': expires_at,
+            'items': _queue_items(request, QUEUE_KINDS[kind], ids),
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_heartbeat_moderation(request, kind):
+    """
+    Renew the caller's leases of a moderation queue
+    POST /api/admin/moderation/<campaigns|donations>/heartbeat/ {"ids": [...]} (default: all)
+    Leases that expired or were moderated are listed as lost
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if kind not in QUEUE_KINDS:
+        return Response({
+            'error': f"queue must be one of: {', '.join(QUEUE_KINDS)}"
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        queue, ids = _queue_request(request, kind)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    held, expires_at = moderation_queue.heartbeat(queue, request.user, ids)
+    kept = set(held)
+    return Response({
+        'message': 'Leases renewed',
+        'data': {
+            'expires_at': expires_at,
+            'held': held,
+            'lost': [pk for pk in ids or () if pk not in kept],
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_release_moderation(request, kind):
+    """
+    Give items of a moderation queue back unmoderated
+    POST /api/admin/moderation/<campaigns|donations>/release/ {"ids": [...]} (default: all)
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if kind not in QUEUE_KINDS:
+        return Response({
+            'error': f"queue must be one of: {', '.join(QUEUE_KINDS)}"
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        queue, ids = _queue_request(request, kind)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    released = moderation_queue.release(queue, request.user, ids)
+    return Response({
+        'message': 'Leases released',
+        'data': {'released': released}
+    }, status=status.HTTP_200_OK)
+
+
 # -------------------- USERS MANAGEMENT --------------------
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -273,15 +845,10 @@ def admin_list_users(request):
             'error': 'Admin access required'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    queryset = User.objects.all().order_by('-created_at')
-    
-    # Filter by role
-    role = request.query_params.get('role')
-    if role:
-        queryset = queryset.filter(role=role)
+    queryset = filter_users(User.objects.all().order_by('-created_at'), request.query_params)
     
     # Pagination
-    paginator = PageNumberPagination()
+    paginator = ApproximateCountPagination()
     paginator.page_size = 20
     paginated_queryset = paginator.paginate_queryset(queryset, request)
     
@@ -323,3 +890,100 @@ def admin_get_user_detail(request, user_id):
     response_data['total_donated'] = str(total_donated)
     
     return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def admin_cache_stats(request):
+    """
+    Response cache counters (hits, misses, evictions, invalidations)
+    GET /api/admin/cache/stats/
+    DELETE /api/admin/cache/stats/ resets the counters
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if request.method == 'DELETE':
+        reset_cache_stats()
+        return Response({
+            'message': 'Cache statistics reset'
+        }, status=status.HTTP_200_OK)
+    
+    return Response({
+        'message': 'Cache statistics retrieved successfully',
+        'data': cache_stats()
+    }, status=status.HTTP_200_OK)
+
+
+# -------------------- EXPORTS --------------------
+# Streamed CSV / JSON Lines downloads taking the same filters as the lists:
+# GET /api/admin/<donations|campaigns|users>/export/?output=csv|jsonl&...
+
+def _export(request, queryset, columns, name):
+    file_format = request.query_params.get('output', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return Response({
+            'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return export_response(queryset.order_by('-created_at'), columns, file_format, name)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_export_donations(request):
+    """
+    Export donations with their donor, campaign and receipt number
+    GET /api/admin/donations/export/?output=csv&status=COMPLETED&created_from=2025-01-01
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        queryset = filter_donations(Donation.objects.all(), request.query_params)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return _export(request, queryset, DONATION_EXPORT_COLUMNS, 'donations')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_export_campaigns(request):
+    """
+    Export campaigns with their category and creator
+    GET /api/admin/campaigns/export/?output=jsonl&verified=true
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        queryset = filter_campaigns(Campaign.objects.all(), request.query_params)
+    except ValueError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return _export(request, queryset, CAMPAIGN_EXPORT_COLUMNS, 'campaigns')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_export_users(request):
+    """
+    Export users
+    GET /api/admin/users/export/?output=csv&role=ngo
+    """
+    if not is_admin(request.user):
+        return Response({
+            'error': 'Admin access required'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    queryset = filter_users(User.objects.all(), request.query_params)
+    return _export(request, queryset, USER_EXPORT_COLUMNS, 'users')
@@ -0,0 +1,121 @@
+# Tag-versioned response cache shared by the public read endpoints
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.http_cache import purge_surrogate_keys
+
+
+TAG_KEY_PREFIX = 'tagcache:tag:'
+STATS_KEY_PREFIX = 'tagcache:stats:'
+STATS_COUNTERS = ('hits', 'misses', 'evictions', 'invalidations')
+
+
+def _tag_key(tag):
+    return f'{TAG_KEY_PREFIX}{tag}'
+
+
+def _new_version():
+    # Versions start from the clock rather than 1 so a tag key that was
+    # dropped by the backend never comes back at a value an old entry holds
+    return time.time_ns()
+
+
+def _bump_stat(name, delta=1):
+    key = f'{STATS_KEY_PREFIX}{name}'
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def tag_versions(tags):
+    """Current version of each tag, creating versions for unseen tags"""
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in found]
+    if missing:
+        version = _new_version()
+        for key in missing:
+            cache.add(key, version, timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: value for key, value in found.items()}
+
+
+def get_tagged(key):
+    """
+    Return the cached value for `key`, or None on a miss.
+    An entry whose tags were invalidated after it was stored is deleted
+    and counted as an eviction.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        _bump_stat('misses')
+        return None
+
+    stored = entry['tags']
+    current = cache.get_many([_tag_key(tag) for tag in stored])
+    if any(current.get(_tag_key(tag)) != version for tag, version in stored.items()):
+        cache.delete(key)
+        _bump_stat('evictions')
+        _bump_stat('misses')
+        return None
+
+    _bump_stat('hits')
+    return entry['value']
+
+
+def set_tagged(key, value, tags, versions=None, timeout=None):
+    """
+    Store `value` under `key`, valid until any of `tags` is invalidated.
+    `versions` are tag versions read before the value was computed; pass
+    them for the tags known up front so a write landing in between leaves
+    the entry already stale instead of caching old rows as current.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+    versions = dict(versions or {})
+    unseen = set(tags) - versions.keys()
+    if unseen:
+        versions.update(tag_versions(unseen))
+    cache.set(key, {'tags': versions, 'value': value}, timeout)
+
+
+def invalidate_tags(*tags):
+    """
+    Invalidate every entry carrying one of `tags` once the current
+    transaction commits, so a concurrent reader can not re-cache rows
+    from before the write under the new version. Tags double as surrogate
+    keys, so the same call purges edge-cached responses.
+    """
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+
+    def bump():
+        for tag in tags:
+            key = _tag_key(tag)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, _new_version(), timeout=None)
+        _bump_stat('invalidations', len(tags))
+        purge_surrogate_keys(tags)
+
+    transaction.on_commit(bump)
+
+
+def cache_stats():
+    """Hit/miss/eviction/invalidation counters since the last reset"""
+    values = cache.get_many([f'{STATS_KEY_PREFIX}{name}' for name in STATS_COUNTERS])
+    stats = {name: values.get(f'{STATS_KEY_PREFIX}{name}', 0) for name in STATS_COUNTERS}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0
+    return stats
+
+
+def reset_cache_stats():
+    cache.delete_many([f'{STATS_KEY_PREFIX}{name}' for name in STATS_COUNTERS])
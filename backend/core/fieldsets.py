@@ -0,0 +1,103 @@
+# Sparse fieldsets (?fields= / ?exclude=) for read-only list serializers
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.serializers import BaseSerializer, Serializer
+
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _names(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def parse_fieldset(request):
+    """
+    (fields, exclude) from the query string as sets of dotted names.
+    `fields` is None when the client did not restrict the output.
+    """
+    fields = request.query_params.get(FIELDS_PARAM)
+    return (_names(fields) if fields is not None else None), _names(request.query_params.get(EXCLUDE_PARAM))
+
+
+def _split(names, prefix):
+    # Names addressed to the nested serializer `prefix`, without the prefix
+    return {name[len(prefix) + 1:] for name in names if name.startswith(prefix + '.')}
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin limiting the output to context['fieldset'], a
+    (fields, exclude) pair from parse_fieldset. Dotted names such as
+    'created_by.full_name' select inside nested serializers; naming a nested
+    field alone keeps it whole. Names that match nothing are collected in
+    `unknown_fields` so the view can reject them.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        include, exclude = self.context.get('fieldset') or (None, set())
+        self._unknown_fields = self._apply_fieldset(fields, include, exclude, '')
+        return fields
+
+    @property
+    def unknown_fields(self):
+        self.fields  # the field set is built (and pruned) lazily
+        return self._unknown_fields
+
+    @classmethod
+    def _apply_fieldset(cls, fields, include, exclude, path):
+        unknown = set()
+        for name in (include or set()) | exclude:
+            head, _, rest = name.partition('.')
+            if head not in fields or (rest and not isinstance(fields[head], Serializer)):
+                unknown.add(path + name)
+
+        kept = None if include is None else {name.partition('.')[0] for name in include}
+        for name in list(fields):
+            if (kept is not None and name not in kept) or name in exclude:
+                del fields[name]
+                continue
+            if not isinstance(fields[name], Serializer):
+                continue
+            sub_include = None if include is None or name in include else _split(include, name)
+            sub_exclude = _split(exclude, name)
+            if sub_include is not None or sub_exclude:
+                # Prune the nested serializer's own (bound, cached) field set
+                unknown |= cls._apply_fieldset(fields[name].fields, sub_include, sub_exclude, f'{path}{name}.')
+        return unknown
+
+
+def fieldset_columns(serializer, prefix=''):
+    """
+    (only_paths, select_related_paths) covering every field `serializer`
+    will output, for queryset.only() / select_related(). Returns None when a
+    field's columns can not be determined, in which case load whole rows.
+
+    Serializer Meta may declare `field_columns`, mapping computed fields
+    (SerializerMethodField, annotations) to the model columns they read.
+    """
+    model = serializer.Meta.model
+    declared = getattr(serializer.Meta, 'field_columns', {})
+    only, related = [], []
+
+    for name, field in serializer.fields.items():
+        if name in declared:
+            only += [prefix + column for column in declared[name]]
+        elif isinstance(field, Serializer):
+            nested = fieldset_columns(field, f'{prefix}{field.source}__')
+            if nested is None:
+                return None
+            related.append(prefix + field.source)
+            only += nested[0]
+            related += nested[1]
+        elif isinstance(field, BaseSerializer):
+            return None
+        else:
+            try:
+                model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            only.append(prefix + field.source)
+
+    return only, related
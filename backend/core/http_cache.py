@@ -0,0 +1,121 @@
+# Conditional GET and edge cache headers for public read endpoints
+import hashlib
+import logging
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import CharField, Expression
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# What a validator function learns about the resource in one cheap query
+Validators = namedtuple('Validators', ['etag', 'last_modified', 'surrogate_keys'])
+
+
+class RowVersion(Expression):
+    """
+    PostgreSQL row version (xmin) of the queried row, or of the row reached
+    through a relation path such as 'campaign__created_by'. It changes on
+    every UPDATE of that row, including F() and queryset.update() writes
+    that bypass save() and auto_now.
+    """
+    output_field = CharField()
+
+    def __init__(self, relation=None):
+        super().__init__()
+        self.relation = relation
+        self.alias = None
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        clone = self.copy()
+        if self.relation:
+            path = query.setup_joins(self.relation.split('__'), query.get_meta(), query.get_initial_alias())
+            clone.alias = path.joins[-1]
+        else:
+            clone.alias = query.get_initial_alias()
+        return clone
+
+    def as_sql(self, compiler, connection):
+        return f'{compiler.quote_name_unless_alias(self.alias)}.xmin::text', []
+
+
+def make_etag(*parts):
+    """Opaque ETag value built from row versions and anything else the body depends on"""
+    return hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def set_edge_cache_headers(request, response, surrogate_keys):
+    """
+    Cache-Control and Surrogate-Key headers for a cacheable GET response.
+    Anonymous responses may be held by a shared cache and purged by key;
+    responses to authenticated users stay private to the client.
+    """
+    if request.user and request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.HTTP_CACHE_MAX_AGE,
+            s_maxage=settings.EDGE_CACHE_MAX_AGE,
+        )
+    patch_vary_headers(response, ['Authorization'])
+    if surrogate_keys:
+        response['Surrogate-Key'] = ' '.join(sorted(surrogate_keys))
+
+
+def conditional_get(validators):
+    """
+    Decorator answering GET/HEAD with 304 Not Modified when the client's
+    If-None-Match / If-Modified-Since still match, without running the view.
+
+    `validators(request, *args, **kwargs)` returns a Validators tuple, or
+    None when the resource does not exist (the view then answers normally).
+    Apply it below @api_view and @permission_classes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            found = validators(request, *args, **kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            etag = quote_etag(found.etag)
+            last_modified = int(found.last_modified.timestamp()) if found.last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+            set_edge_cache_headers(request, response, found.surrogate_keys)
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_surrogate_keys(keys):
+    """
+    Ask the edge cache to drop responses tagged with `keys`, through the
+    callable named by settings.SURROGATE_PURGE_HANDLER (if configured).
+    A failed purge is logged; cached copies then expire after s-maxage.
+    """
+    handler_path = getattr(settings, 'SURROGATE_PURGE_HANDLER', None)
+    if not handler_path or not keys:
+        return
+    try:
+        import_string(handler_path)(sorted(keys))
+    except Exception:
+        logger.exception('Surrogate key purge failed for %s', sorted(keys))
@@ -0,0 +1,99 @@
+# Idempotency-Key support for retried unsafe requests
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """SHA-256 of the method, path and raw body a key was first used with"""
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.body):
+        digest.update(part)
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def _claim(user, key, fingerprint):
+    """
+    A new IdempotencyKey row (status_code None) reserving `key`, or the
+    stored row of an earlier request with that key. While another request
+    holding the key is still running, the INSERT waits for its transaction
+    to finish.
+    """
+    now = timezone.now()
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                )
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is not None and record.expires_at > now:
+                return record
+            if attempt == 2:
+                raise
+            # Expired (or purged meanwhile): the key is free to be used again
+            IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+
+
+def idempotent(view):
+    """
+    Decorator honouring an Idempotency-Key header on an authenticated
+    endpoint. The first request with a key runs the view and stores its
+    response; retries with the same key and body get that response back
+    (with Idempotent-Replayed: true) without running the view again, and
+    a retry arriving while the first is still running waits for it.
+    Reusing a key for a different request is answered with 422.
+
+    The view runs in the same transaction that reserves the key, so a
+    request that fails with an exception or a 5xx leaves the key unused.
+    Apply it below @api_view and @permission_classes.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response({
+                'error': f'{IDEMPOTENCY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        with transaction.atomic():
+            record = _claim(request.user, key, fingerprint)
+            if record.status_code is not None:
+                if record.fingerprint != fingerprint:
+                    return Response({
+                        'error': f'{IDEMPOTENCY_HEADER} has already been used for a different request'
+                    }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                response = Response(record.response, status=record.status_code)
+                response[REPLAYED_HEADER] = 'true'
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+                return response
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=['status_code', 'response'])
+        return response
+    return wrapper
@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from campaigns.models import Campaign, CampaignCategory
+from campaigns.serializers import CampaignListSerializer
+from core.row_serializers import RowSerializer
+from donations.models import Donation
+from donations.serializers import DonationSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare list serialization through DRF serializers against values() row mappers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaigns', type=int, default=2000, help='Number of campaigns to seed')
+        parser.add_argument('--donations', type=int, default=20000, help='Number of donations to seed')
+        parser.add_argument('--rows', type=int, default=1000, help='Rows fetched and serialized per run')
+        parser.add_argument('--runs', type=int, default=10, help='Timed runs per shape')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['campaigns'], options['donations'])
+            self.report(options['rows'], options['runs'])
+            transaction.set_rollback(True)
+
+    def seed(self, campaigns, donations):
+        rng = random.Random(42)
+        users = User.objects.bulk_create([
+            User(email=f'benchmark{i}@fundtracer.local', full_name=f'Benchmark User {i}', phone_number='')
+            for i in range(50)
+        ])
+        category = CampaignCategory.objects.create(name='Serializer benchmark')
+
+        self.stdout.write(f'Seeding {campaigns} campaigns and {donations} donations...')
+        seeded = Campaign.objects.bulk_create([
+            Campaign(
+                title=f'Benchmark campaign {i}',
+                description='lorem ipsum ' * 40,
+                goal_amount=rng.randint(1000, 100000),
+                raised_amount=rng.randint(0, 100000),
+                campaign_type='INDIVIDUAL',
+                category=category,
+                is_active=True,
+                created_by=rng.choice(users),
+            )
+            for i in range(campaigns)
+        ], batch_size=5000)
+        Donation.objects.bulk_create([
+            Donation(
+                donor=rng.choice(users),
+                campaign=rng.choice(seeded),
+                amount=Decimal(rng.randint(100, 50000)) / 100,
+                status='SUCCESS',
+                transaction_id=f'benchmark-{i}',
+                message='Keep going!',
+            )
+            for i in range(donations)
+        ], batch_size=5000)
+
+    def report(self, rows, runs):
+        campaigns = Campaign.objects.filter(category__name='Serializer benchmark').order_by('-created_at')
+        donations = Donation.objects.filter(transaction_id__startswith='benchmark-').order_by('-created_at')
+
+        def drf_campaigns():
+            page = list(campaigns.select_related('created_by', 'category')[:rows])
+            return CampaignListSerializer(page, many=True).data
+
+        def row_campaigns():
+            mapper = RowSerializer(CampaignListSerializer())
+            return mapper.serialize(campaigns.values(*mapper.paths)[:rows])
+
+        def drf_donations():
+            page = list(donations.select_related('donor', 'campaign')[:rows])
+            return DonationSerializer(page, many=True).data
+
+        def row_donations():
+            mapper = RowSerializer(DonationSerializer())
+            return mapper.serialize(donations.values(*mapper.paths)[:rows])
+
+        shapes = [
+            ('campaign list', drf_campaigns, row_campaigns),
+            ('donation list', drf_donations, row_donations),
+        ]
+        self.stdout.write(f"{'shape':<16}{'serializer rows/s':>20}{'row mapper rows/s':>20}{'speedup':>10}")
+        for name, legacy, fast in shapes:
+            legacy_rate = self.rate(legacy, runs)
+            fast_rate = self.rate(fast, runs)
+            self.stdout.write(
+                f'{name:<16}{legacy_rate:>20,.0f}{fast_rate:>20,.0f}{fast_rate / legacy_rate:>9.1f}x'
+            )
+
+    def rate(self, serialize, runs):
+        # Median rows/sec, query included, over `runs` runs after a warm-up
+        serialize()
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            count = len(serialize())
+            samples.append(count / (time.perf_counter() - start))
+        return statistics.median(samples)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ModerationLease
+
+
+class Command(BaseCommand):
+    help = 'Delete expired moderation queue leases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Leases deleted per query')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # Walks moderation_lease_expires_idx; small batches keep locks short
+            pks = list(
+                ModerationLease.objects.filter(expires_at__lte=now)
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not pks:
+                break
+            deleted += ModerationLease.objects.filter(pk__in=pks, expires_at__lte=now).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired moderation leases'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.platform_stats import rebuild_platform_stats, recount, stats_drift, stored
+
+
+class Command(BaseCommand):
+    help = 'Recount the admin dashboard statistics from the tables and replace the stored ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only compare with a recount; fail when the stored numbers drifted')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = stats_drift(stored(), recount())
+        else:
+            drift = rebuild_platform_stats()
+        for line in drift:
+            self.stdout.write(f'  {line}')
+        if options['check'] and drift:
+            raise CommandError(f'Platform statistics drifted in {len(drift)} places')
+        verb = 'Checked' if options['check'] else 'Rebuilt'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} platform statistics, {len(drift)} differences from a full recount'
+        ))
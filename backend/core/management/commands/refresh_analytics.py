@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.analytics import refresh_analytics, refreshed_until
+
+
+class Command(BaseCommand):
+    help = 'Fold new donations and campaigns into the admin analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running, refreshing every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            touched = refresh_analytics()
+            self.stdout.write(f'Updated {touched} rollup rows, analytics current to {refreshed_until()}')
+            if options['every'] is None:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:13
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def count_platform_stats(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Campaign = apps.get_model('campaigns', 'Campaign')
+    Donation = apps.get_model('donations', 'Donation')
+    PlatformStats = apps.get_model('core', 'PlatformStats')
+    DailyDonationStats = apps.get_model('core', 'DailyDonationStats')
+
+    donations = Donation.objects.aggregate(
+        donations=Count('pk'), donation_amount=Sum('amount'), pending_donations=Count('pk', filter=Q(status='PENDING')),
+    )
+    PlatformStats.objects.create(
+        shard=0,
+        users=User.objects.count(),
+        campaigns=Campaign.objects.count(),
+        active_campaigns=Campaign.objects.filter(is_active=True).count(),
+        donations=donations['donations'],
+        donation_amount=donations['donation_amount'] or 0,
+        pending_donations=donations['pending_donations'],
+    )
+    days = Donation.objects.order_by().annotate(day=TruncDate('created_at')).values('day').annotate(
+        count=Count('pk'), amount=Sum('amount'),
+    )
+    DailyDonationStats.objects.bulk_create([
+        DailyDonationStats(day=row['day'], shard=0, donations=row['count'], donation_amount=row['amount'])
+        for row in days
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_idempotency_keys'),
+        ('accounts', '0002_user_phone_number_index'),
+        ('campaigns', '0015_counter_shards'),
+        ('donations', '0004_donation_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDonationStats',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('donations', models.IntegerField(default=0)),
+                ('donation_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlatformStats',
+            fields=[
+                ('shard', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('users', models.IntegerField(default=0)),
+                ('campaigns', models.IntegerField(default=0)),
+                ('active_campaigns', models.IntegerField(default=0)),
+                ('donations', models.IntegerField(default=0)),
+                ('donation_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending_donations', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailydonationstats',
+            constraint=models.UniqueConstraint(fields=('day', 'shard'), name='daily_donation_stats_day_shard_uniq'),
+        ),
+        migrations.RunPython(count_platform_stats, migrations.RunPython.noop),
+    ]
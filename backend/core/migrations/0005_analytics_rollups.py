@@ -0,0 +1,58 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_platform_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('interval', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('dimension', models.CharField(blank=True, choices=[('', 'None'), ('category', 'Category'), ('payment_method', 'Payment method')], max_length=20)),
+                ('bucket', models.DateTimeField()),
+                ('value', models.CharField(blank=True, max_length=50)),
+                ('donation_count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unique_donors', models.IntegerField(default=0)),
+                ('new_campaigns', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalyticsWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('processed_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalyticsRollupDonor',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('interval', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('dimension', models.CharField(blank=True, choices=[('', 'None'), ('category', 'Category'), ('payment_method', 'Payment method')], max_length=20)),
+                ('bucket', models.DateTimeField()),
+                ('value', models.CharField(blank=True, max_length=50)),
+                ('donor_id', models.UUIDField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['donor_id'], name='analytics_rollup_donor_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='analyticsrollupdonor',
+            constraint=models.UniqueConstraint(fields=('interval', 'dimension', 'bucket', 'value', 'donor_id'), name='analytics_rollup_donor_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='analyticsrollup',
+            constraint=models.UniqueConstraint(fields=('interval', 'dimension', 'bucket', 'value'), name='analytics_rollup_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0005_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationLease',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('campaign', 'Campaign'), ('donation', 'Donation')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('claimed_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('holder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_leases', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['holder', 'kind', 'expires_at'], name='moderation_lease_holder_idx'), models.Index(fields=['expires_at'], name='moderation_lease_expires_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='moderationlease',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='moderation_lease_object_uniq'),
+        ),
+    ]
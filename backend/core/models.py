@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from campaigns.models import Campaign
 
 
@@ -25,6 +26,10 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A user's (unread) notifications, newest first
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='notification_inbox_idx'),
+        ]
 
     def __str__(self):
         return f"{self.notification_type} - {self.title}"
@@ -33,3 +38,154 @@ class Notification(models.Model):
         """Mark notification as read"""
         self.is_read = True
         self.save()
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's Idempotency-Key and the response it got, replayed to retries
+    of the same request until expires_at (see core.idempotency)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    # SHA-256 of method, path and body; a reused key must match it
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_key_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.key}"
+
+
+class PlatformStats(models.Model):
+    """
+    Running platform totals for the admin dashboard (core.platform_stats),
+    spread over a few rows so concurrent writes lock different ones
+    """
+    shard = models.PositiveSmallIntegerField(primary_key=True)
+    users = models.IntegerField(default=0)
+    campaigns = models.IntegerField(default=0)
+    active_campaigns = models.IntegerField(default=0)
+    donations = models.IntegerField(default=0)
+    donation_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_donations = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Platform stats shard {self.shard}"
+
+
+class DailyDonationStats(models.Model):
+    """Donations created on one (local) day, one row per day and shard"""
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField()
+    shard = models.PositiveSmallIntegerField()
+    donations = models.IntegerField(default=0)
+    donation_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'shard'], name='daily_donation_stats_day_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} shard {self.shard}: {self.donations}"
+
+
+class AnalyticsRollup(models.Model):
+    """
+    Donations and new campaigns of one time bucket (local time), overall or
+    for one category / payment method; refreshed by core.analytics
+    """
+    INTERVALS = (('hour', 'Hour'), ('day', 'Day'), ('week', 'Week'), ('month', 'Month'))
+    DIMENSIONS = (('', 'None'), ('category', 'Category'), ('payment_method', 'Payment method'))
+
+    id = models.BigAutoField(primary_key=True)
+    interval = models.CharField(max_length=10, choices=INTERVALS)
+    dimension = models.CharField(max_length=20, choices=DIMENSIONS, blank=True)
+    bucket = models.DateTimeField()
+    # The category id or payment method; blank without a dimension
+    value = models.CharField(max_length=50, blank=True)
+
+    donation_count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unique_donors = models.IntegerField(default=0)
+    new_campaigns = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also serves the API's range scans
+            models.UniqueConstraint(fields=['interval', 'dimension', 'bucket', 'value'], name='analytics_rollup_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.interval} {self.bucket} {self.dimension}={self.value}"
+
+
+class AnalyticsRollupDonor(models.Model):
+    """A donor already counted in an AnalyticsRollup bucket that is still open"""
+    id = models.BigAutoField(primary_key=True)
+    interval = models.CharField(max_length=10, choices=AnalyticsRollup.INTERVALS)
+    dimension = models.CharField(max_length=20, choices=AnalyticsRollup.DIMENSIONS, blank=True)
+    bucket = models.DateTimeField()
+    value = models.CharField(max_length=50, blank=True)
+    donor_id = models.UUIDField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['interval', 'dimension', 'bucket', 'value', 'donor_id'], name='analytics_rollup_donor_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['donor_id'], name='analytics_rollup_donor_idx'),
+        ]
+
+
+class AnalyticsWatermark(models.Model):
+    """How far the analytics rollups have taken in donations and campaigns"""
+    name = models.CharField(max_length=50, primary_key=True)
+    processed_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} until {self.processed_until}"
+
+
+class ModerationLease(models.Model):
+    """
+    An admin's claim on a campaign or donation of the moderation queue,
+    held until expires_at unless renewed (see core.moderation_queue)
+    """
+    KINDS = (('campaign', 'Campaign'), ('donation', 'Donation'))
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.UUIDField()
+    holder = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='moderation_leases')
+    claimed_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='moderation_lease_object_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['holder', 'kind', 'expires_at'], name='moderation_lease_holder_idx'),
+            models.Index(fields=['expires_at'], name='moderation_lease_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} held by {self.holder_id}"
@@ -0,0 +1,104 @@
+# Moderation work queue: admins claim the next batch of campaigns awaiting
+# verification or pending donations, oldest first, without two admins
+# getting the same item.
+#
+# A claim locks candidate rows with SELECT ... FOR NO KEY UPDATE SKIP LOCKED,
+# so concurrent claimers pass over each other's candidates instead of
+# waiting on them, and records a ModerationLease per item. Items under an
+# unexpired lease are left out of later claims; a lease ends when its
+# holder releases it or moderates the item, or when it expires without a
+# heartbeat renewing it. A lease on an item that left the queue (another
+# admin moderated it) no longer counts as held. The row locks last only for
+# the claim's own transaction.
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from campaigns.models import Campaign
+from core.models import ModerationLease
+from donations.models import Donation
+
+
+# The items each queue serves, in the order they are handed out
+QUEUES = {
+    'campaign': lambda: Campaign.objects.filter(is_active=True, fundtracer_verified=False),
+    'donation': lambda: Donation.objects.filter(status='PENDING'),
+}
+
+
+def _lease_expiry(now):
+    return now + timedelta(seconds=settings.MODERATION_LEASE_SECONDS)
+
+
+def _take_leases(kind, holder, object_ids, now):
+    """
+    Lease `object_ids` to `holder` where they have no lease or an expired
+    one, in one INSERT ... ON CONFLICT DO UPDATE; returns the ids leased
+    """
+    if not object_ids:
+        return []
+    quote = connection.ops.quote_name
+    table = quote(ModerationLease._meta.db_table)
+    expires_at = _lease_expiry(now)
+    values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(object_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ("kind", "object_id", "holder_id", "claimed_at", "expires_at") '
+            f'VALUES {values} '
+            'ON CONFLICT ("kind", "object_id") DO UPDATE SET "holder_id" = EXCLUDED."holder_id", '
+            '"claimed_at" = EXCLUDED."claimed_at", "expires_at" = EXCLUDED."expires_at" '
+            f'WHERE {table}."expires_at" <= EXCLUDED."claimed_at" '
+            'RETURNING "object_id"',
+            [value for object_id in object_ids for value in (kind, object_id, holder.pk, now, expires_at)],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def claim(kind, holder, limit):
+    """
+    Lease up to `limit` unclaimed items of the `kind` queue to `holder`.
+    Returns (ids in queue order, expires_at).
+    """
+    now = timezone.now()
+    leased = ModerationLease.objects.filter(kind=kind, object_id=OuterRef('pk'), expires_at__gt=now)
+    with transaction.atomic():
+        candidates = list(
+            QUEUES[kind]().filter(~Exists(leased)).order_by('created_at', 'pk')
+            .select_for_update(skip_locked=True, no_key=True).values_list('pk', flat=True)[:limit]
+        )
+        # A claim that committed after this statement's snapshot keeps its items
+        taken = set(_take_leases(kind, holder, candidates, now))
+    return [object_id for object_id in candidates if object_id in taken], _lease_expiry(now)
+
+
+def _held(kind, holder, object_ids=None):
+    leases = ModerationLease.objects.filter(
+        kind=kind, holder=holder, expires_at__gt=timezone.now(), object_id__in=QUEUES[kind]().values('pk'),
+    )
+    if object_ids is not None:
+        leases = leases.filter(object_id__in=object_ids)
+    return leases
+
+
+def heartbeat(kind, holder, object_ids=None):
+    """
+    Extend the holder's unexpired leases of `kind` (all, or those of
+    `object_ids`) on items still in the queue. Returns (ids still held,
+    expires_at).
+    """
+    expires_at = _lease_expiry(timezone.now())
+    with transaction.atomic():
+        held = list(_held(kind, holder, object_ids).values_list('object_id', flat=True))
+        ModerationLease.objects.filter(kind=kind, holder=holder, object_id__in=held).update(expires_at=expires_at)
+    return held, expires_at
+
+
+def release(kind, holder, object_ids=None):
+    """Give up the holder's leases of `kind` (all, or those of `object_ids`); returns how many"""
+    leases = ModerationLease.objects.filter(kind=kind, holder=holder)
+    if object_ids is not None:
+        leases = leases.filter(object_id__in=object_ids)
+    return leases.delete()[0]
@@ -0,0 +1,274 @@
+# Pagination helpers shared by the list endpoints
+import base64
+import hashlib
+import json
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination:
+    """
+    Cursor pagination ordered on (created_at, id), newest first.
+
+    Unlike PageNumberPagination there is no COUNT(*) and no OFFSET: every
+    page is a range scan starting right after the last row of the previous
+    one, so page N costs the same as page 1. The next/previous tokens are
+    opaque base64 strings encoding the boundary row and the direction.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self._ordering(reverse))
+        if position is not None:
+            created_at, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) |
+                    Q(created_at=created_at, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) |
+                    Q(created_at=created_at, id__lt=pk)
+                )
+
+        # Fetch one extra row to learn whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    # -------------------- CURSOR ENCODING --------------------
+    def encode_cursor(self, created_at, pk, reverse=False):
+        payload = {'c': created_at.isoformat(), 'i': str(pk)}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = parse_datetime(payload['c'])
+            pk = uuid.UUID(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return (created_at, pk), reverse
+
+    def _ordering(self, reverse):
+        if reverse:
+            return ('created_at', 'id')
+        return ('-created_at', '-id')
+
+    def _link(self, obj, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        if isinstance(obj, dict):
+            # values() rows from the fast serialization path
+            created_at, pk = obj['created_at'], obj['id']
+        else:
+            created_at, pk = obj.created_at, obj.pk
+        token = self.encode_cursor(created_at, pk, reverse=reverse)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+
+def uses_cursor_pagination(request):
+    """Cursor mode is opt-in: ?cursor= (empty for the first page) or ?pagination=cursor"""
+    return (
+        KeysetPagination.cursor_query_param in request.query_params or
+        request.query_params.get('pagination') == 'cursor'
+    )
+
+
+def get_paginator(request, page_size=10):
+    """Return the paginator requested by the client for a (created_at, id) ordered list"""
+    if uses_cursor_pagination(request):
+        paginator = KeysetPagination()
+    else:
+        paginator = PageNumberPagination()
+    paginator.page_size = page_size
+    return paginator
+
+
+# -------------------- APPROXIMATE COUNTS --------------------
+COUNT_CACHE_KEY_PREFIX = 'pagination:count'
+
+
+def _matches_nothing(queryset):
+    # none() and filters such as pk__in=[] never reach the database, so
+    # there is no plan to EXPLAIN
+    if queryset.query.is_empty():
+        return True
+    try:
+        queryset.query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return True
+    return False
+
+
+def estimated_count(queryset):
+    """The planner's row estimate for `queryset`, from EXPLAIN (no rows are read)"""
+    if _matches_nothing(queryset):
+        return 0
+    plan = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _count_cache_key(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(repr((sql, params)).encode('utf-8')).hexdigest()
+    return f'{COUNT_CACHE_KEY_PREFIX}:{digest}'
+
+
+def large_count(queryset):
+    """
+    (count, is_approximate) for `queryset`. Filters the planner expects to
+    match fewer than APPROXIMATE_COUNT_THRESHOLD rows are counted exactly.
+    Larger ones take the planner estimate ('estimate') or an exact count
+    cached per filter for APPROXIMATE_COUNT_CACHE_TIMEOUT seconds ('cache'),
+    as APPROXIMATE_COUNT_STRATEGY says.
+    """
+    if _matches_nothing(queryset):
+        return 0, False
+    strategy = settings.APPROXIMATE_COUNT_STRATEGY
+    key = _count_cache_key(queryset) if strategy == 'cache' else None
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, True
+
+    estimate = estimated_count(queryset)
+    if estimate < settings.APPROXIMATE_COUNT_THRESHOLD:
+        return queryset.count(), False
+    if key is None:
+        return estimate, True
+    count = queryset.count()
+    cache.set(key, count, settings.APPROXIMATE_COUNT_CACHE_TIMEOUT)
+    return count, False
+
+
+class ApproximateCountPage(Page):
+    def __init__(self, object_list, number, paginator, has_more=None):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        if self.has_more is None:
+            return super().has_next()
+        return self.has_more
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    A Paginator counting through large_count(). When the count is
+    approximate, page numbers past the estimated last page are still
+    served, and whether a next page exists is learnt by fetching one row
+    more than the page holds.
+    """
+
+    @cached_property
+    def _counted(self):
+        return large_count(self.object_list)
+
+    @property
+    def count(self):
+        return self._counted[0]
+
+    @property
+    def count_is_approximate(self):
+        return self._counted[1]
+
+    def validate_number(self, number):
+        if not self.count_is_approximate:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        if not self.count_is_approximate:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return ApproximateCountPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """
+    PageNumberPagination for large admin lists: counts above
+    APPROXIMATE_COUNT_THRESHOLD are estimated or cached (large_count), and
+    the response says so in count_is_approximate.
+    """
+    django_paginator_class = ApproximateCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_is_approximate', self.page.paginator.count_is_approximate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,197 @@
+# Admin dashboard statistics, kept up to date by the write paths.
+#
+# Platform totals live in PLATFORM_STATS_SHARDS PlatformStats rows and
+# donations per day in DailyDonationStats rows, one per (day, shard). Each
+# write adds its deltas to the row of the shard its object's id hashes to,
+# with a single upsert, so concurrent writers seldom wait on one another.
+# The dashboard sums the shard rows and the last STATS_WINDOW_DAYS days of
+# buckets, a fixed number of rows however large the tables grow.
+#
+# Paths that bypass these hooks (the Django admin, bulk SQL) leave the
+# numbers off until rebuild_platform_stats recounts them.
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from accounts.models import User
+from campaigns.models import Campaign
+from core.models import DailyDonationStats, PlatformStats
+from core.upserts import add_to_rows
+from donations.models import Donation
+
+
+STATS_WINDOW_DAYS = 30
+TOTAL_FIELDS = ('users', 'campaigns', 'active_campaigns', 'donations', 'donation_amount', 'pending_donations')
+DAILY_FIELDS = ('donations', 'donation_amount')
+
+
+def _shard(key):
+    return key.int % settings.PLATFORM_STATS_SHARDS
+
+
+def _bump_totals(key, **deltas):
+    row = {field: deltas.get(field, 0) for field in TOTAL_FIELDS}
+    add_to_rows(PlatformStats, ['shard'], [{'shard': _shard(key), **row}])
+
+
+def _bump_days(key, days):
+    add_to_rows(DailyDonationStats, ['day', 'shard'], [
+        {'day': day, 'shard': _shard(key), 'donations': count, 'donation_amount': amount}
+        for day, (count, amount) in days.items()
+    ])
+
+
+# -------------------- WRITE PATH HOOKS --------------------
+# Called in the transaction of the write they count
+
+def record_user_created(user):
+    _bump_totals(user.pk, users=1)
+
+
+def record_campaign_created(campaign):
+    _bump_totals(campaign.pk, campaigns=1, active_campaigns=int(campaign.is_active))
+
+
+def record_campaign_activity_change(campaign, was_active):
+    """After campaign.is_active was saved, previously `was_active`"""
+    _bump_totals(campaign.pk, active_campaigns=int(campaign.is_active) - int(was_active))
+
+
+def record_campaigns_deactivated(campaign_ids):
+    """After a batch of active campaigns was switched inactive, one shard for the batch"""
+    if campaign_ids:
+        _bump_totals(campaign_ids[0], active_campaigns=-len(campaign_ids))
+
+
+def record_campaign_deleted(campaign):
+    """Before deleting `campaign`, with the donations the delete cascades to"""
+    rows = list(
+        Donation.objects.filter(campaign_id=campaign.pk).order_by()
+        .annotate(day=TruncDate('created_at')).values('day')
+        .annotate(count=Count('pk'), amount=Sum('amount'), pending=Count('pk', filter=Q(status='PENDING')))
+        .values_list('day', 'count', 'amount', 'pending')
+    )
+    _bump_totals(
+        campaign.pk,
+        campaigns=-1,
+        active_campaigns=-int(campaign.is_active),
+        donations=-sum(row[1] for row in rows),
+        donation_amount=-sum((row[2] for row in rows), Decimal('0')),
+        pending_donations=-sum(row[3] for row in rows),
+    )
+    # Only per-day sums are read, so the day's deltas can go to any shard
+    _bump_days(campaign.pk, {day: (-count, -amount) for day, count, amount, _ in rows})
+
+
+def record_donations_created(donations):
+    """Count newly inserted donations, one shard for the whole batch"""
+    if not donations:
+        return
+    days = defaultdict(lambda: [0, Decimal('0')])
+    for donation in donations:
+        day = days[timezone.localdate(donation.created_at)]
+        day[0] += 1
+        day[1] += donation.amount
+    key = donations[0].pk
+    _bump_totals(
+        key,
+        donations=len(donations),
+        donation_amount=sum((donation.amount for donation in donations), Decimal('0')),
+        pending_donations=sum(donation.status == 'PENDING' for donation in donations),
+    )
+    _bump_days(key, days)
+
+
+def record_status_changes(key, changes):
+    """Count (old_status, new_status) transitions of donations; `key` picks the shard"""
+    pending = sum((new == 'PENDING') - (old == 'PENDING') for old, new in changes)
+    _bump_totals(key, pending_donations=pending)
+
+
+# -------------------- READING --------------------
+
+def platform_stats():
+    """The dashboard numbers, from the shard rows and the window's day buckets"""
+    totals = PlatformStats.objects.aggregate(*[Sum(field) for field in TOTAL_FIELDS])
+    since = timezone.localdate() - timedelta(days=STATS_WINDOW_DAYS - 1)
+    window = DailyDonationStats.objects.filter(day__gte=since).aggregate(*[Sum(field) for field in DAILY_FIELDS])
+    stats = {field: totals[f'{field}__sum'] or 0 for field in TOTAL_FIELDS}
+    stats.update({f'window_{field}': window[f'{field}__sum'] or 0 for field in DAILY_FIELDS})
+    return stats
+
+
+# -------------------- RECOUNT --------------------
+
+def recount():
+    """(totals, {day: (donations, amount)}) counted from the tables"""
+    campaigns = Campaign.objects.aggregate(
+        campaigns=Count('pk'), active_campaigns=Count('pk', filter=Q(is_active=True)),
+    )
+    donations = Donation.objects.aggregate(
+        donations=Count('pk'), donation_amount=Sum('amount'), pending_donations=Count('pk', filter=Q(status='PENDING')),
+    )
+    totals = {'users': User.objects.count(), **campaigns, **donations}
+    totals['donation_amount'] = totals['donation_amount'] or Decimal('0')
+    days = {
+        day: (count, amount)
+        for day, count, amount in Donation.objects.order_by().annotate(day=TruncDate('created_at')).values('day')
+        .annotate(count=Count('pk'), amount=Sum('amount')).values_list('day', 'count', 'amount')
+    }
+    return totals, days
+
+
+def stored():
+    """(totals, {day: (donations, amount)}) as the stats tables hold them"""
+    totals = PlatformStats.objects.aggregate(*[Sum(field) for field in TOTAL_FIELDS])
+    totals = {field: totals[f'{field}__sum'] or 0 for field in TOTAL_FIELDS}
+    days = {
+        day: (count, amount)
+        for day, count, amount in DailyDonationStats.objects.order_by().values('day')
+        .annotate(count=Sum('donations'), amount=Sum('donation_amount')).values_list('day', 'count', 'amount')
+        if count or amount
+    }
+    return totals, days
+
+
+def stats_drift(current, recounted):
+    """['<what>: <stored> != <recounted>', ...] between stored() and recount() results"""
+    (current_totals, current_days), (totals, days) = current, recounted
+    drift = [
+        f'{field}: {current_totals[field]} != {totals[field]}'
+        for field in TOTAL_FIELDS if current_totals[field] != totals[field]
+    ]
+    for day in sorted(current_days.keys() | days.keys()):
+        current_day, day_totals = current_days.get(day, (0, 0)), days.get(day, (0, 0))
+        if tuple(current_day) != tuple(day_totals):
+            drift.append(f'{day}: {current_day[0]} donations / {current_day[1]} != {day_totals[0]} / {day_totals[1]}')
+    return drift
+
+
+def rebuild_platform_stats():
+    """
+    Replace the stats with a full recount; returns the drift found. The
+    stats tables are locked for the recount, so writers counted meanwhile
+    wait and add their deltas onto the rebuilt rows.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'LOCK TABLE {PlatformStats._meta.db_table}, {DailyDonationStats._meta.db_table} '
+                'IN SHARE ROW EXCLUSIVE MODE'
+            )
+        totals, days = recount()
+        drift = stats_drift(stored(), (totals, days))
+        PlatformStats.objects.all().delete()
+        DailyDonationStats.objects.all().delete()
+        PlatformStats.objects.create(shard=0, **totals)
+        DailyDonationStats.objects.bulk_create([
+            DailyDonationStats(day=day, shard=0, donations=count, donation_amount=amount)
+            for day, (count, amount) in days.items()
+        ])
+    return drift
@@ -0,0 +1,1106 @@
+"""
+Query-budget regression suite for every API route.
+
+Seeds a realistic dataset, calls each route in accounts.urls, campaigns.urls,
+donations.urls and core.admin_urls, and records its SQL query count and total
+DB time. A route fails when it exceeds its declared budget, and paginated
+routes fail when a full page costs more queries than a short one (an N+1).
+
+FastSerializationTests checks that the values() row path for list pages
+(core.row_serializers) renders byte-identical JSON to the DRF serializers,
+and IndexUsageTests checks with EXPLAIN that each hot query uses its index.
+
+Run with:  python manage.py test core
+Set QUERY_BUDGET_REPORT=1 to print the per-route query count / DB time table.
+"""
+import base64
+import csv
+import io
+import json
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+import accounts.urls
+import campaigns.urls
+import core.admin_urls
+import donations.urls
+from accounts.models import User
+from campaigns.models import Campaign, CampaignCategory, Milestone
+from campaigns.search import search_campaigns, update_search_vector
+from core.exports import DONATION_EXPORT_COLUMNS, stream_export
+from core.analytics import refresh_analytics
+from core.models import AnalyticsRollup, AnalyticsRollupDonor, ModerationLease, Notification
+from core.moderation_queue import claim
+from core.pagination import ApproximateCountPaginator, estimated_count
+from core.platform_stats import rebuild_platform_stats, recount, stats_drift, stored
+from donations.models import Donation
+from donations.receipts import issue_receipts
+
+
+PASSWORD = 'Budget-pass-123'
+
+URL_MODULES = {
+    'accounts': accounts.urls,
+    'campaigns': campaigns.urls,
+    'donations': donations.urls,
+    'admin': core.admin_urls,
+}
+
+# url: callable(test) -> path, data: callable(test) -> payload
+# user: attribute name of the acting user on the test class (None = anonymous)
+# paginated: the route returns pages, so page=1 and page=last must cost the same
+Route = namedtuple(
+    'Route',
+    ['module', 'name', 'method', 'url', 'budget', 'user', 'data', 'status', 'paginated', 'multipart'],
+    defaults=[None, None, 200, False, False],
+)
+
+
+def signup_payload(email, phone):
+    return {
+        'email': email,
+        'password': PASSWORD,
+        'password_confirm': PASSWORD,
+        'full_name': 'New Person',
+        'phone_number': phone,
+        'role': 'donor',
+    }
+
+
+def settlement_file(donation):
+    return SimpleUploadedFile(
+        'settlement.csv', f'donation_id,status,transaction_id\n{donation.id},COMPLETED,gw-budget-1\n'.encode(),
+    )
+
+
+def milestone_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4)).save(buffer, format='PNG')
+    return SimpleUploadedFile('proof.png', buffer.getvalue(), content_type='image/png')
+
+
+ROUTES = [
+    # -------------------- ACCOUNTS --------------------
+    Route('accounts', 'signup', 'POST', lambda t: '/api/auth/signup/', 4,
+          data=lambda t: signup_payload('new@example.com', '5550009999'), status=201),
+    Route('accounts', 'login', 'POST', lambda t: '/api/auth/login/', 1,
+          data=lambda t: {'email': t.donor.email, 'password': PASSWORD}),
+    Route('accounts', 'phone_login', 'POST', lambda t: '/api/auth/phone-login/', 1,
+          data=lambda t: {'phone_number': t.donor.phone_number}),
+    Route('accounts', 'phone_signup', 'POST', lambda t: '/api/auth/phone-signup/', 4,
+          data=lambda t: signup_payload('phone@example.com', '5550008888'), status=201),
+    Route('accounts', 'logout', 'POST', lambda t: '/api/auth/logout/', 1, user='donor'),
+    Route('accounts', 'profile', 'GET', lambda t: '/api/auth/me/', 1, user='donor'),
+    Route('accounts', 'update_profile', 'PUT', lambda t: '/api/auth/me/update/', 2, user='donor',
+          data=lambda t: {'password': PASSWORD, 'full_name': 'Renamed Donor'}),
+    Route('accounts', 'change_password', 'POST', lambda t: '/api/auth/change-password/', 2, user='donor',
+          data=lambda t: {'old_password': PASSWORD, 'new_password': 'Another-pass-456'}),
+    Route('accounts', 'refresh_token', 'POST', lambda t: '/api/auth/refresh-token/', 0,
+          data=lambda t: {'refresh_token': str(RefreshToken.for_user(t.donor))}),
+
+    # -------------------- CAMPAIGNS --------------------
+    Route('campaigns', 'list_categories', 'GET', lambda t: '/api/campaigns/categories/', 2),
+    Route('campaigns', 'list_campaigns', 'GET', lambda t: '/api/campaigns/', 2, paginated=True),
+    Route('campaigns', 'create_campaign', 'POST', lambda t: '/api/campaigns/create/', 5, user='creator',
+          data=lambda t: {
+              'title': 'Solar lamps for night school',
+              'description': 'Lighting for evening classes.',
+              'goal_amount': '5000.00',
+              'category_id': t.category.id,
+              'campaign_type': 'NGO',
+              'is_active': True,
+          }, status=201),
+    Route('campaigns', 'suggest_campaigns', 'GET', lambda t: '/api/campaigns/suggest/?q=watr', 4),
+    Route('campaigns', 'get_campaign', 'GET', lambda t: f'/api/campaigns/{t.campaign.id}/', 2),
+    Route('campaigns', 'campaign_donations', 'GET', lambda t: f'/api/campaigns/{t.campaign.id}/donations/', 3,
+          paginated=True),
+    Route('campaigns', 'update_campaign', 'PUT', lambda t: f'/api/campaigns/{t.campaign.id}/update/', 6,
+          user='creator', data=lambda t: {'title': 'Clean water for the whole valley'}),
+    Route('campaigns', 'delete_campaign', 'DELETE', lambda t: f'/api/campaigns/{t.campaign.id}/delete/', 18,
+          user='creator', status=204),
+    Route('campaigns', 'campaign_stats', 'GET', lambda t: f'/api/campaigns/{t.campaign.id}/stats/', 2),
+    Route('campaigns', 'milestones_list_create', 'GET',
+          lambda t: f'/api/campaigns/{t.campaign.id}/milestones/', 3),
+    Route('campaigns', 'milestones_list_create', 'POST',
+          lambda t: f'/api/campaigns/{t.campaign.id}/milestones/', 6, user='creator',
+          data=lambda t: {
+              'title': 'Pipes delivered',
+              'description': 'All pipes on site.',
+              'due_date': (timezone.now() + timezone.timedelta(days=30)).isoformat(),
+          }, status=201),
+    Route('campaigns', 'get_milestone', 'GET',
+          lambda t: f'/api/campaigns/{t.campaign.id}/milestones/{t.milestone.id}/', 2),
+    # Shadowed by get_milestone, which is registered on the same path
+    Route('campaigns', 'update_milestone', 'PUT',
+          lambda t: f'/api/campaigns/{t.campaign.id}/milestones/{t.milestone.id}/', 1, user='creator',
+          data=lambda t: {'title': 'Renamed'}, status=405),
+    Route('campaigns', 'complete_milestone', 'POST',
+          lambda t: f'/api/campaigns/{t.campaign.id}/milestones/{t.milestone.id}/complete/', 12, user='creator',
+          data=lambda t: {'image': milestone_image()}, multipart=True),
+    Route('campaigns', 'delete_milestone', 'DELETE',
+          lambda t: f'/api/campaigns/{t.campaign.id}/milestones/{t.milestone.id}/delete/', 5, user='creator',
+          status=204),
+
+    # -------------------- DONATIONS --------------------
+    Route('donations', 'user_donations', 'GET', lambda t: '/api/donations/my-donations/', 3, user='donor',
+          paginated=True),
+    Route('donations', 'donation_count', 'GET', lambda t: '/api/donations/count/', 2, user='donor'),
+    # The donor row is locked before the new-donor check
+    Route('donations', 'create_donation', 'POST', lambda t: '/api/donations/', 11, user='donor',
+          data=lambda t: {'campaign': str(t.campaign.id), 'amount': '25.00'}, status=201),
+    Route('donations', 'download_receipt', 'GET',
+          lambda t: f'/api/donations/{t.completed_donation.id}/receipt/', 2, user='donor'),
+    Route('donations', 'tax_statement', 'GET',
+          lambda t: f'/api/donations/tax-statements/{timezone.now().year}/', 2, user='donor'),
+    Route('donations', 'intake_status', 'GET', lambda t: f'/api/donations/intake/{t.donation.id}/', 2,
+          user='donor'),
+    Route('donations', 'donation_detail', 'GET', lambda t: f'/api/donations/{t.donation.id}/', 4, user='donor'),
+    Route('donations', 'update_donation_status', 'PUT', lambda t: f'/api/donations/{t.donation.id}/status/', 11,
+          user='donor', data=lambda t: {'status': 'COMPLETED'}),
+
+    # -------------------- ADMIN --------------------
+    Route('admin', 'dashboard_stats', 'GET', lambda t: '/api/admin/stats/', 3, user='admin'),
+    Route('admin', 'analytics', 'GET', lambda t: '/api/admin/analytics/?group_by=category', 4, user='admin'),
+    Route('admin', 'list_donations', 'GET', lambda t: '/api/admin/donations/', 4, user='admin', paginated=True),
+    Route('admin', 'approve_donation', 'PUT', lambda t: f'/api/admin/donations/{t.donation.id}/approve/', 12,
+          user='admin'),
+    Route('admin', 'reject_donation', 'PUT', lambda t: f'/api/admin/donations/{t.donation.id}/reject/', 11,
+          user='admin'),
+    Route('admin', 'bulk_moderate_donations', 'POST', lambda t: '/api/admin/donations/bulk/approve/', 12,
+          user='admin', data=lambda t: {'filter': {'status': 'PENDING', 'campaign_id': str(t.campaign.id)}}),
+    Route('admin', 'ingest_settlements', 'POST', lambda t: '/api/admin/settlements/', 10, user='admin',
+          data=lambda t: {'file': settlement_file(t.donation)}, multipart=True),
+    Route('admin', 'tax_statements', 'GET', lambda t: f'/api/admin/tax-statements/{timezone.now().year}/', 2,
+          user='admin'),
+    Route('admin', 'export_donations', 'GET', lambda t: '/api/admin/donations/export/?status=COMPLETED', 2,
+          user='admin'),
+    Route('admin', 'list_campaigns', 'GET', lambda t: '/api/admin/campaigns/', 4, user='admin', paginated=True),
+    Route('admin', 'export_campaigns', 'GET', lambda t: '/api/admin/campaigns/export/?output=jsonl', 2,
+          user='admin'),
+    Route('admin', 'verify_campaign', 'PUT', lambda t: f'/api/admin/campaigns/{t.campaign.id}/verify/', 6,
+          user='admin'),
+    Route('admin', 'reject_campaign', 'PUT', lambda t: f'/api/admin/campaigns/{t.campaign.id}/reject/', 6,
+          user='admin'),
+    Route('admin', 'bulk_moderate_campaigns', 'POST', lambda t: '/api/admin/campaigns/bulk/reject/', 5,
+          user='admin', data=lambda t: {'ids': [str(t.campaign.id)]}),
+    Route('admin', 'campaign_balance', 'GET', lambda t: f'/api/admin/campaigns/{t.campaign.id}/balance/', 4,
+          user='admin'),
+    Route('admin', 'claim_moderation', 'POST', lambda t: '/api/admin/moderation/donations/claim/', 6,
+          user='admin', data=lambda t: {'limit': 10}),
+    Route('admin', 'heartbeat_moderation', 'POST', lambda t: '/api/admin/moderation/donations/heartbeat/', 4,
+          user='admin'),
+    Route('admin', 'release_moderation', 'POST', lambda t: '/api/admin/moderation/campaigns/release/', 2,
+          user='admin'),
+    Route('admin', 'list_users', 'GET', lambda t: '/api/admin/users/', 4, user='admin', paginated=True),
+    Route('admin', 'export_users', 'GET', lambda t: '/api/admin/users/export/?role=ngo', 2, user='admin'),
+    # The route converter is <int:user_id> while User ids are UUIDs, so only a miss is reachable
+    Route('admin', 'user_detail', 'GET', lambda t: '/api/admin/users/1/', 2, user='admin', status=404),
+    Route('admin', 'cache_stats', 'GET', lambda t: '/api/admin/cache/stats/', 1, user='admin'),
+]
+
+RESULTS = []
+
+
+class QueryRecorder:
+    """Connection execute wrapper recording each statement and its wall time"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def db_ms(self):
+        return sum(duration for _, duration in self.queries) * 1000
+
+
+def tearDownModule():
+    if not os.environ.get('QUERY_BUDGET_REPORT'):
+        return
+    print(f"\n{'route':<48}{'method':<8}{'queries':>8}{'budget':>8}{'db ms':>10}")
+    for route, queries, db_ms in RESULTS:
+        label = f'{route.module}:{route.name}'
+        print(f'{label:<48}{route.method:<8}{queries:>8}{route.budget:>8}{db_ms:>10.2f}')
+
+
+class SeededDataMixin:
+    """Users, campaigns, donations and milestones shared by the API suites"""
+
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password(PASSWORD)
+        cls.admin = User.objects.create(
+            email='admin@example.com', full_name='Site Admin', phone_number='5550000000',
+            password=password, is_staff=True, is_superuser=True,
+        )
+        cls.creator = User.objects.create(
+            email='creator@example.com', full_name='Campaign Creator', phone_number='5550000001',
+            password=password, role='ngo',
+        )
+        other_creator = User.objects.create(
+            email='creator2@example.com', full_name='Second Creator', phone_number='5550000002',
+            password=password, role='ngo',
+        )
+        donors = User.objects.bulk_create([
+            User(
+                email=f'donor{i}@example.com', full_name=f'Donor Number{i}',
+                phone_number=f'55510{i:05d}', password=password,
+            )
+            for i in range(25)
+        ])
+        cls.donor = donors[0]
+
+        categories = list(CampaignCategory.objects.all()) or [
+            CampaignCategory.objects.create(name=name) for name in ('Medical', 'Education', 'Environment')
+        ]
+        cls.category = categories[0]
+
+        # 45 campaigns: full pages of 10 / 20 plus a short last page
+        campaigns = []
+        for i in range(45):
+            campaigns.append(Campaign(
+                title='Clean water for the village' if i == 0 else f'Campaign number {i}',
+                description=f'Description for campaign {i}. ' * 20,
+                goal_amount=Decimal('100000.00'),
+                raised_amount=Decimal(i * 100),
+                campaign_type='NGO' if i % 2 else 'INDIVIDUAL',
+                category=categories[i % len(categories)],
+                is_active=i % 5 != 0,
+                created_by=other_creator if i % 3 == 2 else cls.creator,
+            ))
+        Campaign.objects.bulk_create(campaigns)
+        cls.campaign = campaigns[0]
+
+        statuses = ['PENDING', 'COMPLETED', 'FAILED']
+        donations = []
+        # 25 public donations on the main campaign, one per donor
+        for i, donor in enumerate(donors):
+            donations.append(Donation(
+                donor=donor, campaign=cls.campaign, amount=Decimal('10.00') + i,
+                status=statuses[i % 3], payment_method='upi' if i % 2 else 'card',
+            ))
+        # Anonymous donations are hidden from the campaign feed
+        for donor in donors[:3]:
+            donations.append(Donation(
+                donor=donor, campaign=cls.campaign, amount=Decimal('5.00'), is_anonymous=True,
+            ))
+        # The main donor's history spans several pages
+        for i, campaign in enumerate(campaigns[1:25]):
+            donations.append(Donation(
+                donor=cls.donor, campaign=campaign, amount=Decimal('20.00'), status=statuses[i % 3],
+            ))
+        Donation.objects.bulk_create(donations)
+        cls.donation = donations[0]
+        # The main donor's first COMPLETED donation has a rendered receipt
+        cls.completed_donation = donations[29]
+        with override_settings(RECEIPT_RENDER_PROCESSES=0):
+            issue_receipts([cls.completed_donation.pk])
+
+        milestones = Milestone.objects.bulk_create([
+            Milestone(
+                campaign=cls.campaign, title=f'Milestone {i}', description='Progress update',
+                order=i, due_date=timezone.now() + timezone.timedelta(days=i * 10),
+            )
+            for i in range(1, 4)
+        ])
+        cls.milestone = milestones[0]
+
+        Campaign.objects.filter(pk=cls.campaign.pk).update(
+            donation_count=28, completed_donation_count=8, unique_donor_count=25,
+        )
+        update_search_vector(Campaign.objects.all())
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+    RECEIPT_RENDER_PROCESSES=0,
+)
+class QueryBudgetTests(SeededDataMixin, TestCase):
+    """One generated test per route, each isolated in its own transaction"""
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, route):
+        client = APIClient()
+        if route.user:
+            token = RefreshToken.for_user(getattr(self, route.user)).access_token
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def call(self, route, url):
+        client = self.client_for(route)
+        kwargs = {}
+        if route.data:
+            kwargs['data'] = route.data(self)
+            kwargs['format'] = 'multipart' if route.multipart else 'json'
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = getattr(client, route.method.lower())(url, **kwargs)
+            if response.streaming:
+                # Streamed bodies run their queries as they are consumed
+                response.streamed_content = b''.join(response.streaming_content)
+        return response, recorder
+
+    def check_route(self, route):
+        url = route.url(self)
+        response, recorder = self.call(route, url)
+        body = b'<streamed>' if response.streaming else response.content[:300]
+        self.assertEqual(
+            response.status_code, route.status,
+            f'{route.method} {url} returned {response.status_code}: {body!r}',
+        )
+
+        queries = len(recorder)
+        RESULTS.append((route, queries, recorder.db_ms))
+
+        self.assertLessEqual(
+            queries, route.budget,
+            f'{route.method} {url} ran {queries} queries (budget {route.budget}):\n' +
+            '\n'.join(sql for sql, _ in recorder.queries),
+        )
+
+        if route.paginated:
+            separator = '&' if '?' in url else '?'
+            first_response, first = self.call(route, f'{url}{separator}page=1')
+            last_response, last = self.call(route, f'{url}{separator}page=last')
+            self.assertGreater(
+                len(first_response.data['results']), len(last_response.data['results']),
+                'The seeded dataset must leave a short last page',
+            )
+            self.assertEqual(
+                len(first), len(last),
+                f'{route.method} {url}: query count grows with page size',
+            )
+
+    def test_every_route_has_a_budget(self):
+        declared = {(route.module, route.name) for route in ROUTES}
+        for module, urlconf in URL_MODULES.items():
+            for pattern in urlconf.urlpatterns:
+                self.assertIn(
+                    (module, pattern.name), declared,
+                    f'{module}:{pattern.name} has no query budget in core/tests.py',
+                )
+
+
+def make_route_test(route):
+    def test(self):
+        self.check_route(route)
+    return test
+
+
+for _route in ROUTES:
+    setattr(
+        QueryBudgetTests,
+        f'test_{_route.module}_{_route.name}_{_route.method.lower()}',
+        make_route_test(_route),
+    )
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+)
+class FastSerializationTests(SeededDataMixin, TestCase):
+    """List pages built from values() rows must match the DRF serializers byte for byte"""
+
+    URLS = [
+        ('donor', '/api/donations/my-donations/'),
+        ('donor', '/api/donations/my-donations/?page=2'),
+        ('donor', '/api/donations/my-donations/?cursor='),
+        ('admin', '/api/admin/donations/'),
+        ('admin', '/api/admin/donations/?page=2'),
+        ('admin', '/api/admin/donations/?status=COMPLETED'),
+        (None, '/api/campaigns/'),
+        (None, '/api/campaigns/?page=5'),
+        (None, '/api/campaigns/?cursor='),
+        (None, '/api/campaigns/?search=water'),
+        (None, '/api/campaigns/?search=campaign&fields=id,title,search_rank'),
+        (None, '/api/campaigns/?fields=title,created_by.first_name,progress_percentage'),
+        (None, '/api/campaigns/?excerpt=true&exclude=category'),
+        ('creator', '/api/campaigns/?created_by=me'),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Values that exercise the individual field mappers
+        Campaign.objects.filter(pk=cls.campaign.pk).update(
+            image='campaigns/well.png', description='Clean water for everyone. ' * 30,
+        )
+        Campaign.objects.exclude(pk=cls.campaign.pk).filter(created_by=cls.creator).update(goal_amount=0)
+        User.objects.filter(pk=cls.donor.pk).update(full_name='')
+        Donation.objects.filter(pk=cls.donation.pk).update(message='Për fëmijët 🙏', transaction_id='TXN-1')
+
+    def render(self, user, url, fast):
+        client = APIClient()
+        if user:
+            token = RefreshToken.for_user(getattr(self, user)).access_token
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        cache.clear()
+        with self.settings(FAST_LIST_SERIALIZATION=fast):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.content
+
+    def test_row_path_matches_serializers(self):
+        for user, url in self.URLS:
+            with self.subTest(url=url, user=user):
+                self.assertEqual(self.render(user, url, fast=True), self.render(user, url, fast=False))
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+    RECEIPT_RENDER_PROCESSES=0,
+)
+class ExportTests(SeededDataMixin, TestCase):
+    """Admin exports stream every matching row, flat, in one query"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_donations_csv_takes_the_list_filters(self):
+        Donation.objects.filter(pk=self.donation.pk).update(message='=HYPERLINK("x")')
+        response, body = self.export(f'/api/admin/donations/export/?campaign_id={self.campaign.id}')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="donations-', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), Donation.objects.filter(campaign=self.campaign).count())
+        first = next(row for row in rows if row['id'] == str(self.donation.id))
+        self.assertEqual(first['donor_email'], self.donation.donor.email)
+        self.assertEqual(first['campaign_title'], self.campaign.title)
+        self.assertEqual(first['message'], '\'=HYPERLINK("x")')
+
+        _, body = self.export('/api/admin/donations/export/?status=COMPLETED&output=jsonl')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), Donation.objects.filter(status='COMPLETED').count())
+        receipted = next(row for row in rows if row['id'] == str(self.completed_donation.id))
+        self.assertTrue(receipted['receipt_number'].startswith('FT-'))
+
+    def test_donation_date_range(self):
+        Donation.objects.filter(pk=self.donation.pk).update(created_at='2025-01-31T23:30:00Z')
+        _, body = self.export(
+            '/api/admin/donations/export/?output=jsonl&created_from=2025-01-01&created_to=2025-01-31'
+        )
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [str(self.donation.id)])
+        response = self.client.get('/api/admin/donations/export/?created_from=January')
+        self.assertEqual(response.status_code, 400)
+
+    def test_campaigns_and_users(self):
+        _, body = self.export('/api/admin/campaigns/export/?active=false&output=jsonl')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), Campaign.objects.filter(is_active=False).count())
+        self.assertTrue(all(row['category'] and row['creator_email'] for row in rows))
+        _, body = self.export(f'/api/admin/campaigns/export/?category={self.category.pk}&output=jsonl')
+        self.assertEqual(
+            len(body.splitlines()), Campaign.objects.filter(category=self.category).count(),
+        )
+        for path in ('/api/admin/campaigns/export/', '/api/admin/campaigns/'):
+            response = self.client.get(f'{path}?category=abc')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'category must be an integer'})
+
+        _, body = self.export('/api/admin/users/export/?role=ngo')
+        self.assertEqual(
+            sorted(row['email'] for row in csv.DictReader(io.StringIO(body))),
+            ['creator2@example.com', 'creator@example.com'],
+        )
+
+    def test_export_is_chunked_and_admin_only(self):
+        queryset = Donation.objects.order_by('-created_at')
+        with self.assertNumQueries(1):
+            chunks = list(stream_export(queryset, DONATION_EXPORT_COLUMNS, 'csv', chunk_size=10))
+        self.assertEqual(len(chunks), math.ceil((queryset.count() + 1) / 10))
+
+        self.assertEqual(self.client.get('/api/admin/users/export/?output=xml').status_code, 400)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+        self.assertEqual(self.client.get('/api/admin/users/export/').status_code, 403)
+        # Refused before the filters are looked at
+        self.assertEqual(self.client.get('/api/admin/donations/export/?created_from=someday').status_code, 403)
+        self.assertEqual(self.client.get('/api/admin/campaigns/export/?output=xml').status_code, 403)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+    RECEIPT_RENDER_PROCESSES=0,
+)
+class KeysetPaginationTests(SeededDataMixin, TestCase):
+    """?cursor= pages walk (created_at, id) both ways and compose with the list filters"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.data
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.get(url)
+            pages.append([row['id'] for row in data['results']])
+            url = data[link]
+        return pages
+
+    def test_next_and_previous_round_trip(self):
+        expected = [
+            str(pk) for pk in Campaign.objects.filter(is_active=True, created_by=self.creator)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        url = '/api/campaigns/?cursor=&status=active&created_by=me'
+        pages = self.walk(url, 'next')
+        self.assertEqual([len(page) for page in pages], [10, 10, 4])
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+        # Back from the last page, through reversed cursors
+        last = self.get(self.get(url)['next'])['next']
+        back = self.walk(self.get(last)['previous'], 'previous')
+        self.assertEqual(back, pages[:-1][::-1])
+        self.assertIsNone(self.get(url)['previous'])
+
+    def test_donor_history_pages_in_reverse(self):
+        expected = [
+            str(pk) for pk in Donation.objects.filter(donor=self.donor)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+        pages = self.walk('/api/donations/my-donations/?cursor=', 'next')
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+        middle = self.get('/api/donations/my-donations/?cursor=')['next']
+        previous = self.get(self.get(middle)['previous'])
+        self.assertEqual([row['id'] for row in previous['results']], pages[0])
+        self.assertIsNone(previous['previous'])
+        self.assertIsNotNone(previous['next'])
+
+    def test_tampered_cursor_is_not_found(self):
+        token = parse_qs(urlparse(self.get('/api/campaigns/?cursor=')['next']).query)['cursor'][0]
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        for bad in (
+            token[:-4],
+            'not-a-cursor',
+            base64.urlsafe_b64encode(json.dumps({**payload, 'i': 'nope'}).encode()).decode(),
+            base64.urlsafe_b64encode(json.dumps({**payload, 'c': 'yesterday'}).encode()).decode(),
+        ):
+            self.assertEqual(self.client.get('/api/campaigns/', {'cursor': bad}).status_code, 404, bad)
+
+    def test_search_results_page_newest_first(self):
+        expected = [
+            str(pk) for pk in search_campaigns(Campaign.objects.filter(is_active=True), 'campaign', headline=False)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+        self.assertGreater(len(expected), 20)
+        pages = self.walk('/api/campaigns/?cursor=&search=campaign&status=active', 'next')
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertTrue(all(len(page) == 10 for page in pages[:-1]))
+
+        last = self.get(self.get(self.get('/api/campaigns/?pagination=cursor&search=campaign&status=active')['next'])['next'])
+        self.assertTrue(all('<mark>' in row['search_headline'] for row in last['results']))
+        self.assertEqual(self.walk(last['previous'], 'previous'), pages[:2][::-1])
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+)
+class ApproximateCountTests(SeededDataMixin, TestCase):
+    """Admin lists count exactly below APPROXIMATE_COUNT_THRESHOLD and estimate or cache above it"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.data
+
+    def test_small_counts_are_exact(self):
+        data = self.get('/api/admin/donations/?status=PENDING')
+        self.assertEqual(data['count'], Donation.objects.filter(status='PENDING').count())
+        self.assertFalse(data['count_is_approximate'])
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=1, APPROXIMATE_COUNT_STRATEGY='estimate')
+    def test_large_counts_use_the_planner_estimate(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get('/api/admin/donations/')
+        self.assertTrue(data['count_is_approximate'])
+        self.assertEqual(data['count'], estimated_count(Donation.objects.all()))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+        # Pages follow the rows, not the estimate
+        total = Donation.objects.count()
+        last = math.ceil(total / 20)
+        self.assertIsNone(self.get(f'/api/admin/donations/?page={last}')['next'])
+        self.assertIsNotNone(self.get(f'/api/admin/donations/?page={last - 1}')['next'])
+        self.assertEqual(self.client.get(f'/api/admin/donations/?page={last + 1}').status_code, 404)
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=1, APPROXIMATE_COUNT_STRATEGY='cache')
+    def test_large_counts_are_cached_per_filter(self):
+        first = self.get('/api/admin/users/?role=ngo')
+        self.assertEqual((first['count'], first['count_is_approximate']), (2, False))
+        User.objects.create(email='ngo@example.com', full_name='New NGO', phone_number='5553000000', role='ngo')
+
+        cached = self.get('/api/admin/users/?role=ngo')
+        self.assertEqual((cached['count'], cached['count_is_approximate']), (2, True))
+        self.assertEqual(self.get('/api/admin/users/')['count'], User.objects.count())
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=1)
+    def test_empty_querysets_count_zero(self):
+        for queryset in (Donation.objects.filter(pk__in=[]), Donation.objects.none()):
+            self.assertEqual(estimated_count(queryset), 0)
+            for strategy in ('estimate', 'cache'):
+                with self.settings(APPROXIMATE_COUNT_STRATEGY=strategy):
+                    paginator = ApproximateCountPaginator(queryset.order_by('pk'), 20)
+                    self.assertEqual((paginator.count, paginator.count_is_approximate), (0, False))
+                    self.assertEqual(list(paginator.page(1)), [])
+
+    @override_settings(
+        APPROXIMATE_COUNT_THRESHOLD=1, APPROXIMATE_COUNT_STRATEGY='estimate',
+        STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage', STATIC_URL='/static/',
+    )
+    def test_donation_admin_changelist(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/donations/donation/?status__exact=PENDING')
+        self.assertEqual(response.status_code, 200)
+        changelist = response.context['cl']
+        self.assertTrue(changelist.paginator.count_is_approximate)
+        self.assertEqual(len(changelist.result_list), Donation.objects.filter(status='PENDING').count())
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+    RECEIPT_DISPATCH='off',
+)
+class PlatformStatsTests(SeededDataMixin, TestCase):
+    """The dashboard numbers follow the write paths and match a full recount"""
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_write_paths_keep_the_stats_current(self):
+        # The seeded rows were inserted around the hooks
+        with self.assertRaises(CommandError):
+            call_command('rebuild_platform_stats', '--check', stdout=io.StringIO())
+        self.assertTrue(rebuild_platform_stats())
+        self.assertEqual(stats_drift(stored(), recount()), [])
+
+        APIClient().post('/api/auth/signup/', signup_payload('stats@example.com', '5559999999'), format='json')
+        creator = self.client_for(self.creator)
+        campaign_id = creator.post('/api/campaigns/create/', {
+            'title': 'Stats campaign', 'description': 'Counted', 'goal_amount': '500.00',
+            'category_id': self.category.pk, 'campaign_type': 'NGO', 'is_active': True,
+        }, format='json').data['data']['id']
+        donor = self.client_for(self.donor)
+        for amount in ('10.00', '15.00'):
+            donation_id = donor.post(
+                '/api/donations/', {'campaign': campaign_id, 'amount': amount}, format='json',
+            ).data['data']['id']
+        donor.put(f'/api/donations/{donation_id}/status/', {'status': 'COMPLETED'}, format='json')
+        creator.put(f'/api/campaigns/{self.campaign.pk}/update/', {'is_active': False}, format='json')
+        self.client_for(self.admin).put(f'/api/admin/campaigns/{campaign_id}/reject/')
+        creator.delete(f'/api/campaigns/{self.campaign.pk}/delete/')
+        self.assertFalse(Campaign.objects.filter(pk=self.campaign.pk).exists())
+        self.assertEqual(Donation.objects.filter(campaign_id=campaign_id, status='COMPLETED').count(), 1)
+
+        totals, days = recount()
+        self.assertEqual(stats_drift(stored(), (totals, days)), [])
+        data = self.client_for(self.admin).get('/api/admin/stats/').data
+        self.assertEqual(data['total_users'], totals['users'])
+        self.assertEqual(data['active_campaigns'], totals['active_campaigns'])
+        self.assertEqual(data['pending_donations'], totals['pending_donations'])
+        self.assertEqual(data['total_amount_raised'], str(totals['donation_amount']))
+        self.assertEqual(data['activity_last_30_days'], totals['donations'])
+
+    def test_window_covers_the_last_30_days(self):
+        rebuild_platform_stats()
+        Donation.objects.filter(pk=self.donation.pk).update(created_at=timezone.now() - timezone.timedelta(days=31))
+        rebuild_platform_stats()
+        data = self.client_for(self.admin).get('/api/admin/stats/').data
+        self.assertEqual(data['total_donations'], Donation.objects.count())
+        self.assertEqual(data['activity_last_30_days'], Donation.objects.count() - 1)
+
+
+def make_queue(admins, donations):
+    """`admins` staff users and `donations` pending donations on one campaign"""
+    staff = User.objects.bulk_create([
+        User(email=f'moderator{i}@example.com', full_name=f'Moderator {i}', phone_number=f'555200000{i}', is_staff=True)
+        for i in range(admins)
+    ])
+    donor = User.objects.create(email='queue-donor@example.com', full_name='Queue Donor', phone_number='5552999999')
+    campaign = Campaign.objects.create(
+        title='Queued', description='Moderation queue', goal_amount=Decimal('1000.00'), campaign_type='NGO',
+        category=CampaignCategory.objects.get_or_create(name='Medical')[0], is_active=True, created_by=donor,
+    )
+    pending = Donation.objects.bulk_create([
+        Donation(donor=donor, campaign=campaign, amount=Decimal('5.00'), created_at=timezone.now() + timedelta(seconds=i))
+        for i in range(donations)
+    ])
+    return staff, campaign, pending
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], RECEIPT_DISPATCH='off')
+class ModerationQueueTests(TestCase):
+    """Admins claim disjoint batches of the moderation queues under expiring leases"""
+
+    @classmethod
+    def setUpTestData(cls):
+        (cls.first, cls.second), cls.campaign, cls.donations = make_queue(2, 5)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def claim(self, user, limit, kind='donations'):
+        response = self.client_for(user).post(f'/api/admin/moderation/{kind}/claim/', {'limit': limit}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['data']['items']]
+
+    def test_claims_hand_out_disjoint_batches_oldest_first(self):
+        ids = [str(donation.pk) for donation in self.donations]
+        self.assertEqual(self.claim(self.first, 2), ids[:2])
+        self.assertEqual(self.claim(self.second, 2), ids[2:4])
+        self.assertEqual(self.claim(self.first, 5), ids[4:])
+        self.assertEqual(self.claim(self.second, 5), [])
+        self.assertEqual(self.claim(self.second, 5, kind='campaigns'), [str(self.campaign.pk)])
+
+    def test_expired_leases_are_claimed_again(self):
+        ids = self.claim(self.first, 2)
+        ModerationLease.objects.filter(object_id=ids[0]).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.claim(self.second, 1), [ids[0]])
+        data = self.client_for(self.first).post(
+            '/api/admin/moderation/donations/heartbeat/', {'ids': ids}, format='json',
+        ).json()['data']
+        self.assertEqual((data['held'], data['lost']), ([ids[1]], [ids[0]]))
+        self.assertEqual(ModerationLease.objects.get(object_id=ids[1]).expires_at, parse_datetime(data['expires_at']))
+
+    def test_release_and_moderation_end_leases(self):
+        first, second = self.claim(self.first, 2)
+        admin = self.client_for(self.first)
+        admin.put(f'/api/admin/donations/{first}/reject/')
+        response = admin.post('/api/admin/moderation/donations/release/', {}, format='json')
+        self.assertEqual(response.json()['data']['released'], 1)
+        self.assertFalse(ModerationLease.objects.exists())
+        # The rejected donation left the queue, the released one is back at its head
+        self.assertEqual(self.claim(self.second, 1), [second])
+
+    def test_items_moderated_by_another_admin_are_no_longer_held(self):
+        ids = self.claim(self.first, 2)
+        claimed = self.claim(self.second, 1, kind='campaigns')
+        self.client_for(self.second).put(f'/api/admin/donations/{ids[0]}/approve/')
+        self.client_for(self.first).put(f'/api/admin/campaigns/{claimed[0]}/verify/')
+
+        data = self.client_for(self.first).post(
+            '/api/admin/moderation/donations/heartbeat/', {}, format='json',
+        ).json()['data']
+        self.assertEqual(data['held'], [ids[1]])
+        data = self.client_for(self.second).post(
+            '/api/admin/moderation/campaigns/heartbeat/', {'ids': claimed}, format='json',
+        ).json()['data']
+        self.assertEqual((data['held'], data['lost']), ([], claimed))
+
+    def test_bad_requests(self):
+        admin = self.client_for(self.first)
+        self.assertEqual(admin.post('/api/admin/moderation/users/claim/', {}, format='json').status_code, 404)
+        self.assertEqual(admin.post('/api/admin/moderation/donations/claim/', {'limit': 0}, format='json').status_code, 400)
+        response = admin.post('/api/admin/moderation/donations/release/', {'ids': ['nope']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        donor = self.client_for(self.campaign.created_by)
+        self.assertEqual(donor.post('/api/admin/moderation/donations/claim/', {}, format='json').status_code, 403)
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+    """Simultaneous claims skip each other's rows instead of waiting or overlapping"""
+
+    def test_concurrent_claims_are_disjoint(self):
+        admins, _, donations = make_queue(6, 60)
+        barrier = threading.Barrier(len(admins))
+        claimed = {}
+
+        def work(admin):
+            try:
+                barrier.wait()
+                batches = []
+                while True:
+                    ids, _ = claim('donation', admin, 4)
+                    if not ids:
+                        break
+                    batches.extend(ids)
+                claimed[admin.pk] = batches
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=(admin,)) for admin in admins]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        every = [pk for batches in claimed.values() for pk in batches]
+        self.assertEqual(len(every), len(set(every)))
+        self.assertEqual(set(every), {donation.pk for donation in donations})
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], RECEIPT_DISPATCH='off')
+class AnalyticsTests(TestCase):
+    """The analytics API reads rollups that new donations are folded into"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            email='admin@example.com', full_name='Site Admin', phone_number='5550000000', is_staff=True,
+        )
+        cls.donors = User.objects.bulk_create([
+            User(email=f'donor{i}@example.com', full_name=f'Donor {i}', phone_number=f'555100000{i}')
+            for i in range(3)
+        ])
+        cls.categories = [CampaignCategory.objects.get_or_create(name=name)[0] for name in ('Medical', 'Education')]
+        cls.campaigns = Campaign.objects.bulk_create([
+            Campaign(
+                title=f'Campaign {i}', description='Analytics', goal_amount=Decimal('1000.00'),
+                campaign_type='NGO', category=category, is_active=True, created_by=cls.admin,
+            )
+            for i, category in enumerate(cls.categories)
+        ])
+        cls.day = timezone.make_aware(timezone.datetime(2025, 3, 12, 9, 30))
+        Campaign.objects.update(created_at=cls.day)
+
+    def donate(self, donor, campaign, amount, at, payment_method='card'):
+        donation = Donation.objects.create(
+            donor=donor, campaign=campaign, amount=Decimal(amount), payment_method=payment_method,
+        )
+        Donation.objects.filter(pk=donation.pk).update(created_at=at)
+
+    def rollup(self, interval, dimension='', value=''):
+        return AnalyticsRollup.objects.filter(interval=interval, dimension=dimension, value=value).order_by('bucket')
+
+    def test_refresh_folds_new_donations_incrementally(self):
+        first, second, third = self.donors
+        self.donate(first, self.campaigns[0], '10.00', self.day)
+        self.donate(first, self.campaigns[1], '5.00', self.day + timedelta(hours=1), payment_method='upi')
+        self.donate(second, self.campaigns[0], '20.00', self.day + timedelta(hours=2))
+        refresh_analytics(until=self.day + timedelta(hours=6))
+
+        day = self.rollup('day').get()
+        self.assertEqual((day.donation_count, day.amount, day.unique_donors, day.new_campaigns), (3, Decimal('35.00'), 2, 2))
+        self.assertEqual([row.donation_count for row in self.rollup('hour')], [1, 1, 1])
+        medical = self.rollup('day', 'category', str(self.categories[0].pk)).get()
+        self.assertEqual((medical.donation_count, medical.unique_donors, medical.new_campaigns), (2, 2, 1))
+        self.assertEqual(self.rollup('month', 'payment_method', 'upi').get().amount, Decimal('5.00'))
+
+        # A later refresh only adds what came since, and knows who was counted
+        self.donate(first, self.campaigns[0], '1.00', self.day + timedelta(hours=8))
+        self.donate(third, self.campaigns[0], '2.00', self.day + timedelta(days=2))
+        refresh_analytics(until=self.day + timedelta(days=3))
+        day.refresh_from_db()
+        self.assertEqual((day.donation_count, day.amount, day.unique_donors), (4, Decimal('36.00'), 2))
+        week = self.rollup('week').get()
+        self.assertEqual((week.bucket, week.donation_count, week.unique_donors), (
+            timezone.make_aware(timezone.datetime(2025, 3, 10)), 5, 3,
+        ))
+        # Donors of closed buckets are forgotten
+        self.assertFalse(AnalyticsRollupDonor.objects.filter(interval='day', bucket=day.bucket).exists())
+
+    def test_analytics_api(self):
+        self.donate(self.donors[0], self.campaigns[0], '10.00', self.day)
+        self.donate(self.donors[1], self.campaigns[1], '15.00', self.day + timedelta(days=1))
+        refresh_analytics(until=self.day + timedelta(days=2))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+        data = client.get('/api/admin/analytics/', {
+            'interval': 'day', 'group_by': 'category', 'start': '2025-03-01', 'end': '2025-03-31',
+        }).data['data']
+        self.assertEqual(
+            [
+                (bucket['bucket'].day, bucket['category_name'], bucket['donation_count'], bucket['new_campaigns'])
+                for bucket in data['buckets']
+            ],
+            [(12, 'Education', 0, 1), (12, 'Medical', 1, 1), (13, 'Education', 1, 0)],
+        )
+        month = client.get('/api/admin/analytics/', {
+            'interval': 'month', 'start': '2025-03-15', 'end': '2025-03-15',
+        }).data['data']['buckets']
+        self.assertEqual([(bucket['unique_donors'], bucket['new_campaigns']) for bucket in month], [(2, 2)])
+
+        for params in ({'interval': 'year'}, {'group_by': 'donor'}, {'start': '2025-03-31', 'end': '2025-03-01'},
+                       {'interval': 'hour', 'start': '2025-01-01', 'end': '2025-03-01'}):
+            self.assertEqual(client.get('/api/admin/analytics/', params).status_code, 400, params)
+
+
+class IndexUsageTests(TestCase):
+    """Each composite / partial index is picked by the query shape it was added for"""
+
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password(None)
+        cls.users = User.objects.bulk_create([
+            User(email=f'indexed{i}@example.com', full_name=f'Indexed {i}', phone_number=f'98{i:08d}', password=password)
+            for i in range(50)
+        ])
+        cls.categories = CampaignCategory.objects.bulk_create([CampaignCategory(name=f'Indexed {i}') for i in range(5)])
+        # Few campaigns are still short of their goal, so the partial index clearly wins
+        cls.campaigns = Campaign.objects.bulk_create([
+            Campaign(
+                title=f'Indexed campaign {i}', description='Indexed', goal_amount=1000,
+                raised_amount=10 if i % 20 == 1 else 1000, campaign_type='INDIVIDUAL', is_active=i % 4 != 0,
+                category=cls.categories[i % 5], created_by=cls.users[i % 50],
+            )
+            for i in range(500)
+        ])
+        Donation.objects.bulk_create([
+            Donation(
+                donor=cls.users[i % 50], campaign=cls.campaigns[i % 500], amount=Decimal('10.00'),
+                status='PENDING' if i % 20 == 0 else 'COMPLETED', is_anonymous=i % 5 == 0,
+            )
+            for i in range(2000)
+        ])
+        Milestone.objects.bulk_create([
+            Milestone(
+                campaign=cls.campaigns[i], title='Indexed', description='Indexed', order=1,
+                due_date=timezone.now() + timezone.timedelta(days=i - 250), is_completed=i % 2 == 0,
+            )
+            for i in range(500)
+        ])
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=cls.users[i % 50], notification_type='DONATION_RECEIVED',
+                title='Indexed', message='Indexed', is_read=i % 3 != 0,
+            )
+            for i in range(1000)
+        ])
+        with connection.cursor() as cursor:
+            for table in ('accounts_user', 'campaigns_campaign', 'campaigns_milestone',
+                          'donations_donation', 'core_notification'):
+                # Rows the earlier tests rolled back still bloat the indexes
+                cursor.execute(f'REINDEX TABLE {table}')
+                cursor.execute(f'ANALYZE {table}')
+
+    def setUp(self):
+        # The test tables are small enough for a sequential scan to win outright
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_active_campaign_list(self):
+        self.assertUsesIndex(
+            Campaign.objects.filter(is_active=True).order_by('-created_at', '-id')[:11],
+            'campaign_active_created_idx',
+        )
+
+    def test_category_campaign_list(self):
+        self.assertUsesIndex(
+            Campaign.objects.filter(category=self.categories[0]).order_by('-created_at', '-id')[:11],
+            'campaign_category_created_idx',
+        )
+
+    def test_open_campaigns(self):
+        self.assertUsesIndex(
+            Campaign.objects.filter(is_active=True, raised_amount__lt=F('goal_amount')).order_by('-created_at')[:10],
+            'campaign_open_created_idx',
+        )
+
+    def test_short_title_prefix(self):
+        self.assertUsesIndex(
+            Campaign.objects.annotate(lower_title=Lower('title')).filter(lower_title__startswith='in')
+            .order_by('title')[:8],
+            'campaign_title_prefix_idx',
+        )
+
+    def test_overdue_milestones(self):
+        self.assertUsesIndex(
+            Milestone.objects.filter(is_completed=False, due_date__lt=timezone.now()),
+            'milestone_open_due_idx',
+        )
+
+    def test_campaign_public_donations(self):
+        self.assertUsesIndex(
+            Donation.objects.filter(campaign=self.campaigns[0]).exclude(is_anonymous=True)
+            .order_by('-created_at', '-id')[:11],
+            'donation_campaign_public_idx',
+        )
+
+    def test_donor_history(self):
+        self.assertUsesIndex(
+            Donation.objects.filter(donor=self.users[0]).order_by('-created_at', '-id')[:11],
+            'donation_donor_created_idx',
+        )
+
+    def test_admin_donations_by_status(self):
+        self.assertUsesIndex(
+            Donation.objects.filter(status='COMPLETED').order_by('-created_at')[:20],
+            'donation_status_created_idx',
+        )
+
+    def test_pending_donations(self):
+        self.assertUsesIndex(
+            Donation.objects.filter(status='PENDING').order_by('-created_at')[:20],
+            'donation_pending_created_idx',
+        )
+
+    def test_unread_notifications(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(recipient=self.users[0], is_read=False).order_by('-created_at'),
+            'notification_inbox_idx',
+        )
+
+    def test_phone_login(self):
+        self.assertUsesIndex(User.objects.filter(phone_number='9800000007'), 'user_phone_number_idx')
@@ -0,0 +1,30 @@
+# Counter upserts: add deltas onto rows that may not exist yet, in one
+# statement, so concurrent writers neither lose updates nor race on insert.
+from django.db import connection
+from django.utils import timezone
+
+
+def add_to_rows(model, keys, rows):
+    """
+    Add {column: delta} `rows` onto the rows of `model` matching their
+    `keys` columns, inserting the missing ones, in one INSERT ... ON
+    CONFLICT DO UPDATE
+    """
+    rows = [row for row in rows if any(value for column, value in row.items() if column not in keys)]
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = list(rows[0])
+    deltas = [column for column in columns if column not in keys]
+    values = ', '.join(['(' + ', '.join(['%s'] * (len(columns) + 1)) + ')'] * len(rows))
+    updates = ', '.join(f'{quote(column)} = {table}.{quote(column)} + EXCLUDED.{quote(column)}' for column in deltas)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(quote(column) for column in columns)}, "updated_at") '
+            f'VALUES {values} '
+            f'ON CONFLICT ({", ".join(quote(key) for key in keys)}) '
+            f'DO UPDATE SET {updates}, "updated_at" = EXCLUDED."updated_at"',
+            [value for row in rows for value in [*(row[column] for column in columns), now]],
+        )
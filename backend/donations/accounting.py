@@ -0,0 +1,274 @@
+# Campaign bookkeeping for donation write paths.
+#
+# raised_amount is the sum of COMPLETED donations. Every change to it, and to
+# the donation counters, is a single UPDATE of the counter columns
+# (UPDATE ... SET raised_amount = raised_amount + x), so concurrent donations
+# never overwrite each other. Campaigns in sharded counter mode take the same
+# UPDATE on one of their shard rows (campaigns.counter_shards), batches too.
+#
+# The goal is enforced once, when a donation is created: its counter UPDATE
+# carries WHERE raised_amount < goal_amount, so the goal check can not race
+# the increment. A donation accepted then is counted whenever it completes,
+# through any path (donor or gateway status update, admin approval, bulk
+# moderation, settlements), because by then the payment has been captured.
+# Each change is also written to the donation ledger (donations.ledger) and
+# counted in the admin dashboard statistics (core.platform_stats).
+#
+# Whether a donation brings a new donor to its campaign is decided with the
+# donor's user row locked (FOR NO KEY UPDATE), so two first donations of the
+# same donor can not both count as new. Locking the donor rather than the
+# campaign keeps donations of different donors to a sharded campaign apart.
+import uuid
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, Now
+from accounts.models import User
+from campaigns.models import Campaign
+from campaigns.counter_shards import update_counter_shard
+from campaigns.list_cache import invalidate_campaign
+from core import platform_stats
+from donations.ledger import record_created, record_transitions
+from donations.models import Donation
+from donations.receipts import schedule_receipts
+
+
+class GoalReached(Exception):
+    """The campaign reached its goal before the donation could be counted"""
+
+
+# Campaigns still accepting donations
+OPEN_FOR_DONATIONS = Q(raised_amount__lt=F('goal_amount'))
+
+
+def _update_shards(campaign_id, shards, key, enforce_goal=False, **updates):
+    """
+    Apply `updates` to one of a sharded campaign's counter shards, picked by
+    `key`. Returns False when the campaign is not sharded (any more), for the
+    caller to update the Campaign row instead.
+    """
+    for _ in range(2):
+        if not shards:
+            return False
+        # Sharded campaigns are invalidated when their shards are folded
+        if update_counter_shard(campaign_id, shards, key, enforce_goal, **updates):
+            return True
+        # Every shard is at its budget, or the shard count just changed
+        latest = Campaign.objects.values_list('counter_shards', flat=True).get(pk=campaign_id)
+        if latest == shards:
+            if enforce_goal:
+                raise GoalReached(campaign_id)
+            return False
+        shards = latest
+    return False
+
+
+def _update_campaign(donation, enforce_goal=False, **updates):
+    campaign_id = donation.campaign_id
+    if _update_shards(campaign_id, donation.campaign.counter_shards, donation.pk, enforce_goal, **updates):
+        return
+
+    campaigns = Campaign.objects.filter(pk=campaign_id)
+    if enforce_goal:
+        campaigns = campaigns.filter(OPEN_FOR_DONATIONS)
+    if not campaigns.update(**updates, updated_at=Now()):
+        if enforce_goal:
+            raise GoalReached(campaign_id)
+        return
+    invalidate_campaign(campaign_id)
+
+
+def lock_donors(donor_ids):
+    """Lock the donors' user rows until commit; returns the ids that still exist"""
+    return set(
+        User.objects.select_for_update(no_key=True).filter(pk__in=donor_ids).order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def record_donation_created(donation):
+    """
+    Bump the campaign's donation counters for a newly created donation.
+    Call inside the transaction that inserted the donation; raises
+    GoalReached, which must roll that transaction back, when the campaign
+    has reached its goal in the meantime.
+    """
+    lock_donors([donation.donor_id])
+    is_new_donor = not Donation.objects.filter(
+        campaign_id=donation.campaign_id,
+        donor_id=donation.donor_id,
+    ).exclude(pk=donation.pk).exists()
+
+    updates = {'donation_count': F('donation_count') + 1}
+    if is_new_donor:
+        updates['unique_donor_count'] = F('unique_donor_count') + 1
+    if donation.status == 'COMPLETED':
+        updates['completed_donation_count'] = F('completed_donation_count') + 1
+        updates['raised_amount'] = F('raised_amount') + donation.amount
+
+    _update_campaign(donation, enforce_goal=True, **updates)
+    record_created([donation])
+    platform_stats.record_donations_created([donation])
+    if donation.status == 'COMPLETED':
+        schedule_receipts([donation.pk])
+
+
+def record_donations_created(donations):
+    """
+    Bump the donation counters for a batch of new, not yet inserted, PENDING
+    donations with one UPDATE, plus one shard UPDATE per sharded campaign.
+    Campaigns that are gone or have reached their goal are skipped; returns
+    the ids of the campaigns that were counted. Call inside the transaction
+    that inserts the batch, after lock_donors.
+    """
+    campaign_ids = {donation.campaign_id for donation in donations}
+    known_donors = set(
+        Donation.objects.filter(
+            campaign_id__in=campaign_ids,
+            donor_id__in={donation.donor_id for donation in donations},
+        ).order_by().values_list('campaign_id', 'donor_id').distinct()
+    )
+    counts, keys = {}, {}
+    for donation in donations:
+        count = counts.setdefault(donation.campaign_id, [0, 0])
+        count[0] += 1
+        pair = (donation.campaign_id, donation.donor_id)
+        if pair not in known_donors:
+            known_donors.add(pair)
+            count[1] += 1
+        keys.setdefault(donation.campaign_id, donation.pk)
+
+    # Sharded campaigns take the batch on a shard still under its budget,
+    # like single donations, without locking the Campaign row
+    counted, unsharded = set(), set(campaign_ids)
+    sharded = Campaign.objects.filter(pk__in=campaign_ids, counter_shards__gt=0).order_by('pk')
+    for campaign_id, shards in sharded.values_list('pk', 'counter_shards'):
+        try:
+            if _update_shards(
+                campaign_id, shards, keys[campaign_id], enforce_goal=True,
+                donation_count=F('donation_count') + counts[campaign_id][0],
+                unique_donor_count=F('unique_donor_count') + counts[campaign_id][1],
+            ):
+                counted.add(campaign_id)
+                unsharded.discard(campaign_id)
+        except GoalReached:
+            unsharded.discard(campaign_id)
+
+    # Lock the open campaigns first so the goal check holds until commit
+    open_ids = list(
+        Campaign.objects.select_for_update().filter(pk__in=unsharded).filter(OPEN_FOR_DONATIONS)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    if not open_ids:
+        return counted
+
+    def by_campaign(position):
+        return Case(
+            *[When(pk=campaign_id, then=Value(counts[campaign_id][position])) for campaign_id in open_ids],
+            output_field=IntegerField(),
+        )
+
+    Campaign.objects.filter(pk__in=open_ids).update(
+        donation_count=F('donation_count') + by_campaign(0),
+        unique_donor_count=F('unique_donor_count') + by_campaign(1),
+        updated_at=Now(),
+    )
+    for campaign_id in open_ids:
+        invalidate_campaign(campaign_id)
+    return counted | set(open_ids)
+
+
+def record_donation_status_change(donation, old_status):
+    """
+    Keep raised_amount and completed_donation_count in step with a status
+    transition. Call inside the transaction that saved the new status.
+    """
+    new_status = donation.status
+    if old_status == new_status:
+        return
+
+    record_transitions([(donation.pk, donation.campaign_id, donation.amount, old_status, new_status)])
+    platform_stats.record_status_changes(donation.pk, [(old_status, new_status)])
+    if new_status == 'COMPLETED':
+        _update_campaign(
+            donation,
+            completed_donation_count=F('completed_donation_count') + 1,
+            raised_amount=F('raised_amount') + donation.amount,
+        )
+        schedule_receipts([donation.pk])
+    elif old_status == 'COMPLETED':
+        _update_campaign(
+            donation,
+            completed_donation_count=F('completed_donation_count') - 1,
+            raised_amount=F('raised_amount') - donation.amount,
+        )
+
+
+def record_completed_deltas(deltas):
+    """
+    Apply {campaign_id: (raised_amount_delta, completed_count_delta)} from a
+    batch of status transitions in one UPDATE, or on one counter shard of a
+    sharded campaign. Call inside the transaction that saved the new statuses.
+    """
+    deltas = dict(deltas)
+    sharded = Campaign.objects.filter(pk__in=deltas, counter_shards__gt=0).order_by('pk')
+    for campaign_id, shards in sharded.values_list('pk', 'counter_shards'):
+        raised_delta, completed_delta = deltas[campaign_id]
+        # Any shard takes a batch delta; a random one spreads concurrent batches
+        if _update_shards(
+            campaign_id, shards, uuid.uuid4(),
+            raised_amount=F('raised_amount') + raised_delta,
+            completed_donation_count=F('completed_donation_count') + completed_delta,
+        ):
+            del deltas[campaign_id]
+    if not deltas:
+        return
+
+    def by_campaign(position, output_field):
+        return Case(
+            *[When(pk=campaign_id, then=Value(delta[position])) for campaign_id, delta in deltas.items()],
+            output_field=output_field,
+        )
+
+    Campaign.objects.filter(pk__in=deltas).update(
+        raised_amount=F('raised_amount') + by_campaign(0, DecimalField(max_digits=12, decimal_places=2)),
+        completed_donation_count=F('completed_donation_count') + by_campaign(1, IntegerField()),
+        updated_at=Now(),
+    )
+    for campaign_id in deltas:
+        invalidate_campaign(campaign_id)
+
+
+def change_donation_status(donation, new_status, transaction_id=None):
+    """
+    Move `donation` to new_status and update the campaign in one transaction.
+    The donation row is locked first, so concurrent requests for the same
+    donation apply their transitions one after the other instead of both
+    counting it.
+    """
+    with transaction.atomic():
+        old_status = Donation.objects.select_for_update().values_list('status', flat=True).get(pk=donation.pk)
+        donation.status = new_status
+        if transaction_id:
+            donation.transaction_id = transaction_id
+        donation.save(update_fields=['status', 'transaction_id', 'updated_at'])
+        record_donation_status_change(donation, old_status)
+
+
+def donation_counter_expressions():
+    """Subquery expressions recomputing each counter from the donations table"""
+    donations = Donation.objects.filter(campaign_id=OuterRef('pk')).order_by().values('campaign_id')
+
+    def counter(aggregate):
+        return Coalesce(
+            Subquery(donations.annotate(value=aggregate).values('value')[:1]),
+            Value(0),
+        )
+
+    return {
+        'donation_count': counter(Count('pk')),
+        'completed_donation_count': counter(Count('pk', filter=Q(status='COMPLETED'))),
+        'unique_donor_count': counter(Count('donor_id', distinct=True)),
+    }
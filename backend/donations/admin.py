@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Donation, DonationReceipt
+
+from core.pagination import ApproximateCountPaginator
+from .models import Donation, DonationLedgerEntry, DonationReceipt
 
 
 @admin.register(Donation)
@@ -8,9 +10,34 @@ class DonationAdmin(admin.ModelAdmin):
     list_filter = ['status', 'payment_method', 'created_at']
     search_fields = ['donor__email', 'campaign__title']
     readonly_fields = ['id', 'created_at', 'updated_at']
+    # Large filtered counts are estimated, and the unfiltered total is not shown
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(DonationReceipt)
 class DonationReceiptAdmin(admin.ModelAdmin):
     list_display = ['id', 'receipt_number', 'donation', 'created_at']
     readonly_fields = ['id', 'created_at']
+
+
+@admin.register(DonationLedgerEntry)
+class DonationLedgerEntryAdmin(admin.ModelAdmin):
+    """Read-only: the ledger is append-only"""
+    # Ids rather than the objects: entries outlive deleted donations and campaigns
+    list_display = ['id', 'created_at', 'event', 'donation_id', 'campaign_id', 'raised_delta']
+    list_filter = ['event', 'created_at']
+    search_fields = ['=donation__id', '=campaign__id']
+    fields = readonly_fields = [
+        'donation_id', 'campaign_id', 'event', 'status', 'amount',
+        'raised_delta', 'completed_delta', 'donation_delta', 'created_at',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
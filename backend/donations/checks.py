@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def intake_buffer_check(app_configs, **kwargs):
+    """
+    The write-behind intake needs Redis: without it donations would be
+    buffered in the web process, where process_donation_intake (a separate
+    process) never sees them, and be lost
+    """
+    if settings.DONATION_INTAKE_BUFFER and not settings.REDIS_URL:
+        return [Error(
+            'DONATION_INTAKE_BUFFER requires REDIS_URL.',
+            hint='Set REDIS_URL, or turn DONATION_INTAKE_BUFFER off to store donations synchronously.',
+            id='donations.E001',
+        )]
+    return []
@@ -0,0 +1,230 @@
+# Write-behind intake for donation spikes.
+#
+# With DONATION_INTAKE_BUFFER on, create_donation validates the request,
+# appends the donation to an intake buffer and answers 202 with a tracking
+# id, which is also the id the donation will be stored under. A consumer
+# (the process_donation_intake command) drains the buffer in batches: one
+# transaction, one bulk_create and one counter UPDATE per batch.
+#
+# The buffer is a Redis stream read through a consumer group when REDIS_URL
+# is set, so entries survive restarts and are only acknowledged once their
+# batch has committed. Turning the intake on without Redis fails the
+# donations.E001 system check; the per-process stand-in below only serves
+# tests, which drain it in the same process.
+import json
+import threading
+import uuid
+from collections import deque
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import platform_stats
+from donations.accounting import lock_donors, record_donations_created
+from donations.ledger import record_created
+from donations.models import Donation
+
+
+STATUS_KEY_PREFIX = 'donations:intake'
+QUEUED, PERSISTED, REJECTED = 'queued', 'persisted', 'rejected'
+DONOR_GONE_ERROR = 'The donor account no longer exists.'
+GOAL_REACHED_ERROR = 'Campaign goal has been reached. No more donations are being accepted for this campaign.'
+
+
+class RedisStreamBuffer:
+    """Intake entries in a Redis stream, consumed through a consumer group"""
+
+    def __init__(self, url, stream, group):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.stream = stream
+        self.group = group
+        self._group_ready = False
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        import redis
+
+        try:
+            self.client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except redis.ResponseError as exc:
+            if 'BUSYGROUP' not in str(exc):
+                raise
+        self._group_ready = True
+
+    def append(self, payload):
+        self.client.xadd(self.stream, {'payload': json.dumps(payload)})
+
+    def read(self, consumer, count, block_ms=0):
+        """
+        Up to `count` (entry_id, payload) pairs: entries another consumer
+        left unacknowledged for DONATION_INTAKE_CLAIM_IDLE_MS first, then new ones
+        """
+        self._ensure_group()
+        _, claimed, *_ = self.client.xautoclaim(
+            self.stream, self.group, consumer, settings.DONATION_INTAKE_CLAIM_IDLE_MS, count=count,
+        )
+        entries = list(claimed)
+        if len(entries) < count:
+            response = self.client.xreadgroup(
+                self.group, consumer, {self.stream: '>'}, count=count - len(entries), block=block_ms or None,
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+        return [
+            (entry_id, json.loads(fields[b'payload']))
+            for entry_id, fields in entries
+            if fields
+        ]
+
+    def ack(self, entry_ids):
+        if entry_ids:
+            self.client.xack(self.stream, self.group, *entry_ids)
+            self.client.xdel(self.stream, *entry_ids)
+
+
+class LocalBuffer:
+    """Per-process stand-in for the Redis stream, for tests"""
+
+    def __init__(self):
+        self.entries = deque()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.next_id = 0
+
+    def append(self, payload):
+        with self.lock:
+            self.next_id += 1
+            self.entries.append((self.next_id, payload))
+
+    def read(self, consumer, count, block_ms=0):
+        with self.lock:
+            batch = [self.entries.popleft() for _ in range(min(count, len(self.entries)))]
+            self.pending.update(batch)
+        return batch
+
+    def ack(self, entry_ids):
+        with self.lock:
+            for entry_id in entry_ids:
+                self.pending.pop(entry_id, None)
+
+    def requeue(self):
+        """Put read but unacknowledged entries back, as a restarted consumer would see them"""
+        with self.lock:
+            self.entries.extendleft(sorted(self.pending.items(), reverse=True))
+            self.pending.clear()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def intake_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            if settings.REDIS_URL:
+                _buffer = RedisStreamBuffer(
+                    settings.REDIS_URL, settings.DONATION_INTAKE_STREAM, settings.DONATION_INTAKE_GROUP,
+                )
+            else:
+                _buffer = LocalBuffer()
+        return _buffer
+
+
+def _status_key(tracking_id):
+    return f'{STATUS_KEY_PREFIX}:{tracking_id}'
+
+
+def enqueue_donation(donor, validated_data):
+    """Buffer a validated donation; returns its tracking id"""
+    tracking_id = uuid.uuid4()
+    cache.set(
+        _status_key(tracking_id),
+        {'status': QUEUED, 'donor_id': str(donor.pk)},
+        settings.DONATION_INTAKE_STATUS_TTL,
+    )
+    intake_buffer().append({
+        'id': str(tracking_id),
+        'donor_id': str(donor.pk),
+        'campaign_id': str(validated_data['campaign'].pk),
+        'amount': str(validated_data['amount']),
+        'payment_method': validated_data.get('payment_method', 'card'),
+        'message': validated_data.get('message'),
+        'is_anonymous': validated_data.get('is_anonymous', False),
+    })
+    return tracking_id
+
+
+def intake_status(tracking_id, donor):
+    """
+    {'status': queued|persisted|rejected, ...} for one of `donor`'s
+    tracking ids, or None when the id is unknown
+    """
+    state = cache.get(_status_key(tracking_id))
+    if state is not None:
+        if state['donor_id'] != str(donor.pk):
+            return None
+        if state['status'] != PERSISTED:
+            return {key: value for key, value in state.items() if key != 'donor_id'}
+    # Persisted donations are looked up directly; their status entry expires
+    if Donation.objects.filter(pk=tracking_id, donor=donor).exists():
+        return {'status': PERSISTED, 'donation_id': str(tracking_id)}
+    return None
+
+
+def _donation(payload):
+    return Donation(
+        id=uuid.UUID(payload['id']),
+        donor_id=uuid.UUID(payload['donor_id']),
+        campaign_id=uuid.UUID(payload['campaign_id']),
+        amount=Decimal(payload['amount']),
+        payment_method=payload['payment_method'],
+        message=payload['message'],
+        is_anonymous=payload['is_anonymous'],
+    )
+
+
+def persist_batch(entries):
+    """
+    Store one batch of buffered donations. Entries already stored (a batch
+    redelivered after a crash between commit and acknowledgement) are
+    skipped. Returns {'persisted': n, 'rejected': n}.
+    """
+    donations = [_donation(payload) for _, payload in entries]
+    with transaction.atomic():
+        stored = set(Donation.objects.filter(pk__in=[donation.pk for donation in donations])
+                     .values_list('pk', flat=True))
+        donors = lock_donors({donation.donor_id for donation in donations})
+        fresh = [donation for donation in donations if donation.pk not in stored]
+        rejected = {donation.pk: DONOR_GONE_ERROR for donation in fresh if donation.donor_id not in donors}
+        fresh = [donation for donation in fresh if donation.pk not in rejected]
+        accepted = record_donations_created(fresh) if fresh else set()
+        persisted = [donation for donation in fresh if donation.campaign_id in accepted]
+        rejected.update({donation.pk: GOAL_REACHED_ERROR for donation in fresh if donation.campaign_id not in accepted})
+        Donation.objects.bulk_create(persisted)
+        record_created(persisted)
+        platform_stats.record_donations_created(persisted)
+
+    donors = {donation.pk: donation.donor_id for donation in donations}
+    cache.set_many({
+        _status_key(donation_id): {'status': REJECTED, 'donor_id': str(donors[donation_id]), 'error': error}
+        for donation_id, error in rejected.items()
+    }, settings.DONATION_INTAKE_STATUS_TTL)
+    cache.delete_many([_status_key(donation.pk) for donation in persisted])
+    return {'persisted': len(persisted), 'rejected': len(rejected)}
+
+
+def drain_intake(consumer='intake-1', batch_size=500, block_ms=0):
+    """Persist and acknowledge one batch from the buffer; returns its counts"""
+    buffer = intake_buffer()
+    entries = buffer.read(consumer, batch_size, block_ms)
+    if not entries:
+        return {'persisted': 0, 'rejected': 0}
+    counts = persist_batch(entries)
+    buffer.ack([entry_id for entry_id, _ in entries])
+    return counts
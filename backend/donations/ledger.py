@@ -0,0 +1,132 @@
+# Append-only ledger of donation events, and campaign balance snapshots.
+#
+# Every path that creates a donation or changes its status writes a
+# DonationLedgerEntry in the same transaction, carrying what the event did
+# to the campaign's counters. take_snapshots() periodically adds each
+# campaign's new entries onto its previous snapshot, so the balance as of
+# any moment is the nearest earlier snapshot plus the few entries after it
+# rather than a scan of every donation.
+#
+# Entries are dated when written, before their transaction commits. A
+# snapshot only covers entries older than LEDGER_SNAPSHOT_LAG seconds, so
+# transactions still open at its cut-off are not left out of it.
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import DateTimeField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from campaigns.models import Campaign
+from donations.models import CampaignBalanceSnapshot, DonationLedgerEntry
+
+
+Balance = namedtuple('Balance', ['raised_amount', 'completed_donation_count', 'donation_count'])
+ZERO_BALANCE = Balance(Decimal('0'), 0, 0)
+# The entry column adding up to each Balance field
+DELTA_FIELDS = ('raised_delta', 'completed_delta', 'donation_delta')
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _entry(donation_id, campaign_id, amount, event, status, old_status=None, created=False):
+    completed = (status == 'COMPLETED') - (old_status == 'COMPLETED')
+    return DonationLedgerEntry(
+        donation_id=donation_id,
+        campaign_id=campaign_id,
+        event=event,
+        status=status,
+        amount=amount,
+        raised_delta=completed * amount,
+        completed_delta=completed,
+        donation_delta=int(created),
+    )
+
+
+def record_created(donations):
+    """
+    Ledger the creation of `donations`. Call in the transaction inserting
+    them; they may be inserted after this, before the commit.
+    """
+    DonationLedgerEntry.objects.bulk_create([
+        _entry(donation.pk, donation.campaign_id, donation.amount, 'CREATED', donation.status, created=True)
+        for donation in donations
+    ])
+
+
+def record_transitions(transitions):
+    """
+    Ledger status changes given as (donation_id, campaign_id, amount,
+    old_status, new_status). Call in the transaction saving the statuses.
+    """
+    DonationLedgerEntry.objects.bulk_create([
+        _entry(donation_id, campaign_id, amount, new_status, new_status, old_status)
+        for donation_id, campaign_id, amount, old_status, new_status in transitions
+        if old_status != new_status
+    ])
+
+
+def _sums(entries):
+    totals = entries.aggregate(*[Sum(field) for field in DELTA_FIELDS])
+    return [totals[f'{field}__sum'] or 0 for field in DELTA_FIELDS]
+
+
+def balance_at(campaign_id, at):
+    """A campaign's Balance counting the ledger entries written before `at`"""
+    snapshot = (
+        CampaignBalanceSnapshot.objects.filter(campaign_id=campaign_id, as_of__lte=at)
+        .order_by('-as_of').values_list('as_of', *Balance._fields).first()
+    )
+    tail = DonationLedgerEntry.objects.filter(campaign_id=campaign_id, created_at__lt=at)
+    base = ZERO_BALANCE
+    if snapshot is not None:
+        as_of, *values = snapshot
+        base = Balance(*values)
+        tail = tail.filter(created_at__gte=as_of)
+    return Balance(*[value + delta for value, delta in zip(base, _sums(tail))])
+
+
+def take_snapshots(as_of=None):
+    """
+    Snapshot, as of `as_of` (default: LEDGER_SNAPSHOT_LAG seconds ago),
+    every campaign with ledger entries since the latest snapshot. Returns
+    how many snapshots were written.
+    """
+    if as_of is None:
+        as_of = timezone.now() - timedelta(seconds=settings.LEDGER_SNAPSHOT_LAG)
+    entries = DonationLedgerEntry.objects.filter(created_at__lt=as_of).order_by()
+    since = CampaignBalanceSnapshot.objects.filter(as_of__lt=as_of).aggregate(latest=Max('as_of'))['latest']
+    active = entries if since is None else entries.filter(created_at__gte=since)
+    # Entries of deleted campaigns stay in the ledger but get no snapshots
+    campaign_ids = list(Campaign.objects.filter(pk__in=active.values('campaign_id')).values_list('pk', flat=True))
+    if not campaign_ids:
+        return 0
+
+    earlier = CampaignBalanceSnapshot.objects.filter(campaign_id__in=campaign_ids, as_of__lt=as_of)
+    bases = {
+        campaign_id: Balance(*values)
+        for campaign_id, *values in earlier.order_by('campaign_id', '-as_of').distinct('campaign_id')
+        .values_list('campaign_id', *Balance._fields)
+    }
+    # Each campaign's entries since its own latest snapshot
+    latest = earlier.filter(campaign_id=OuterRef('campaign_id')).order_by('-as_of').values('as_of')[:1]
+    deltas = {
+        campaign_id: values
+        for campaign_id, *values in entries.filter(campaign_id__in=campaign_ids)
+        .alias(since=Coalesce(Subquery(latest), Value(EPOCH), output_field=DateTimeField()))
+        .filter(created_at__gte=F('since'))
+        .values('campaign_id').annotate(*[Sum(field) for field in DELTA_FIELDS])
+        .values_list('campaign_id', *[f'{field}__sum' for field in DELTA_FIELDS])
+    }
+
+    snapshots = []
+    for campaign_id in campaign_ids:
+        base = bases.get(campaign_id, ZERO_BALANCE)
+        values = [value + delta for value, delta in zip(base, deltas.get(campaign_id, (0, 0, 0)))]
+        snapshots.append(CampaignBalanceSnapshot(
+            campaign_id=campaign_id, as_of=as_of, **dict(zip(Balance._fields, values)),
+        ))
+    # A concurrent run with the same as_of wrote identical rows
+    CampaignBalanceSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    return len(snapshots)
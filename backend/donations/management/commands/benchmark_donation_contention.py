@@ -0,0 +1,103 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+
+from accounts.models import User
+from campaigns.counter_shards import fold_counter_shards, set_counter_shards
+from campaigns.models import Campaign, CampaignCategory
+from donations.accounting import change_donation_status
+from donations.models import Donation
+
+
+def legacy_complete(donation):
+    # The read-modify-write path this benchmark is measured against
+    with transaction.atomic():
+        donation.status = 'COMPLETED'
+        donation.save()
+        campaign = Campaign.objects.get(pk=donation.campaign_id)
+        campaign.raised_amount += donation.amount
+        campaign.save(update_fields=['raised_amount', 'updated_at'])
+
+
+class Command(BaseCommand):
+    help = 'Complete donations to one hot campaign from many threads and check the totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent donation workers')
+        parser.add_argument('--donations', type=int, default=200, help='Donations completed per worker')
+        parser.add_argument('--amount', type=Decimal, default=Decimal('10.00'), help='Amount of every donation')
+        parser.add_argument('--legacy', action='store_true', help='Also run the read-modify-write path')
+        parser.add_argument('--shards', type=int, default=0,
+                            help='Also run the path with this many counter shards')
+
+    def handle(self, *args, **options):
+        # Workers commit on their own connections, so the data is real and
+        # removed again at the end instead of rolled back
+        creator = User.objects.create_user(
+            email='contention-benchmark@fundtracer.local', full_name='Benchmark', phone_number='',
+        )
+        category, _ = CampaignCategory.objects.get_or_create(name='Benchmark')
+        # Receipts for the benchmark's donations would outlive its cleanup
+        receipts_off = override_settings(RECEIPT_DISPATCH='off')
+        receipts_off.enable()
+        try:
+            self.stdout.write(
+                f"{'path':<12}{'donations/s':>14}{'expected':>14}{'raised':>14}{'lost':>8}"
+            )
+            modes = [('atomic', change_donation_status, 0)]
+            if options['shards']:
+                modes.append((f"{options['shards']} shards", change_donation_status, options['shards']))
+            if options['legacy']:
+                modes.append(('legacy', lambda donation, status: legacy_complete(donation), 0))
+            for name, complete, shards in modes:
+                self.run(name, complete, shards, creator, category, options)
+        finally:
+            receipts_off.disable()
+            creator.delete()
+
+    def run(self, name, complete, shards, creator, category, options):
+        threads, per_thread, amount = options['threads'], options['donations'], options['amount']
+        total = threads * per_thread
+        campaign = Campaign.objects.create(
+            title=f'Contention benchmark ({name})', description='Benchmark', campaign_type='INDIVIDUAL',
+            goal_amount=amount * total * 2, category=category, is_active=True,
+            created_by=creator,
+        )
+        if shards:
+            set_counter_shards(campaign.pk, shards)
+            campaign.refresh_from_db()
+        donations = Donation.objects.bulk_create([
+            Donation(donor=creator, campaign=campaign, amount=amount) for _ in range(total)
+        ])
+        batches = [donations[i::threads] for i in range(threads)]
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(batch):
+            try:
+                barrier.wait()
+                for donation in batch:
+                    complete(donation, 'COMPLETED')
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(batch,)) for batch in batches]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        fold_counter_shards(campaign.pk)
+        campaign.refresh_from_db()
+        expected = amount * total
+        lost = (expected - campaign.raised_amount) / amount
+        self.stdout.write(
+            f'{name:<12}{total / elapsed:>14,.0f}{expected:>14}{campaign.raised_amount:>14}{lost:>8.0f}'
+        )
+        campaign.delete()
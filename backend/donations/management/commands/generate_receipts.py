@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from donations.receipts import issue_receipts, pending_receipt_work, render_receipts
+
+
+class Command(BaseCommand):
+    help = 'Issue and render receipts the background pipeline has not finished'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Donations issued per transaction')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running, sweeping every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            issued = rendered = 0
+            while True:
+                donation_ids, receipts = pending_receipt_work(options['batch_size'])
+                if not donation_ids and not receipts:
+                    break
+                issued += len(issue_receipts(donation_ids))
+                render_receipts(receipts)
+                rendered += len(receipts)
+                if len(donation_ids) < options['batch_size'] and len(receipts) < options['batch_size']:
+                    break
+            self.stdout.write(f'Issued {issued} receipts, rendered {rendered} left unrendered')
+            if options['every'] is None:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from donations.tax_statements import FISCAL_YEARS, fiscal_year_label, statements_zip, store_statements
+
+
+class Command(BaseCommand):
+    help = "Render every donor's tax statement for a fiscal year"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=timezone.now().year - 1,
+                            help='Year the fiscal year starts in (default: last year)')
+        parser.add_argument('--zip', dest='zip_path',
+                            help='Write one ZIP archive here instead of storing each statement')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if year not in FISCAL_YEARS:
+            raise CommandError(f'--year must be between {FISCAL_YEARS.start} and {FISCAL_YEARS.stop - 1}')
+        if options['zip_path']:
+            with open(options['zip_path'], 'wb') as archive:
+                for chunk in statements_zip(year):
+                    archive.write(chunk)
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote the {fiscal_year_label(year)} statements to {options['zip_path']}"
+            ))
+            return
+
+        count = store_statements(year)
+        self.stdout.write(self.style.SUCCESS(f'Stored {count} statements for {fiscal_year_label(year)}'))
@@ -0,0 +1,52 @@
+import csv
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from donations.settlements import (
+    DEFAULT_CHUNK_SIZE, SETTLEMENT_FORMATS, ingest_settlements, read_settlements, settlement_format,
+)
+
+
+REPORT_FIELDS = ['line', 'donation_id', 'status', 'previous_status', 'result', 'error']
+
+
+class Command(BaseCommand):
+    help = 'Apply a payment gateway settlement file (CSV or JSON Lines) to donation statuses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Settlement file, or '-' for stdin")
+        parser.add_argument('--format', choices=SETTLEMENT_FORMATS, help='Default: guessed from the file name')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows applied per transaction')
+        parser.add_argument('--report', help='Write the per-row result report (CSV) to this path')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = settlement_format(path, options['format'])
+        if file_format not in SETTLEMENT_FORMATS:
+            raise CommandError(f'Unknown format {file_format}')
+
+        stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        report = open(options['report'], 'w', newline='') if options['report'] else None
+        summary = Counter()
+        try:
+            writer = csv.DictWriter(report, REPORT_FIELDS) if report else None
+            if writer:
+                writer.writeheader()
+            for result in ingest_settlements(read_settlements(stream, file_format), options['chunk_size']):
+                summary[result['result']] += 1
+                if writer:
+                    writer.writerow(result)
+                elif result['result'] == 'error':
+                    self.stderr.write(f"line {result['line']}: {result['error']}")
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+            if report:
+                report.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(summary.values())} rows: {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {summary['error']} errors"
+        ))
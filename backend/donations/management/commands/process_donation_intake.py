@@ -0,0 +1,29 @@
+import socket
+
+from django.core.management.base import BaseCommand
+
+from donations.intake import drain_intake
+
+
+class Command(BaseCommand):
+    help = 'Store donations buffered by the write-behind intake, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Donations stored per transaction')
+        parser.add_argument('--consumer', default=socket.gethostname(),
+                            help='Consumer name within the stream consumer group')
+        parser.add_argument('--block', type=int, default=1000,
+                            help='Milliseconds to wait for new entries when the buffer is empty')
+        parser.add_argument('--once', action='store_true', help='Drain what is buffered now and exit')
+
+    def handle(self, *args, **options):
+        persisted = rejected = 0
+        while True:
+            counts = drain_intake(options['consumer'], options['batch_size'], options['block'])
+            persisted += counts['persisted']
+            rejected += counts['rejected']
+            if any(counts.values()):
+                self.stdout.write(f"Stored {counts['persisted']} donations, rejected {counts['rejected']}")
+            elif options['once']:
+                break
+        self.stdout.write(self.style.SUCCESS(f'{persisted} donations stored, {rejected} rejected'))
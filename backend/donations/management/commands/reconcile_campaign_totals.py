@@ -0,0 +1,55 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from donations.reconciliation import RECONCILED_FIELDS, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute campaign totals from the donations table, report drift and optionally repair it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Set drifted campaigns to the recomputed totals')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Worker processes aggregating donations (0: in this process)')
+        parser.add_argument('--chunks', type=int, default=64, help='Keyset ranges the donations are split into')
+        parser.add_argument('--report', help='Append the drifted campaigns to this CSV file')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running, reconciling every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            drifts = reconcile(options['chunks'], options['workers'], options['repair'])
+            for drift in drifts:
+                changes = ', '.join(
+                    f'{field} {recorded} -> {actual}'
+                    for field, recorded, actual in zip(RECONCILED_FIELDS, drift.recorded, drift.actual)
+                    if recorded != actual
+                )
+                self.stdout.write(f'{drift.campaign_id} {drift.title}: {changes}')
+            if options['report'] and drifts:
+                self.write_report(options['report'], drifts, options['repair'])
+
+            verb = 'Repaired' if options['repair'] else 'Found'
+            self.stdout.write(self.style.SUCCESS(
+                f'{verb} {len(drifts)} drifted campaigns in {time.monotonic() - started:.1f}s'
+            ))
+            if options['every'] is None:
+                break
+            time.sleep(options['every'])
+
+    def write_report(self, path, drifts, repaired):
+        checked_at = timezone.now().isoformat()
+        with open(path, 'a', newline='') as report:
+            writer = csv.writer(report)
+            if report.tell() == 0:
+                writer.writerow([
+                    'checked_at', 'campaign_id', 'title', 'repaired',
+                    *[f'recorded_{field}' for field in RECONCILED_FIELDS],
+                    *[f'actual_{field}' for field in RECONCILED_FIELDS],
+                ])
+            for drift in drifts:
+                writer.writerow([checked_at, drift.campaign_id, drift.title, repaired, *drift.recorded, *drift.actual])
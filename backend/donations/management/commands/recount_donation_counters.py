@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Now
+
+from campaigns.counter_shards import fold_counter_shards
+from campaigns.models import Campaign, CampaignCounterShard
+from donations.accounting import donation_counter_expressions
+
+
+COUNTER_FIELDS = ('donation_count', 'completed_donation_count', 'unique_donor_count')
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the denormalized donation counters on Campaign'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Campaigns checked per query')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        expressions = donation_counter_expressions()
+
+        drift = Q()
+        for field in COUNTER_FIELDS:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+
+        checked = repaired = 0
+        last_pk = None
+        while True:
+            batch = Campaign.objects.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            checked += len(pks)
+
+            # Sharded campaigns hold part of their counters in shard rows
+            for campaign_id in Campaign.objects.filter(pk__in=pks, counter_shards__gt=0).values_list('pk', flat=True):
+                fold_counter_shards(campaign_id)
+
+            drifted = list(
+                Campaign.objects.filter(pk__in=pks)
+                .annotate(**{f'actual_{field}': expressions[field] for field in COUNTER_FIELDS})
+                .filter(drift)
+                .values('pk', 'title', *COUNTER_FIELDS, *[f'actual_{field}' for field in COUNTER_FIELDS])
+            )
+            for row in drifted:
+                changes = ', '.join(
+                    f"{field} {row[field]} -> {row[f'actual_{field}']}"
+                    for field in COUNTER_FIELDS
+                    if row[field] != row[f'actual_{field}']
+                )
+                self.stdout.write(f"{row['pk']} {row['title']}: {changes}")
+
+            if drifted and not dry_run:
+                # Recompute inside the UPDATE so donations written since the
+                # check above are counted as well
+                with transaction.atomic():
+                    drifted_pks = [row['pk'] for row in drifted]
+                    # Shard deltas are part of the recount; clearing them
+                    # also holds off shard updates until the commit
+                    CampaignCounterShard.objects.filter(campaign_id__in=drifted_pks).update(
+                        **{field: 0 for field in COUNTER_FIELDS}
+                    )
+                    repaired += Campaign.objects.filter(
+                        pk__in=drifted_pks
+                    ).update(**expressions, updated_at=Now())
+            elif drifted:
+                repaired += len(drifted)
+
+        verb = 'would repair' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} campaigns, {verb} {repaired}'
+        ))
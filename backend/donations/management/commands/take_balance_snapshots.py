@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from donations.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Snapshot the ledger balance of every campaign with donation events since the last snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running, taking snapshots every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            self.stdout.write(f'Took {take_snapshots()} campaign balance snapshots')
+            if options['every'] is None:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['campaign', 'is_anonymous', 'created_at', 'id'], name='donation_campaign_public_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donor', 'created_at', 'id'], name='donation_donor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['status', 'created_at'], name='donation_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['created_at'], name='donation_pending_created_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_ledger(apps, schema_editor):
+    # Only the current status of existing donations is known: each gets a
+    # CREATED entry at its creation and, unless still pending, an entry for
+    # its status at its last update
+    Donation = apps.get_model('donations', 'Donation')
+    DonationLedgerEntry = apps.get_model('donations', 'DonationLedgerEntry')
+    batch = []
+    donations = Donation.objects.order_by().values_list(
+        'pk', 'campaign_id', 'amount', 'status', 'created_at', 'updated_at',
+    )
+    for donation_id, campaign_id, amount, status, created_at, updated_at in donations.iterator(chunk_size=1000):
+        common = {'donation_id': donation_id, 'campaign_id': campaign_id, 'amount': amount}
+        batch.append(DonationLedgerEntry(
+            event='CREATED', status='PENDING', donation_delta=1, created_at=created_at, **common,
+        ))
+        if status != 'PENDING':
+            completed = int(status == 'COMPLETED')
+            batch.append(DonationLedgerEntry(
+                event=status, status=status, raised_delta=completed * amount, completed_delta=completed,
+                created_at=max(updated_at, created_at), **common,
+            ))
+        if len(batch) >= 1000:
+            DonationLedgerEntry.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        DonationLedgerEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0015_counter_shards'),
+        ('donations', '0003_receipt_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('as_of', models.DateTimeField()),
+                ('raised_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('completed_donation_count', models.IntegerField()),
+                ('donation_count', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='campaigns.campaign')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DonationLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('event', models.CharField(choices=[('CREATED', 'Created'), ('PENDING', 'Reopened'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('REFUNDED', 'Refunded')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('REFUNDED', 'Refunded')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('raised_delta', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('completed_delta', models.SmallIntegerField(default=0)),
+                ('donation_delta', models.SmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='campaigns.campaign')),
+                ('donation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='donations.donation')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['campaign', 'created_at'], name='ledger_campaign_created_idx'), models.Index(fields=['donation', 'id'], name='ledger_donation_idx'), models.Index(fields=['created_at'], name='ledger_created_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='campaignbalancesnapshot',
+            constraint=models.UniqueConstraint(fields=('campaign', 'as_of'), name='balance_snapshot_campaign_as_of_uniq'),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
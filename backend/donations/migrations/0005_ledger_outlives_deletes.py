@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-17 21:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0016_moderation_queue_index'),
+        ('donations', '0004_donation_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='donationledgerentry',
+            name='campaign',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='campaigns.campaign'),
+        ),
+        migrations.AlterField(
+            model_name='donationledgerentry',
+            name='donation',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='donations.donation'),
+        ),
+    ]
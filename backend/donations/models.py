@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
+from django.utils import timezone
 from campaigns.models import Campaign
 
 
@@ -31,6 +33,16 @@ class Donation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # get_campaign_donations: public donations of a campaign, newest first
+            models.Index(fields=['campaign', 'is_anonymous', 'created_at', 'id'], name='donation_campaign_public_idx'),
+            # get_user_donations: a donor's history, newest first
+            models.Index(fields=['donor', 'created_at', 'id'], name='donation_donor_created_idx'),
+            # admin_list_donations filtered by status
+            models.Index(fields=['status', 'created_at'], name='donation_status_created_idx'),
+            # The pending queue is a small slice of the table
+            models.Index(fields=['created_at'], condition=Q(status='PENDING'), name='donation_pending_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.donor.email} - ${self.amount} to {self.campaign.title}"
@@ -47,3 +59,83 @@ class DonationReceipt(models.Model):
     
     def __str__(self):
         return f"Receipt - {self.receipt_number}"
+
+
+class ReceiptSequence(models.Model):
+    """Next receipt number of one numbering series (organisation and year)"""
+    series = models.CharField(max_length=64, primary_key=True)
+    next_number = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.series} - next {self.next_number}"
+
+
+class DonationLedgerEntry(models.Model):
+    """
+    One event in a donation's life, written in the transaction that made it.
+    Rows are only ever inserted; the deltas are what the event did to the
+    campaign's counters.
+    """
+    EVENTS = (
+        ('CREATED', 'Created'),
+        ('PENDING', 'Reopened'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+        ('REFUNDED', 'Refunded'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    # Entries outlive their donation and campaign: deleting either (or the
+    # donor, cascading to the donations) must not rewrite the history
+    donation = models.ForeignKey(
+        Donation, on_delete=models.DO_NOTHING, db_constraint=False, related_name='ledger_entries',
+    )
+    campaign = models.ForeignKey(
+        Campaign, on_delete=models.DO_NOTHING, db_constraint=False, related_name='ledger_entries',
+    )
+
+    event = models.CharField(max_length=20, choices=EVENTS)
+    status = models.CharField(max_length=20, choices=Donation.PAYMENT_STATUS)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    raised_delta = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    completed_delta = models.SmallIntegerField(default=0)
+    donation_delta = models.SmallIntegerField(default=0)
+
+    # Not auto_now_add: the backfill dates entries from the donations
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Balance tails and snapshots: a campaign's entries in a time range
+            models.Index(fields=['campaign', 'created_at'], name='ledger_campaign_created_idx'),
+            # A donation's history
+            models.Index(fields=['donation', 'id'], name='ledger_donation_idx'),
+            # Campaigns with entries since the last snapshot
+            models.Index(fields=['created_at'], name='ledger_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.donation_id} ({self.raised_delta:+})"
+
+
+class CampaignBalanceSnapshot(models.Model):
+    """A campaign's counters summed from every ledger entry before as_of"""
+    id = models.BigAutoField(primary_key=True)
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='balance_snapshots')
+    as_of = models.DateTimeField()
+
+    raised_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    completed_donation_count = models.IntegerField()
+    donation_count = models.IntegerField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'as_of'], name='balance_snapshot_campaign_as_of_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_id} as of {self.as_of}: {self.raised_amount}"
@@ -0,0 +1,63 @@
+# Bulk approval and rejection of donations by the admin API.
+#
+# A batch is moderated in one transaction: one locking SELECT of the
+# donations, one UPDATE moving those that change to the new status, and one
+# UPDATE moving every affected campaign's totals by its grouped delta
+# (donations.accounting.record_completed_deltas). As with single approvals,
+# approved donations are counted past the campaign goal, which was enforced
+# when they were created.
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.functions import Now
+
+from core import platform_stats
+from donations.accounting import record_completed_deltas
+from donations.ledger import record_transitions
+from donations.models import Donation
+from donations.receipts import schedule_receipts
+
+
+MODERATION_STATUSES = {'approve': 'COMPLETED', 'reject': 'FAILED'}
+
+
+def moderate_donations(donation_ids, new_status):
+    """
+    Move the donations to new_status in one transaction. Returns
+    {donation_id: outcome}, outcome being 'updated', 'unchanged' or
+    'not_found'.
+    """
+    outcomes = {donation_id: 'not_found' for donation_id in donation_ids}
+    with transaction.atomic():
+        current = list(
+            Donation.objects.select_for_update().filter(pk__in=outcomes).order_by('pk')
+            .values_list('pk', 'campaign_id', 'amount', 'status')
+        )
+        changes = []
+        for donation_id, campaign_id, amount, old_status in current:
+            outcomes[donation_id] = 'unchanged'
+            if old_status != new_status:
+                changes.append((donation_id, campaign_id, amount, old_status))
+        if not changes:
+            return outcomes
+
+        Donation.objects.filter(pk__in=[change[0] for change in changes]).update(status=new_status, updated_at=Now())
+
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+        for donation_id, campaign_id, amount, old_status in changes:
+            outcomes[donation_id] = 'updated'
+            completed = (new_status == 'COMPLETED') - (old_status == 'COMPLETED')
+            if completed:
+                delta = deltas[campaign_id]
+                delta[0] += completed * amount
+                delta[1] += completed
+        record_completed_deltas({campaign_id: tuple(delta) for campaign_id, delta in deltas.items()})
+        record_transitions(
+            (donation_id, campaign_id, amount, old_status, new_status)
+            for donation_id, campaign_id, amount, old_status in changes
+        )
+        platform_stats.record_status_changes(changes[0][0], [(change[3], new_status) for change in changes])
+        if new_status == 'COMPLETED':
+            schedule_receipts(change[0] for change in changes)
+    return outcomes
@@ -0,0 +1,110 @@
+# Donation receipt and tax statement PDF rendering.
+#
+# Kept free of Django imports: it runs in the render process pool, whose
+# workers are spawned fresh and never set up Django.
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+LINE_HEIGHT = 16
+TABLE_ROWS_PER_PAGE = 30
+
+
+def _text(value):
+    value = str(value).encode('latin-1', 'replace').decode('latin-1')
+    return value.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _heading(fields):
+    return [
+        f'/F2 20 Tf {MARGIN} {PAGE_HEIGHT - MARGIN - 20} Td ({_text(fields["title"])}) Tj',
+        f'/F1 11 Tf 0 -22 Td ({_text(fields["subtitle"])}) Tj',
+        '0 -18 Td',
+    ]
+
+
+def _rows(rows):
+    lines = []
+    for label, value in rows:
+        lines.append(f'/F2 11 Tf 0 -18 Td ({_text(label)}) Tj')
+        lines.append(f'/F1 11 Tf 150 0 Td ({_text(value)}) Tj -150 0 Td')
+    return lines
+
+
+def _table(columns, rows, bold=False):
+    """Rows of cells at the x offsets given by `columns` ([(title, offset)])"""
+    lines = []
+    font = '/F2' if bold else '/F1'
+    for row in rows:
+        lines.append(f'{font} 10 Tf 0 -{LINE_HEIGHT} Td')
+        for (_, offset), cell in zip(columns, row):
+            lines.append(f'{offset} 0 Td ({_text(cell)}) Tj -{offset} 0 Td')
+    return lines
+
+
+def _document(pages):
+    """PDF bytes for `pages`, each a list of text operators inside BT/ET"""
+    page_ids = [6 + 2 * index for index in range(len(pages))]
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            ' '.join(f'{page_id} 0 R' for page_id in page_ids).encode(), len(pages),
+        ),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Font << /F1 3 0 R /F2 4 0 R >> >>',
+    ]
+    for page_id, operators in zip(page_ids, pages):
+        content = '\n'.join(['BT', *operators, 'ET']).encode('latin-1')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources 5 0 R /Contents {page_id + 1} 0 R >>'.encode()
+        )
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b'%010d 00000 n \n' % offset
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def render_receipt(fields):
+    """
+    A one page PDF for `fields`: {'title', 'subtitle', 'rows': [(label,
+    value)], 'footer'}, using the standard Helvetica fonts
+    """
+    page = _heading(fields) + _rows(fields['rows'])
+    page.append(f'/F1 9 Tf 0 -36 Td ({_text(fields["footer"])}) Tj')
+    return _document([page])
+
+
+def render_statement(fields):
+    """
+    A PDF for `fields`: {'title', 'subtitle', 'rows': [(label, value)],
+    'columns': [(title, x offset)], 'table': [cells], 'totals': [cells],
+    'footer'}, the table continuing over as many pages as it needs
+    """
+    table = fields['table']
+    chunks = [
+        table[start:start + TABLE_ROWS_PER_PAGE] for start in range(0, len(table), TABLE_ROWS_PER_PAGE)
+    ] or [[]]
+    header = [title for title, _ in fields['columns']]
+    pages = []
+    for number, chunk in enumerate(chunks, start=1):
+        page = _heading(fields)
+        if number == 1:
+            page += _rows(fields['rows'])
+            page.append('0 -12 Td')
+        page += _table(fields['columns'], [header], bold=True)
+        page += _table(fields['columns'], chunk)
+        if number == len(chunks):
+            page += _table(fields['columns'], [fields['totals']], bold=True)
+            page.append(f'/F1 9 Tf 0 -36 Td ({_text(fields["footer"])}) Tj')
+        page.append(f'/F1 9 Tf 0 -{LINE_HEIGHT} Td (Page {number} of {len(chunks)}) Tj')
+        pages.append(page)
+    return _document(pages)
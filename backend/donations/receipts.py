@@ -0,0 +1,187 @@
+# Receipt pipeline for completed donations.
+#
+# When a donation reaches COMPLETED, schedule_receipts() hands its id to a
+# dispatcher thread once the transaction commits, so the request never waits
+# for a receipt. The dispatcher issues the receipts (numbers and
+# DonationReceipt rows) and renders their PDFs in a process pool, then writes
+# them through the configured file storage. The generate_receipts command
+# sweeps up anything the dispatcher did not finish, e.g. after a restart.
+#
+# Receipt numbers are gap-free within a series, one series per organisation
+# (campaign creator) and year. A series' ReceiptSequence row is advanced in
+# the same transaction that inserts its receipts, so a rollback returns the
+# numbers too. Only receipts of the same series wait on each other's row
+# lock; there is no lock shared by all receipts.
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from donations.models import Donation, DonationReceipt, ReceiptSequence
+from donations.receipt_pdf import render_receipt
+
+
+logger = logging.getLogger(__name__)
+
+STALE_RENDER_SECONDS = 60
+
+_dispatcher = None
+_render_pool = None
+_executors_lock = threading.Lock()
+
+
+def receipt_series(donation, issued_at):
+    return f'{donation.campaign.created_by_id.hex[:8].upper()}-{issued_at.year}'
+
+
+def _allocate(series, count):
+    """First of `count` consecutive numbers of `series`; locks the series row until commit"""
+    advance = ReceiptSequence.objects.filter(series=series)
+    if not advance.update(next_number=F('next_number') + count):
+        ReceiptSequence.objects.get_or_create(series=series)
+        advance.update(next_number=F('next_number') + count)
+    return ReceiptSequence.objects.values_list('next_number', flat=True).get(series=series) - count
+
+
+def issue_receipts(donation_ids):
+    """
+    Create receipts for those of `donation_ids` that are COMPLETED and have
+    none yet, then render them. Returns the new DonationReceipts.
+    """
+    issued_at = timezone.now()
+    with transaction.atomic():
+        # Locking the donations keeps two workers from numbering the same one
+        donations = list(
+            Donation.objects.select_for_update(of=('self',))
+            .filter(pk__in=donation_ids, status='COMPLETED', receipt__isnull=True)
+            .select_related('campaign').order_by('created_at', 'pk')
+        )
+        by_series = defaultdict(list)
+        for donation in donations:
+            by_series[receipt_series(donation, issued_at)].append(donation)
+
+        receipts = []
+        # Series in a fixed order, so concurrent batches lock them alike
+        for series in sorted(by_series):
+            number = _allocate(series, len(by_series[series]))
+            for offset, donation in enumerate(by_series[series]):
+                receipts.append(DonationReceipt(
+                    donation=donation,
+                    receipt_number=f'FT-{series}-{number + offset:06d}',
+                    receipt_pdf='',
+                ))
+        DonationReceipt.objects.bulk_create(receipts)
+
+    render_receipts(receipts)
+    return receipts
+
+
+def _receipt_fields(receipt):
+    donation = receipt.donation
+    campaign = donation.campaign
+    return {
+        'title': 'Donation Receipt',
+        'subtitle': f'Receipt {receipt.receipt_number}',
+        'rows': [
+            ('Date', timezone.localtime(donation.updated_at).strftime('%d %b %Y')),
+            ('Received from', f'{donation.donor.full_name} <{donation.donor.email}>'),
+            ('Amount', f'{donation.amount:,.2f}'),
+            ('Payment method', donation.payment_method),
+            ('Transaction', donation.transaction_id or '-'),
+            ('Campaign', campaign.title),
+            ('Organisation', campaign.created_by.full_name),
+            ('Donation id', str(donation.pk)),
+        ],
+        'footer': 'Thank you for your donation. Please keep this receipt for your records.',
+    }
+
+
+def render_pool():
+    """The process pool PDFs are rendered in (RECEIPT_RENDER_PROCESSES workers)"""
+    global _render_pool
+    with _executors_lock:
+        if _render_pool is None:
+            # Spawned, not forked: the parent has threads and open connections
+            _render_pool = ProcessPoolExecutor(
+                max_workers=settings.RECEIPT_RENDER_PROCESSES, mp_context=get_context('spawn'),
+            )
+        return _render_pool
+
+
+def render_receipts(receipts):
+    """Render and store the PDFs of `receipts` (DonationReceipt instances)"""
+    if not receipts:
+        return
+    receipts = list(
+        DonationReceipt.objects.filter(pk__in=[receipt.pk for receipt in receipts])
+        .select_related('donation__donor', 'donation__campaign__created_by')
+    )
+    fields = [_receipt_fields(receipt) for receipt in receipts]
+    if settings.RECEIPT_RENDER_PROCESSES:
+        pdfs = render_pool().map(render_receipt, fields, chunksize=16)
+    else:
+        pdfs = map(render_receipt, fields)
+
+    for receipt, pdf in zip(receipts, pdfs):
+        receipt.receipt_pdf.save(f'{receipt.receipt_number}.pdf', ContentFile(pdf), save=False)
+    DonationReceipt.objects.bulk_update(receipts, ['receipt_pdf'])
+
+
+def _dispatch(donation_ids):
+    # Nothing waits on the dispatcher's futures, so failures are logged here;
+    # generate_receipts picks the donations up again
+    try:
+        issue_receipts(donation_ids)
+    except Exception:
+        logger.exception('Issuing receipts failed for donations %s', donation_ids)
+    finally:
+        connection.close()
+
+
+def schedule_receipts(donation_ids):
+    """
+    Issue receipts for `donation_ids` once the current transaction commits,
+    as configured by RECEIPT_DISPATCH: 'thread' (background dispatcher),
+    'inline' (in the committing thread) or 'off' (generate_receipts only)
+    """
+    donation_ids = list(donation_ids)
+    mode = settings.RECEIPT_DISPATCH
+    if not donation_ids or mode == 'off':
+        return
+    if mode == 'inline':
+        transaction.on_commit(lambda: issue_receipts(donation_ids))
+        return
+
+    def submit():
+        global _dispatcher
+        with _executors_lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='receipts')
+        _dispatcher.submit(_dispatch, donation_ids)
+
+    transaction.on_commit(submit)
+
+
+def pending_receipt_work(batch_size):
+    """
+    (donation ids, receipts) left behind: COMPLETED donations without a
+    receipt and receipts whose PDF was never stored
+    """
+    donation_ids = list(
+        Donation.objects.filter(status='COMPLETED', receipt__isnull=True)
+        .order_by('created_at').values_list('pk', flat=True)[:batch_size]
+    )
+    # Younger ones may still be rendering in a dispatcher
+    stale = timezone.now() - timedelta(seconds=STALE_RENDER_SECONDS)
+    receipts = list(
+        DonationReceipt.objects.filter(receipt_pdf='', created_at__lt=stale).order_by('created_at')[:batch_size]
+    )
+    return donation_ids, receipts
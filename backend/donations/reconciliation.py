@@ -0,0 +1,150 @@
+# Reconciliation of campaign totals against the donations table.
+#
+# raised_amount, completed_donation_count and donation_count are recomputed
+# in one pass over the donations: the id space is cut into keyset ranges,
+# each aggregated with a single GROUP BY campaign_id query, in parallel
+# worker processes, and the partial sums are added up per campaign. The
+# result is compared with the stored counters (plus any unfolded shard
+# deltas). Campaigns that differ are checked again with an exact aggregate
+# while their row is locked, so donations counted while the pass ran are not
+# reported, and are repaired from that aggregate when asked to.
+import uuid
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from multiprocessing import get_context
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+from campaigns.counter_shards import fold_counter_shards
+from campaigns.list_cache import invalidate_campaign
+from campaigns.models import Campaign, CampaignCounterShard
+from donations.models import Donation
+from donations.reconciliation_worker import chunk_totals, setup
+
+
+RECONCILED_FIELDS = ('raised_amount', 'completed_donation_count', 'donation_count')
+ZERO = (Decimal('0'), 0, 0)
+
+Drift = namedtuple('Drift', ['campaign_id', 'title', 'recorded', 'actual'])
+
+
+def id_ranges(chunks):
+    """[lower, upper) bounds splitting the UUID space into `chunks` even ranges"""
+    bounds = [None] + [uuid.UUID(int=(index << 128) // chunks) for index in range(1, chunks)] + [None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def donation_totals(chunks=64, workers=4):
+    """{campaign_id: (raised_amount, completed_donation_count, donation_count)} from every donation"""
+    ranges = id_ranges(chunks)
+    if workers:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context('spawn'),
+            initializer=setup,
+            initargs=(connection.settings_dict['NAME'],),
+        )
+        with pool:
+            partials = pool.map(chunk_totals, *zip(*ranges))
+            return _merge(partials)
+    return _merge(chunk_totals(lower, upper) for lower, upper in ranges)
+
+
+def _merge(partials):
+    totals = {}
+    for partial in partials:
+        for campaign_id, values in partial.items():
+            current = totals.get(campaign_id, ZERO)
+            totals[campaign_id] = tuple(a + b for a, b in zip(current, values))
+    return totals
+
+
+def recorded_totals(batch_size=5000):
+    """(campaign_id, is_sharded, recorded counters) for every campaign, shard deltas included"""
+    last_pk = None
+    while True:
+        campaigns = Campaign.objects.order_by('pk')
+        if last_pk is not None:
+            campaigns = campaigns.filter(pk__gt=last_pk)
+        rows = list(campaigns.values_list('pk', 'counter_shards', *RECONCILED_FIELDS)[:batch_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+
+        sharded = [campaign_id for campaign_id, shards, *_ in rows if shards]
+        pending = {}
+        if sharded:
+            pending = {
+                campaign_id: deltas
+                for campaign_id, *deltas in CampaignCounterShard.objects.filter(campaign_id__in=sharded)
+                .order_by().values('campaign_id')
+                .annotate(**{f'pending_{field}': Sum(field) for field in RECONCILED_FIELDS})
+                .values_list('campaign_id', *[f'pending_{field}' for field in RECONCILED_FIELDS])
+            }
+        for campaign_id, shards, *recorded in rows:
+            deltas = pending.get(campaign_id, ZERO)
+            yield campaign_id, bool(shards), tuple(value + delta for value, delta in zip(recorded, deltas))
+
+
+def exact_totals(campaign_ids):
+    """The counters of `campaign_ids` recomputed in one grouped query"""
+    completed = Q(status='COMPLETED')
+    rows = Donation.objects.filter(campaign_id__in=campaign_ids).order_by().values('campaign_id').annotate(
+        raised=Coalesce(
+            Sum('amount', filter=completed), Value(0), output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        completed=Count('pk', filter=completed),
+        total=Count('pk'),
+    ).values_list('campaign_id', 'raised', 'completed', 'total')
+    totals = {campaign_id: ZERO for campaign_id in campaign_ids}
+    totals.update({campaign_id: (raised, done, total) for campaign_id, raised, done, total in rows})
+    return totals
+
+
+def _confirm(suspects, repair):
+    """Re-check suspected (campaign_id, is_sharded) under their row locks; repair them if asked"""
+    drifts = []
+    with transaction.atomic():
+        # Locked before aggregating, so a donation committed meanwhile has
+        # already reached the row or waits for the repair to commit
+        locked = list(
+            Campaign.objects.select_for_update().filter(pk__in=[campaign_id for campaign_id, _ in suspects])
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        # Folding keeps the shard rows locked until the commit as well
+        for campaign_id, sharded in suspects:
+            if sharded:
+                fold_counter_shards(campaign_id)
+        actual = exact_totals(locked)
+        rows = Campaign.objects.filter(pk__in=locked).order_by('pk').values_list('pk', 'title', *RECONCILED_FIELDS)
+        for campaign_id, title, *recorded in rows:
+            recorded = tuple(recorded)
+            if recorded == actual[campaign_id]:
+                continue
+            drifts.append(Drift(campaign_id, title, recorded, actual[campaign_id]))
+            if repair:
+                Campaign.objects.filter(pk=campaign_id).update(
+                    **dict(zip(RECONCILED_FIELDS, actual[campaign_id])), updated_at=Now(),
+                )
+                invalidate_campaign(campaign_id)
+    return drifts
+
+
+def reconcile(chunks=64, workers=4, repair=False, batch_size=500):
+    """
+    Campaigns whose counters disagree with their donations, as Drift
+    tuples; with repair=True they are set to the recomputed values
+    """
+    actual = donation_totals(chunks, workers)
+    suspects = [
+        (campaign_id, sharded)
+        for campaign_id, sharded, recorded in recorded_totals()
+        if recorded != actual.get(campaign_id, ZERO)
+    ]
+    drifts = []
+    for start in range(0, len(suspects), batch_size):
+        drifts.extend(_confirm(suspects[start:start + batch_size], repair))
+    return drifts
@@ -0,0 +1,39 @@
+# Work done in reconciliation worker processes.
+#
+# Workers are spawned fresh, so this module must not import models at load
+# time: setup() configures Django first, then chunk_totals imports them.
+import django
+
+
+def setup(database_name):
+    from django.conf import settings
+
+    # The parent's database, which is not the configured one under tests
+    settings.DATABASES['default']['NAME'] = database_name
+    django.setup()
+
+
+def chunk_totals(lower, upper):
+    """
+    {campaign_id: (raised_amount, completed_donation_count, donation_count)}
+    over the donations whose id is in [lower, upper) (None: unbounded)
+    """
+    from django.db.models import Count, DecimalField, Q, Sum, Value
+    from django.db.models.functions import Coalesce
+
+    from donations.models import Donation
+
+    donations = Donation.objects.order_by()
+    if lower is not None:
+        donations = donations.filter(pk__gte=lower)
+    if upper is not None:
+        donations = donations.filter(pk__lt=upper)
+    completed = Q(status='COMPLETED')
+    rows = donations.values('campaign_id').annotate(
+        raised=Coalesce(
+            Sum('amount', filter=completed), Value(0), output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        completed=Count('pk', filter=completed),
+        total=Count('pk'),
+    ).values_list('campaign_id', 'raised', 'completed', 'total')
+    return {campaign_id: (raised, completed, total) for campaign_id, raised, completed, total in rows}
@@ -0,0 +1,176 @@
+# Bulk ingestion of payment gateway settlement files (CSV or JSON Lines).
+#
+# Each row names a donation and the status the gateway settled it at, and
+# optionally its transaction id. Rows are read as a stream and applied in
+# chunks: one transaction, one locking SELECT and one bulk UPDATE of the
+# donations per chunk, then one UPDATE moving every affected campaign's
+# totals by its grouped delta.
+import csv
+import io
+import json
+import uuid
+from collections import Counter, defaultdict, namedtuple
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from core import platform_stats
+from donations.accounting import record_completed_deltas
+from donations.ledger import record_transitions
+from donations.models import Donation
+from donations.receipts import schedule_receipts
+
+
+SETTLEMENT_FORMATS = ('csv', 'jsonl')
+SETTLEMENT_STATUSES = {status for status, _ in Donation.PAYMENT_STATUS}
+DEFAULT_CHUNK_SIZE = 1000
+
+SettlementRow = namedtuple('SettlementRow', ['line', 'donation_id', 'status', 'transaction_id', 'error'])
+
+
+def settlement_format(filename, requested=None):
+    """The format named by the caller, else guessed from the file name"""
+    if requested:
+        return requested.lower()
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def _row(line, record):
+    if not isinstance(record, dict):
+        return SettlementRow(line, None, None, None, 'not an object')
+
+    donation_id = str(record.get('donation_id') or '').strip()
+    new_status = str(record.get('status') or '').strip().upper()
+    transaction_id = str(record.get('transaction_id') or '').strip() or None
+    try:
+        donation_id = uuid.UUID(donation_id)
+    except ValueError:
+        return SettlementRow(line, donation_id or None, new_status or None, transaction_id, 'invalid donation_id')
+    if new_status not in SETTLEMENT_STATUSES:
+        return SettlementRow(line, donation_id, new_status or None, transaction_id, 'invalid status')
+    if transaction_id and len(transaction_id) > Donation._meta.get_field('transaction_id').max_length:
+        return SettlementRow(line, donation_id, new_status, transaction_id, 'transaction_id too long')
+    return SettlementRow(line, donation_id, new_status, transaction_id, None)
+
+
+def read_settlements(stream, file_format):
+    """SettlementRows from a binary file object, read one line at a time"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield _row(reader.line_num, record)
+        return
+
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield SettlementRow(line, None, None, None, 'invalid JSON')
+            continue
+        yield _row(line, record)
+
+
+def _result(row, result, previous_status=None, error=None):
+    outcome = {
+        'line': row.line,
+        'donation_id': str(row.donation_id) if row.donation_id else None,
+        'status': row.status,
+        'previous_status': previous_status,
+        'result': result,
+    }
+    if error:
+        outcome['error'] = error
+    return outcome
+
+
+def _apply_chunk(chunk):
+    results = {}
+    latest = {}
+    for row in chunk:
+        if row.error:
+            results[row.line] = _result(row, 'error', error=row.error)
+            continue
+        if row.donation_id in latest:
+            earlier = latest[row.donation_id]
+            results[earlier.line] = _result(earlier, 'error', error=f'superseded by line {row.line}')
+        latest[row.donation_id] = row
+
+    with transaction.atomic():
+        current = {
+            donation['pk']: donation
+            for donation in Donation.objects.select_for_update().filter(pk__in=latest).order_by('pk')
+            .values('pk', 'status', 'amount', 'campaign_id', 'transaction_id')
+        }
+        # transaction_id is unique: refuse ids another donation already has,
+        # or that several rows of the chunk would give to different donations
+        owners = dict(
+            Donation.objects.filter(
+                transaction_id__in={row.transaction_id for row in latest.values() if row.transaction_id}
+            ).values_list('transaction_id', 'pk')
+        )
+        claimed = Counter(
+            row.transaction_id for donation_id, row in latest.items()
+            if row.transaction_id and owners.get(row.transaction_id) != donation_id
+        )
+
+        now = timezone.now()
+        updates = []
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+        for donation_id, row in latest.items():
+            donation = current.get(donation_id)
+            if donation is None:
+                results[row.line] = _result(row, 'error', error='donation not found')
+                continue
+            transaction_id = row.transaction_id or donation['transaction_id']
+            owner = owners.get(row.transaction_id, donation_id)
+            if row.transaction_id and (owner != donation_id or claimed[row.transaction_id] > 1):
+                results[row.line] = _result(row, 'error', donation['status'], 'transaction_id already in use')
+                continue
+            if row.status == donation['status'] and transaction_id == donation['transaction_id']:
+                results[row.line] = _result(row, 'unchanged', donation['status'])
+                continue
+
+            updates.append(Donation(pk=donation_id, status=row.status, transaction_id=transaction_id, updated_at=now))
+            completed = (row.status == 'COMPLETED') - (donation['status'] == 'COMPLETED')
+            if completed:
+                delta = deltas[donation['campaign_id']]
+                delta[0] += completed * donation['amount']
+                delta[1] += completed
+            results[row.line] = _result(row, 'updated', donation['status'])
+
+        if updates:
+            Donation.objects.bulk_update(updates, ['status', 'transaction_id', 'updated_at'])
+            record_transitions(
+                (donation.pk, current[donation.pk]['campaign_id'], current[donation.pk]['amount'],
+                 current[donation.pk]['status'], donation.status)
+                for donation in updates
+            )
+            platform_stats.record_status_changes(
+                updates[0].pk, [(current[donation.pk]['status'], donation.status) for donation in updates],
+            )
+        record_completed_deltas({campaign_id: tuple(delta) for campaign_id, delta in deltas.items()})
+        schedule_receipts(
+            donation.pk for donation in updates
+            if donation.status == 'COMPLETED' and current[donation.pk]['status'] != 'COMPLETED'
+        )
+
+    return [results[row.line] for row in chunk]
+
+
+def ingest_settlements(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply SettlementRows chunk by chunk, yielding one result per row in
+    input order. Settlements record what the gateway already did; like
+    every completion, they are counted past the campaign goal.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from _apply_chunk(chunk)
@@ -0,0 +1,178 @@
+# Year-end tax statements: one PDF per donor listing their COMPLETED
+# donations of a fiscal year.
+#
+# Statements come from a single pass over the year's donations, ordered by
+# donor and read through a server-side cursor, so only one donor's donations
+# are held at a time. They are rendered in the receipt process pool with a
+# bounded number in flight, and the ZIP archive is written out statement by
+# statement, so memory stays flat however many donors there are.
+import zipfile
+from collections import deque
+from datetime import MAXYEAR, datetime, timedelta
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.utils import timezone
+
+from donations.models import Donation
+from donations.receipt_pdf import render_statement
+from donations.receipts import render_pool
+
+
+STATEMENT_VALUES = (
+    'donor_id', 'donor__full_name', 'donor__email',
+    'id', 'amount', 'created_at', 'campaign__title', 'receipt__receipt_number',
+)
+STATEMENT_COLUMNS = [('Date', 0), ('Campaign', 80), ('Receipt', 290), ('Amount', 420)]
+# Years a fiscal year can start in; its end must still be a datetime
+FISCAL_YEARS = range(1900, MAXYEAR)
+
+
+def fiscal_year_bounds(year):
+    """[start, end) of the fiscal year starting in `year`"""
+    month = settings.FISCAL_YEAR_START_MONTH
+    tz = timezone.get_current_timezone()
+    start = datetime(year, month, 1, tzinfo=tz)
+    end = datetime(year + 1, month, 1, tzinfo=tz)
+    return start, end
+
+
+def fiscal_year_label(year):
+    return str(year) if settings.FISCAL_YEAR_START_MONTH == 1 else f'{year}-{(year + 1) % 100:02d}'
+
+
+def statement_path(donor_id, year):
+    """Where generate_tax_statements stores a donor's statement"""
+    return f'tax_statements/{fiscal_year_label(year)}/{donor_id}.pdf'
+
+
+def stored_statement_is_current(donor_id, year):
+    """
+    Whether a statement is stored for the donor and no donation of theirs
+    that year changed, or got its receipt, since
+    """
+    path = statement_path(donor_id, year)
+    if not default_storage.exists(path):
+        return False
+    start, end = fiscal_year_bounds(year)
+    latest = Donation.objects.filter(
+        donor_id=donor_id, created_at__gte=start, created_at__lt=end,
+    ).aggregate(changed=Max('updated_at'), receipted=Max('receipt__created_at'))
+    stored = default_storage.get_modified_time(path)
+    return all(moment is None or moment < stored for moment in latest.values())
+
+
+def statement_filename(donor_id, year):
+    return f'tax-statement-{fiscal_year_label(year)}-{donor_id}.pdf'
+
+
+def donor_statements(year, donor_ids=None, chunk_size=2000):
+    """(donor, donations) for each donor with COMPLETED donations in fiscal `year`, one donor at a time"""
+    start, end = fiscal_year_bounds(year)
+    donations = Donation.objects.filter(status='COMPLETED', created_at__gte=start, created_at__lt=end)
+    if donor_ids is not None:
+        donations = donations.filter(donor_id__in=donor_ids)
+    rows = donations.order_by('donor_id', 'created_at', 'id').values(*STATEMENT_VALUES).iterator(chunk_size=chunk_size)
+    for donor_id, group in groupby(rows, key=itemgetter('donor_id')):
+        group = list(group)
+        donor = {'id': donor_id, 'full_name': group[0]['donor__full_name'], 'email': group[0]['donor__email']}
+        yield donor, group
+
+
+def statement_fields(donor, donations, year):
+    start, end = fiscal_year_bounds(year)
+    total = sum((donation['amount'] for donation in donations), Decimal('0'))
+    return {
+        'title': 'Donation Tax Statement',
+        'subtitle': f'Fiscal year {fiscal_year_label(year)}',
+        'rows': [
+            ('Donor', donor['full_name']),
+            ('Email', donor['email']),
+            ('Period', f'{start:%d %b %Y} to {end - timedelta(days=1):%d %b %Y}'),
+            ('Total donated', f'{total:,.2f}'),
+        ],
+        'columns': STATEMENT_COLUMNS,
+        'table': [
+            [
+                f"{timezone.localtime(donation['created_at']):%d %b %Y}",
+                donation['campaign__title'][:40],
+                donation['receipt__receipt_number'] or '-',
+                f"{donation['amount']:,.2f}",
+            ]
+            for donation in donations
+        ],
+        'totals': ['', f'{len(donations)} donations', 'Total', f'{total:,.2f}'],
+        'footer': 'Only completed donations are listed. Individual receipts are available for each donation.',
+    }
+
+
+def render_statements(statements, year):
+    """(donor, pdf) for each (donor, donations) of `statements`, in order"""
+    if not settings.RECEIPT_RENDER_PROCESSES:
+        for donor, donations in statements:
+            yield donor, render_statement(statement_fields(donor, donations, year))
+        return
+
+    pool = render_pool()
+    window = settings.RECEIPT_RENDER_PROCESSES * 4
+    in_flight = deque()
+    for donor, donations in statements:
+        in_flight.append((donor, pool.submit(render_statement, statement_fields(donor, donations, year))))
+        if len(in_flight) >= window:
+            donor, future = in_flight.popleft()
+            yield donor, future.result()
+    while in_flight:
+        donor, future = in_flight.popleft()
+        yield donor, future.result()
+
+
+def donor_statement(donor_id, year):
+    """PDF bytes of one donor's statement, or None without COMPLETED donations that year"""
+    for donor, pdf in render_statements(donor_statements(year, donor_ids=[donor_id]), year):
+        return pdf
+    return None
+
+
+def store_statements(year):
+    """Render every donor's statement for `year` into the file storage; returns how many"""
+    count = 0
+    for donor, pdf in render_statements(donor_statements(year), year):
+        path = statement_path(donor['id'], year)
+        default_storage.delete(path)
+        default_storage.save(path, ContentFile(pdf))
+        count += 1
+    return count
+
+
+class _ZipStream:
+    """Write-only file object collecting what zipfile writes until drained"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def statements_zip(year):
+    """The ZIP archive of every donor's statement for `year`, as a stream of byte chunks"""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for donor, pdf in render_statements(donor_statements(year), year):
+            archive.writestr(statement_filename(donor['id'], year), pdf)
+            yield stream.drain()
+    yield stream.drain()
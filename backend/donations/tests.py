@@ -0,0 +1,1137 @@
+import io
+import json
+import threading
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from campaigns.counter_shards import fold_counter_shards, set_counter_shards
+from campaigns.models import Campaign, CampaignCategory, CampaignCounterShard
+from core.models import IdempotencyKey
+from donations import intake
+from donations.accounting import change_donation_status, record_donation_created
+from donations.checks import intake_buffer_check
+from donations.ledger import balance_at, take_snapshots
+from donations.models import CampaignBalanceSnapshot, Donation, DonationLedgerEntry, DonationReceipt
+from donations.receipt_pdf import render_statement
+from donations.receipts import _dispatch, receipt_series
+from donations.reconciliation import RECONCILED_FIELDS, donation_totals, exact_totals, id_ranges, reconcile
+from donations.settlements import ingest_settlements, read_settlements
+from donations.tax_statements import (
+    donor_statements, render_statements, statement_fields, statement_filename, statement_path,
+)
+
+
+def make_campaign(creator, goal_amount):
+    return Campaign.objects.create(
+        title='Clean water', description='Wells for the village', goal_amount=goal_amount,
+        campaign_type='INDIVIDUAL', category=CampaignCategory.objects.get_or_create(name='Water')[0],
+        is_active=True, created_by=creator,
+    )
+
+
+FAST_HASHER = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class DonationAccountingTests(TestCase):
+    """raised_amount is the sum of COMPLETED donations; the goal only refuses new ones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user(
+            email='creator@example.com', password='pass12345', full_name='Creator', phone_number='9000000001',
+        )
+        cls.donor = User.objects.create_user(
+            email='donor@example.com', password='pass12345', full_name='Donor', phone_number='9000000002',
+        )
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', phone_number='9000000003',
+            is_staff=True,
+        )
+        cls.campaign = make_campaign(cls.creator, Decimal('100.00'))
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def donate(self, amount):
+        return self.client_for(self.donor).post(
+            '/api/donations/', {'campaign': str(self.campaign.id), 'amount': amount}, format='json',
+        )
+
+    def set_status(self, donation_id, new_status):
+        return self.client_for(self.donor).put(
+            f'/api/donations/{donation_id}/status/', {'status': new_status}, format='json',
+        )
+
+    def assertTotals(self, raised_amount, completed_donation_count):
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.raised_amount, Decimal(raised_amount))
+        self.assertEqual(self.campaign.completed_donation_count, completed_donation_count)
+
+    def test_donation_counted_once_when_completed(self):
+        donation_id = self.donate('40.00').data['data']['id']
+        self.assertTotals('0.00', 0)
+
+        self.assertEqual(self.set_status(donation_id, 'COMPLETED').status_code, 200)
+        self.assertTotals('40.00', 1)
+
+        # Repeating the transition changes nothing
+        self.assertEqual(self.set_status(donation_id, 'COMPLETED').status_code, 200)
+        self.assertTotals('40.00', 1)
+
+    def test_refund_is_subtracted(self):
+        donation_id = self.donate('40.00').data['data']['id']
+        self.set_status(donation_id, 'COMPLETED')
+        self.set_status(donation_id, 'REFUNDED')
+        self.assertTotals('0.00', 0)
+
+    def test_goal_reached_blocks_new_donations(self):
+        Campaign.objects.filter(pk=self.campaign.pk).update(raised_amount=Decimal('100.00'))
+        response = self.donate('10.00')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Donation.objects.filter(campaign=self.campaign).exists())
+
+    def test_completion_past_the_goal_is_counted(self):
+        first, second, third = (self.donate('60.00').data['data']['id'] for _ in range(3))
+        self.set_status(first, 'COMPLETED')
+        self.set_status(second, 'COMPLETED')
+        self.assertTotals('120.00', 2)
+
+        # The payment was captured; only new donations are refused now
+        response = self.set_status(third, 'COMPLETED')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Donation.objects.get(pk=third).status, 'COMPLETED')
+        self.assertTotals('180.00', 3)
+        self.assertEqual(self.donate('10.00').status_code, 403)
+
+    def assertCounters(self, donation_count, unique_donor_count, completed_donation_count):
+        self.campaign.refresh_from_db()
+        self.assertEqual(
+            (self.campaign.donation_count, self.campaign.unique_donor_count, self.campaign.completed_donation_count),
+            (donation_count, unique_donor_count, completed_donation_count),
+        )
+
+    def test_donation_and_donor_counters(self):
+        first = self.donate('10.00').data['data']['id']
+        self.donate('15.00')
+        self.assertCounters(2, 1, 0)
+
+        self.client_for(self.admin).post(
+            '/api/donations/', {'campaign': str(self.campaign.id), 'amount': '5.00'}, format='json',
+        )
+        self.set_status(first, 'COMPLETED')
+        self.assertCounters(3, 2, 1)
+
+    def test_recount_repairs_drifted_counters(self):
+        donation_id = self.donate('10.00').data['data']['id']
+        self.donate('15.00')
+        self.set_status(donation_id, 'COMPLETED')
+        self.assertCounters(2, 1, 1)
+        Campaign.objects.filter(pk=self.campaign.pk).update(
+            donation_count=7, unique_donor_count=0, completed_donation_count=1,
+        )
+
+        out = io.StringIO()
+        call_command('recount_donation_counters', '--dry-run', stdout=out)
+        self.assertIn('donation_count 7 -> 2, unique_donor_count 0 -> 1', out.getvalue())
+        self.assertIn('would repair 1', out.getvalue())
+        self.assertCounters(7, 0, 1)
+
+        out = io.StringIO()
+        call_command('recount_donation_counters', stdout=out)
+        self.assertIn('repaired 1', out.getvalue())
+        self.assertCounters(2, 1, 1)
+
+    def test_admin_approve_and_reject_adjust_totals(self):
+        donation_id = self.donate('25.00').data['data']['id']
+        admin = self.client_for(self.admin)
+
+        self.assertEqual(admin.put(f'/api/admin/donations/{donation_id}/approve/').status_code, 200)
+        self.assertTotals('25.00', 1)
+
+        self.assertEqual(admin.put(f'/api/admin/donations/{donation_id}/reject/').status_code, 200)
+        self.assertTotals('0.00', 0)
+
+
+class ShardedCounterTests(DonationAccountingTests):
+    """The same bookkeeping with the campaign's counters spread over shard rows"""
+
+    SHARDS = 4
+
+    def setUp(self):
+        cache.clear()
+        set_counter_shards(self.campaign.pk, self.SHARDS)
+        self.campaign.refresh_from_db()
+
+    def assertTotals(self, raised_amount, completed_donation_count):
+        fold_counter_shards(self.campaign.pk)
+        super().assertTotals(raised_amount, completed_donation_count)
+
+    def test_donations_update_shards_not_the_campaign_row(self):
+        donation_id = self.donate('40.00').data['data']['id']
+        self.set_status(donation_id, 'COMPLETED')
+
+        campaign = Campaign.objects.get(pk=self.campaign.pk)
+        self.assertEqual((campaign.raised_amount, campaign.donation_count), (Decimal('0.00'), 0))
+        shards = CampaignCounterShard.objects.filter(campaign=self.campaign)
+        self.assertEqual(sum(shard.raised_amount for shard in shards), Decimal('40.00'))
+
+        # Reads add the shards to the folded totals
+        data = APIClient().get(f'/api/campaigns/{self.campaign.pk}/').data['data']
+        self.assertEqual((data['raised_amount'], data['donation_count']), ('40.00', 1))
+        stats = APIClient().get(f'/api/campaigns/{self.campaign.pk}/stats/').data['data']
+        self.assertEqual(stats['raised_amount'], 40.0)
+
+        self.assertTotals('40.00', 1)
+        self.assertFalse(CampaignCounterShard.objects.filter(campaign=self.campaign, raised_amount__gt=0).exists())
+
+    def test_batch_transitions_update_shards(self):
+        first, second, third = (self.donate('20.00').data['data']['id'] for _ in range(3))
+        response = self.client_for(self.admin).post(
+            '/api/admin/donations/bulk/approve/', {'ids': [first, second, third]}, format='json',
+        )
+        self.assertEqual(response.json()['data']['summary'], {'updated': 3})
+        settlement = f'donation_id,status\n{second},REFUNDED\n'
+        list(ingest_settlements(read_settlements(io.BytesIO(settlement.encode()), 'csv')))
+
+        self.assertEqual(Campaign.objects.get(pk=self.campaign.pk).raised_amount, Decimal('0.00'))
+        shards = CampaignCounterShard.objects.filter(campaign=self.campaign)
+        self.assertEqual(sum(shard.raised_amount for shard in shards), Decimal('40.00'))
+        self.assertTotals('40.00', 2)
+
+    def test_completion_past_the_goal_is_counted(self):
+        donation_ids = [self.donate('10.00').data['data']['id'] for _ in range(20)]
+        statuses = [self.set_status(donation_id, 'COMPLETED').status_code for donation_id in donation_ids]
+
+        self.assertEqual(set(statuses), {200})
+        fold_counter_shards(self.campaign.pk)
+        self.assertTotals('200.00', 20)
+        # Folding leaves no shard any budget, so new donations are refused
+        self.assertEqual(self.donate('10.00').status_code, 403)
+
+    def assertCounters(self, donation_count, unique_donor_count, completed_donation_count):
+        fold_counter_shards(self.campaign.pk)
+        super().assertCounters(donation_count, unique_donor_count, completed_donation_count)
+
+    def test_turning_sharding_off_keeps_totals(self):
+        donation_id = self.donate('40.00').data['data']['id']
+        self.set_status(donation_id, 'COMPLETED')
+        set_counter_shards(self.campaign.pk, 0)
+
+        self.assertFalse(CampaignCounterShard.objects.filter(campaign=self.campaign).exists())
+        self.assertTotals('40.00', 1)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class IdempotencyKeyTests(TestCase):
+    """Retries carrying the same Idempotency-Key replay the first response"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.donor = User.objects.create_user(
+            email='donor@example.com', password='pass12345', full_name='Donor', phone_number='9000000002',
+        )
+        cls.campaign = make_campaign(cls.donor, Decimal('1000.00'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+
+    def donate(self, key, amount='25.00'):
+        return self.client.post(
+            '/api/donations/', {'campaign': str(self.campaign.id), 'amount': amount},
+            format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.donate('retry-1')
+        retry = self.donate('retry-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Donation.objects.filter(campaign=self.campaign).count(), 1)
+        self.assertEqual(Campaign.objects.get(pk=self.campaign.pk).donation_count, 1)
+
+    def test_status_update_retry_is_replayed(self):
+        donation_id = self.donate('create-1').json()['data']['id']
+        url = f'/api/donations/{donation_id}/status/'
+        for _ in range(2):
+            response = self.client.put(url, {'status': 'COMPLETED'}, format='json', HTTP_IDEMPOTENCY_KEY='complete-1')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Campaign.objects.get(pk=self.campaign.pk).raised_amount, Decimal('25.00'))
+
+    def test_key_reused_for_a_different_request(self):
+        self.donate('reused-1')
+        response = self.donate('reused-1', amount='99.00')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Donation.objects.filter(campaign=self.campaign).count(), 1)
+
+    def test_expired_key_runs_the_request_again(self):
+        self.donate('expired-1')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.donate('expired-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(Donation.objects.filter(campaign=self.campaign).count(), 2)
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        for _ in range(2):
+            self.client.post('/api/donations/', {'campaign': str(self.campaign.id), 'amount': '25.00'}, format='json')
+        self.assertEqual(Donation.objects.filter(campaign=self.campaign).count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER)
+class SettlementIngestionTests(TestCase):
+    """Settlement files move donation statuses and campaign totals in chunks"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.donor = User.objects.create_user(
+            email='donor@example.com', password='pass12345', full_name='Donor', phone_number='9000000002',
+        )
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', phone_number='9000000003',
+            is_staff=True,
+        )
+        cls.campaign = make_campaign(cls.donor, Decimal('100.00'))
+        cls.other_campaign = make_campaign(cls.donor, Decimal('100.00'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+        self.donations = Donation.objects.bulk_create([
+            Donation(donor=self.donor, campaign=campaign, amount=amount)
+            for campaign, amount in [
+                (self.campaign, Decimal('10.00')),
+                (self.campaign, Decimal('20.00')),
+                (self.other_campaign, Decimal('30.00')),
+            ]
+        ])
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            '/api/admin/settlements/', {'file': SimpleUploadedFile(name, content.encode()), **data},
+            format='multipart',
+        )
+
+    def totals(self, campaign):
+        campaign.refresh_from_db()
+        return campaign.raised_amount, campaign.completed_donation_count
+
+    def test_csv_settlement_updates_statuses_and_totals(self):
+        first, second, third = self.donations
+        response = self.upload('settlement.csv', (
+            'donation_id,status,transaction_id\n'
+            f'{first.id},completed,gw-1\n'
+            f'{second.id},FAILED,\n'
+            f'{third.id},COMPLETED,gw-3\n'
+        ))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual((data['rows'], data['updated'], data['errors']), (3, 3, 0))
+        self.assertEqual([result['line'] for result in data['results']], [2, 3, 4])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.transaction_id), ('COMPLETED', 'gw-1'))
+        self.assertEqual(self.totals(self.campaign), (Decimal('10.00'), 1))
+        self.assertEqual(self.totals(self.other_campaign), (Decimal('30.00'), 1))
+
+    def test_jsonl_settlement_and_refund(self):
+        first = self.donations[0]
+        lines = [
+            json.dumps({'donation_id': str(first.id), 'status': 'COMPLETED'}),
+            '',
+            json.dumps({'donation_id': str(first.id), 'status': 'REFUNDED'}),
+        ]
+        response = self.upload('settlement.jsonl', '\n'.join(lines))
+
+        results = response.json()['data']['results']
+        self.assertEqual([result['result'] for result in results], ['error', 'updated'])
+        self.assertEqual(results[0]['error'], 'superseded by line 3')
+        self.assertEqual(self.totals(self.campaign), (Decimal('0.00'), 0))
+
+        # Rows of later chunks see what earlier chunks applied
+        rows = read_settlements(io.BytesIO('\n'.join(lines).encode()), 'jsonl')
+        results = list(ingest_settlements(rows, chunk_size=1))
+        self.assertEqual([result['result'] for result in results], ['updated', 'updated'])
+        self.assertEqual(results[1]['previous_status'], 'COMPLETED')
+        self.assertEqual(self.totals(self.campaign), (Decimal('0.00'), 0))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        first, second, _ = self.donations
+        Donation.objects.filter(pk=second.pk).update(transaction_id='gw-taken')
+        response = self.upload('settlement.csv', (
+            'donation_id,status,transaction_id\n'
+            'not-a-uuid,COMPLETED,\n'
+            f'{first.id},SETTLED,\n'
+            f'{uuid.uuid4()},COMPLETED,\n'
+            f'{first.id},COMPLETED,gw-taken\n'
+            f'{second.id},PENDING,gw-taken\n'
+        ))
+
+        errors = [result.get('error') for result in response.json()['data']['results']]
+        self.assertEqual(errors, [
+            'invalid donation_id', 'invalid status', 'donation not found', 'transaction_id already in use', None,
+        ])
+        self.assertEqual(response.json()['data']['unchanged'], 1)
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'PENDING')
+        self.assertEqual(self.totals(self.campaign), (Decimal('0.00'), 0))
+
+    def test_admin_only_and_format_checked(self):
+        self.assertEqual(self.upload('settlement.xml', '', format='xml').status_code, 400)
+        self.assertEqual(self.client.post('/api/admin/settlements/', {}, format='multipart').status_code, 400)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+        self.assertEqual(self.upload('settlement.csv', 'donation_id,status\n').status_code, 403)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, RECEIPT_DISPATCH='off')
+class BulkModerationTests(TestCase):
+    """Bulk approvals and rejections move many donations and their campaigns' totals at once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.donor = User.objects.create_user(
+            email='donor@example.com', password='pass12345', full_name='Donor', phone_number='9000000002',
+        )
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', phone_number='9000000003',
+            is_staff=True,
+        )
+        cls.campaign = make_campaign(cls.donor, Decimal('25.00'))
+        cls.other_campaign = make_campaign(cls.donor, Decimal('100.00'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+        now = timezone.now()
+        self.donations = Donation.objects.bulk_create([
+            Donation(donor=self.donor, campaign=campaign, amount=amount, created_at=now + timedelta(seconds=offset))
+            for offset, (campaign, amount) in enumerate([
+                (self.campaign, Decimal('10.00')),
+                (self.campaign, Decimal('20.00')),
+                (self.campaign, Decimal('5.00')),
+                (self.other_campaign, Decimal('30.00')),
+            ])
+        ])
+
+    def moderate(self, action, **body):
+        return self.client.post(f'/api/admin/donations/bulk/{action}/', body, format='json')
+
+    def totals(self, campaign):
+        campaign.refresh_from_db()
+        return campaign.raised_amount, campaign.completed_donation_count
+
+    def test_approval_counts_donations_past_the_goal(self):
+        first, second, third, fourth = self.donations
+        missing = uuid.uuid4()
+        ids = [third.id, first.id, second.id, fourth.id, missing]
+        response = self.moderate('approve', ids=[str(donation_id) for donation_id in ids])
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        # 10 + 20 reach the goal of 25; the 5 was accepted before and still counts
+        self.assertEqual(data['results'], {
+            str(first.id): 'updated', str(second.id): 'updated', str(third.id): 'updated',
+            str(fourth.id): 'updated', str(missing): 'not_found',
+        })
+        self.assertEqual(data['summary'], {'updated': 4, 'not_found': 1})
+        self.assertFalse(data['more'])
+        self.assertEqual(self.totals(self.campaign), (Decimal('35.00'), 3))
+        self.assertEqual(self.totals(self.other_campaign), (Decimal('30.00'), 1))
+        third.refresh_from_db()
+        self.assertEqual(third.status, 'COMPLETED')
+        self.assertEqual(DonationLedgerEntry.objects.filter(event='COMPLETED').count(), 4)
+
+        again = self.moderate('approve', ids=[str(first.id)]).json()['data']
+        self.assertEqual(again['results'], {str(first.id): 'unchanged'})
+        self.assertEqual(self.totals(self.campaign), (Decimal('35.00'), 3))
+
+    def test_rejection_by_filter_reverses_completed_donations(self):
+        first, second, _, fourth = self.donations
+        change_donation_status(first, 'COMPLETED')
+        change_donation_status(fourth, 'COMPLETED')
+
+        data = self.moderate('reject', filter={'campaign_id': str(self.campaign.id)}).json()['data']
+
+        self.assertEqual(data['summary'], {'updated': 3})
+        statuses = Donation.objects.filter(campaign=self.campaign).values_list('status', flat=True)
+        self.assertEqual(set(statuses), {'FAILED'})
+        self.assertEqual(self.totals(self.campaign), (Decimal('0.00'), 0))
+        self.assertEqual(self.totals(self.other_campaign), (Decimal('30.00'), 1))
+
+    @override_settings(BULK_MODERATION_LIMIT=3)
+    def test_filter_takes_a_limited_batch(self):
+        data = self.moderate('reject', filter={'status': 'PENDING'}).json()['data']
+        self.assertEqual((data['summary'], data['more']), ({'updated': 3}, True))
+        data = self.moderate('reject', filter={'status': 'PENDING'}).json()['data']
+        self.assertEqual((data['summary'], data['more']), ({'updated': 1}, False))
+        self.assertEqual(self.moderate('reject', ids=[str(uuid.uuid4()) for _ in range(4)]).status_code, 400)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.moderate('approve').status_code, 400)
+        self.assertEqual(self.moderate('approve', ids=['not-a-uuid']).status_code, 400)
+        self.assertEqual(self.moderate('approve', ids=[str(self.donations[0].id)], filter={}).status_code, 400)
+        self.assertEqual(self.moderate('approve', filter={}).status_code, 400)
+        # Filters the list filter would ignore must not select every donation
+        for bad_filter in ({'stauts': 'PENDING'}, {'campaign': str(self.campaign.id)}, {'status': True}):
+            with self.subTest(filter=bad_filter):
+                self.assertEqual(self.moderate('reject', filter=bad_filter).status_code, 400)
+        self.assertFalse(Donation.objects.exclude(status='PENDING').exists())
+        self.assertEqual(self.moderate('refund', ids=[str(self.donations[0].id)]).status_code, 404)
+        donor = APIClient()
+        donor.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+        response = donor.post('/api/admin/donations/bulk/approve/', {'ids': []}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, DONATION_INTAKE_BUFFER=True, REDIS_URL=None)
+class DonationIntakeTests(TestCase):
+    """Buffered donations answer 202 and are stored in batches by the consumer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.donor = User.objects.create_user(
+            email='donor@example.com', password='pass12345', full_name='Donor', phone_number='9000000002',
+        )
+        cls.other_donor = User.objects.create_user(
+            email='other@example.com', password='pass12345', full_name='Other', phone_number='9000000004',
+        )
+        cls.campaign = make_campaign(cls.donor, Decimal('100.00'))
+
+    def setUp(self):
+        intake._buffer = intake.LocalBuffer()
+        self.addCleanup(setattr, intake, '_buffer', None)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+
+    def donate(self, amount='25.00', client=None):
+        return (client or self.client).post(
+            '/api/donations/', {'campaign': str(self.campaign.id), 'amount': amount}, format='json',
+        )
+
+    def poll(self, tracking_id, client=None):
+        return (client or self.client).get(f'/api/donations/intake/{tracking_id}/')
+
+    def test_donation_is_stored_by_the_consumer(self):
+        response = self.donate()
+        self.assertEqual(response.status_code, 202)
+        tracking_id = response.json()['data']['tracking_id']
+        self.assertFalse(Donation.objects.exists())
+        self.assertEqual(self.poll(tracking_id).json()['data']['status'], 'queued')
+
+        other = APIClient()
+        other.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.other_donor).access_token}')
+        self.donate('5.00', client=other)
+        self.donate('10.00')
+        self.assertEqual(self.poll(tracking_id, client=other).status_code, 404)
+
+        # Savepoint, 10 reads and writes for the whole batch, release
+        with self.assertNumQueries(12):
+            self.assertEqual(intake.drain_intake(), {'persisted': 3, 'rejected': 0})
+
+        data = self.poll(tracking_id).json()['data']
+        self.assertEqual(data, {'tracking_id': tracking_id, 'status': 'persisted', 'donation_id': tracking_id})
+        donation = Donation.objects.get(pk=tracking_id)
+        self.assertEqual((donation.donor, donation.amount, donation.status), (self.donor, Decimal('25.00'), 'PENDING'))
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.donation_count, self.campaign.unique_donor_count), (3, 2))
+
+    def test_redelivered_batch_is_stored_once(self):
+        self.donate()
+        buffer = intake.intake_buffer()
+        intake.persist_batch(buffer.read('intake-1', 10))
+        # The consumer died before acknowledging the batch
+        buffer.requeue()
+        self.assertEqual(intake.drain_intake(), {'persisted': 0, 'rejected': 0})
+        self.assertEqual(Campaign.objects.get(pk=self.campaign.pk).donation_count, 1)
+        self.assertFalse(buffer.pending)
+
+    def test_donation_rejected_when_goal_reached_before_the_batch(self):
+        tracking_id = self.donate().json()['data']['tracking_id']
+        Campaign.objects.filter(pk=self.campaign.pk).update(raised_amount=Decimal('100.00'))
+
+        self.assertEqual(intake.drain_intake(), {'persisted': 0, 'rejected': 1})
+        data = self.poll(tracking_id).json()['data']
+        self.assertEqual(data['status'], 'rejected')
+        self.assertIn('goal has been reached', data['error'])
+        self.assertFalse(Donation.objects.exists())
+
+    def test_sharded_campaign_counts_the_batch_on_a_shard(self):
+        set_counter_shards(self.campaign.pk, 4)
+        self.donate()
+        self.donate('10.00')
+        self.assertEqual(intake.drain_intake(), {'persisted': 2, 'rejected': 0})
+        self.assertEqual(Campaign.objects.get(pk=self.campaign.pk).donation_count, 0)
+        shards = CampaignCounterShard.objects.filter(campaign=self.campaign)
+        self.assertEqual(
+            (sum(shard.donation_count for shard in shards), sum(shard.unique_donor_count for shard in shards)), (2, 1),
+        )
+
+        # Every shard has raised its share of the goal
+        shards.update(raised_amount=F('budget'))
+        self.donate()
+        self.assertEqual(intake.drain_intake(), {'persisted': 0, 'rejected': 1})
+
+    def test_invalid_donation_is_not_buffered(self):
+        self.assertEqual(self.donate(amount='abc').status_code, 400)
+        self.assertEqual(self.poll(uuid.uuid4()).status_code, 404)
+        self.assertEqual(self.poll('not-a-uuid').status_code, 404)
+        self.assertFalse(intake.intake_buffer().entries)
+
+    def test_intake_without_redis_fails_the_system_check(self):
+        self.assertEqual([error.id for error in intake_buffer_check(None)], ['donations.E001'])
+        with self.settings(REDIS_URL='redis://localhost:6379/0'):
+            self.assertEqual(intake_buffer_check(None), [])
+
+
+@override_settings(
+    PASSWORD_HASHERS=FAST_HASHER,
+    RECEIPT_DISPATCH='inline',
+    RECEIPT_RENDER_PROCESSES=0,
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+)
+class ReceiptPipelineTests(TestCase):
+    """Completed donations get gap-free numbered PDF receipts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user(
+            email='creator@example.com', password='pass12345', full_name='Creator', phone_number='9000000001',
+        )
+        cls.other_creator = User.objects.create_user(
+            email='creator2@example.com', password='pass12345', full_name='Creator Two', phone_number='9000000005',
+        )
+        cls.donor = User.objects.create_user(
+            email='donor@example.com', password='pass12345', full_name='Donor', phone_number='9000000002',
+        )
+        cls.campaigns = [
+            make_campaign(cls.creator, Decimal('1000.00')),
+            make_campaign(cls.creator, Decimal('1000.00')),
+            make_campaign(cls.other_creator, Decimal('1000.00')),
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.donor).access_token}')
+        self.donations = Donation.objects.bulk_create([
+            Donation(donor=self.donor, campaign=campaign, amount=Decimal('15.00')) for campaign in self.campaigns
+        ])
+
+    def complete(self, donation):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f'/api/donations/{donation.id}/status/', {'status': 'COMPLETED'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_receipt_issued_and_downloaded(self):
+        donation = self.donations[0]
+        self.assertEqual(self.client.get(f'/api/donations/{donation.id}/receipt/').status_code, 404)
+        self.complete(donation)
+
+        receipt = DonationReceipt.objects.get(donation=donation)
+        self.assertEqual(receipt.receipt_number, f'FT-{receipt_series(donation, timezone.now())}-000001')
+        response = self.client.get(f'/api/donations/{donation.id}/receipt/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn(f'{receipt.receipt_number}.pdf', response['Content-Disposition'])
+        pdf = b''.join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF-1.4'))
+        self.assertIn(receipt.receipt_number.encode(), pdf)
+
+        stranger = APIClient()
+        stranger.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.creator).access_token}')
+        self.assertEqual(stranger.get(f'/api/donations/{donation.id}/receipt/').status_code, 403)
+
+    def test_numbers_are_consecutive_per_organisation(self):
+        for donation in self.donations:
+            self.complete(donation)
+        # Completing again (e.g. after a refund) keeps the first receipt
+        Donation.objects.filter(pk=self.donations[0].pk).update(status='REFUNDED')
+        self.complete(self.donations[0])
+
+        numbers = [DonationReceipt.objects.get(donation=donation).receipt_number for donation in self.donations]
+        self.assertEqual([number[-6:] for number in numbers], ['000001', '000002', '000001'])
+        self.assertEqual(numbers[0][:-6], numbers[1][:-6])
+        self.assertNotEqual(numbers[0][:-6], numbers[2][:-6])
+        self.assertEqual(DonationReceipt.objects.count(), 3)
+
+    def test_sweeper_issues_what_the_pipeline_missed(self):
+        with override_settings(RECEIPT_DISPATCH='off'):
+            self.complete(self.donations[0])
+        settlement = 'donation_id,status\n' + ''.join(f'{donation.id},COMPLETED\n' for donation in self.donations[1:])
+        with override_settings(RECEIPT_DISPATCH='off'):
+            list(ingest_settlements(read_settlements(io.BytesIO(settlement.encode()), 'csv')))
+        self.assertFalse(DonationReceipt.objects.exists())
+
+        call_command('generate_receipts', stdout=io.StringIO())
+        receipts = DonationReceipt.objects.all()
+        self.assertEqual(len(receipts), 3)
+        self.assertTrue(all(receipt.receipt_pdf for receipt in receipts))
+
+    def test_settlement_completions_are_receipted(self):
+        settlement = 'donation_id,status\n' + ''.join(f'{donation.id},COMPLETED\n' for donation in self.donations)
+        with self.captureOnCommitCallbacks(execute=True):
+            list(ingest_settlements(read_settlements(io.BytesIO(settlement.encode()), 'csv')))
+        self.assertEqual(DonationReceipt.objects.filter(donation__in=self.donations).count(), 3)
+
+
+class ReceiptDispatchTests(TransactionTestCase):
+    """The background dispatcher outside a test transaction"""
+
+    def test_failures_are_logged(self):
+        with self.assertLogs('donations.receipts', 'ERROR') as logs:
+            _dispatch(['not-a-donation-id'])
+        self.assertIn('Issuing receipts failed', logs.output[0])
+        self.assertIn('Traceback', logs.output[0])
+
+
+@override_settings(
+    PASSWORD_HASHERS=FAST_HASHER,
+    RECEIPT_RENDER_PROCESSES=0,
+    FISCAL_YEAR_START_MONTH=4,
+    DEFAULT_FILE_STORAGE='django.core.files.storage.InMemoryStorage',
+)
+class TaxStatementTests(TestCase):
+    """One statement per donor and fiscal year, from one pass over the donations"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user(
+            email='creator@example.com', password='pass12345', full_name='Creator', phone_number='9000000001',
+        )
+        cls.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', phone_number='9000000003',
+            is_staff=True,
+        )
+        cls.donors = [
+            User.objects.create_user(
+                email=f'donor{i}@example.com', password='pass12345', full_name=f'Donor {i}',
+                phone_number=f'900000010{i}',
+            )
+            for i in range(2)
+        ]
+        campaign = make_campaign(cls.creator, Decimal('100000.00'))
+        dated = [
+            (cls.donors[0], 'COMPLETED', '2025-04-01T00:00:00Z', '10.00'),
+            (cls.donors[0], 'COMPLETED', '2026-03-31T23:59:00Z', '15.50'),
+            (cls.donors[0], 'PENDING', '2025-06-01T00:00:00Z', '99.00'),
+            (cls.donors[0], 'COMPLETED', '2025-03-31T23:59:00Z', '99.00'),
+            (cls.donors[1], 'COMPLETED', '2025-07-01T00:00:00Z', '40.00'),
+        ]
+        donations = Donation.objects.bulk_create([
+            Donation(donor=donor, campaign=campaign, amount=Decimal(amount), status=donation_status)
+            for donor, donation_status, _, amount in dated
+        ])
+        for donation, (_, _, created_at, _) in zip(donations, dated):
+            Donation.objects.filter(pk=donation.pk).update(created_at=created_at)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_statements_group_a_fiscal_year_in_one_query(self):
+        with self.assertNumQueries(1):
+            statements = [
+                (donor['full_name'], [donation['amount'] for donation in donations])
+                for donor, donations in donor_statements(2025)
+            ]
+        self.assertEqual(sorted(statements), [
+            ('Donor 0', [Decimal('10.00'), Decimal('15.50')]),
+            ('Donor 1', [Decimal('40.00')]),
+        ])
+
+    def test_donor_downloads_their_statement(self):
+        response = self.client_for(self.donors[0]).get('/api/donations/tax-statements/2025/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('tax-statement-2025-26', response['Content-Disposition'])
+        pdf = b''.join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF-1.4'))
+        self.assertIn(b'(25.50) Tj', pdf)
+        self.assertEqual(self.client_for(self.donors[1]).get('/api/donations/tax-statements/2023/').status_code, 404)
+
+    def test_stored_batch_is_served(self):
+        call_command('generate_tax_statements', '--year', '2025', stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(statement_path(self.donors[1].id, 2025)))
+        default_storage.delete(statement_path(self.donors[1].id, 2025))
+        default_storage.save(statement_path(self.donors[1].id, 2025), ContentFile(b'%PDF-1.4 stored'))
+        response = self.client_for(self.donors[1]).get('/api/donations/tax-statements/2025/')
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 stored')
+
+        # A receipt issued after the batch ran is listed in a fresh statement
+        donation = Donation.objects.get(donor=self.donors[1])
+        DonationReceipt.objects.create(donation=donation, receipt_number='FT-2025-000001')
+        response = self.client_for(self.donors[1]).get('/api/donations/tax-statements/2025/')
+        pdf = b''.join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF-1.4\n'))
+        self.assertIn(b'(FT-2025-000001) Tj', pdf)
+
+        # A donation changed after the batch ran makes the stored statement stale
+        Donation.objects.filter(donor=self.donors[1]).update(status='REFUNDED', updated_at=timezone.now())
+        response = self.client_for(self.donors[1]).get('/api/donations/tax-statements/2025/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_out_of_range_years_are_refused(self):
+        for year in (0, 1899, 9999, 123456):
+            url = f'/api/donations/tax-statements/{year}/'
+            self.assertEqual(self.client_for(self.donors[0]).get(url).status_code, 400, year)
+            url = f'/api/admin/tax-statements/{year}/'
+            self.assertEqual(self.client_for(self.admin).get(url).status_code, 400, year)
+
+    def test_admin_zip_has_one_statement_per_donor(self):
+        self.assertEqual(self.client_for(self.donors[0]).get('/api/admin/tax-statements/2025/').status_code, 403)
+        response = self.client_for(self.admin).get('/api/admin/tax-statements/2025/')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted(statement_filename(donor.id, 2025) for donor in self.donors),
+        )
+        self.assertTrue(archive.read(statement_filename(self.donors[0].id, 2025)).startswith(b'%PDF'))
+
+    def test_long_statements_continue_over_pages(self):
+        donor = {'full_name': 'Donor', 'email': 'donor@example.com'}
+        donations = [
+            {'created_at': timezone.now(), 'campaign__title': 'Water', 'receipt__receipt_number': None,
+             'amount': Decimal('1.00')}
+        ] * 70
+        pdf = render_statement(statement_fields(donor, donations, 2025))
+        self.assertIn(b'/Count 3', pdf)
+        self.assertIn(b'(Page 3 of 3) Tj', pdf)
+
+    @override_settings(RECEIPT_RENDER_PROCESSES=1)
+    def test_statements_render_in_worker_processes(self):
+        rendered = list(render_statements(donor_statements(2025), 2025))
+        self.assertEqual(len(rendered), 2)
+        self.assertTrue(all(pdf.startswith(b'%PDF') for _, pdf in rendered))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, RECEIPT_DISPATCH='off')
+class DonationLedgerTests(TestCase):
+    """Donation events are ledgered and balances are rebuilt from snapshots"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.donor = User.objects.create_user(
+            email='donor@example.com', password='pass12345', full_name='Donor', phone_number='9000000002',
+        )
+        cls.campaign = make_campaign(cls.donor, Decimal('1000.00'))
+
+    def donate(self, amount, at, donation_status='PENDING'):
+        donation = Donation.objects.create(
+            donor=self.donor, campaign=self.campaign, amount=Decimal(amount), status=donation_status,
+        )
+        record_donation_created(Donation.objects.select_related('campaign').get(pk=donation.pk))
+        DonationLedgerEntry.objects.filter(donation=donation).update(created_at=at)
+        return donation
+
+    def set_status(self, donation, new_status, at):
+        latest = DonationLedgerEntry.objects.filter(donation=donation).order_by('id').last()
+        change_donation_status(Donation.objects.select_related('campaign').get(pk=donation.pk), new_status)
+        DonationLedgerEntry.objects.filter(donation=donation, id__gt=latest.id).update(created_at=at)
+
+    def test_each_event_is_ledgered(self):
+        now = timezone.now()
+        donation = self.donate('40.00', now)
+        self.set_status(donation, 'COMPLETED', now)
+        self.set_status(donation, 'COMPLETED', now)
+        self.set_status(donation, 'REFUNDED', now)
+        settlement = f'donation_id,status\n{donation.pk},COMPLETED\n'
+        list(ingest_settlements(read_settlements(io.BytesIO(settlement.encode()), 'csv')))
+
+        entries = DonationLedgerEntry.objects.filter(donation=donation).order_by('id')
+        self.assertEqual(
+            [(entry.event, entry.raised_delta, entry.completed_delta, entry.donation_delta) for entry in entries],
+            [
+                ('CREATED', Decimal('0.00'), 0, 1),
+                ('COMPLETED', Decimal('40.00'), 1, 0),
+                ('REFUNDED', Decimal('-40.00'), -1, 0),
+                ('COMPLETED', Decimal('40.00'), 1, 0),
+            ],
+        )
+
+    def test_completion_past_the_goal_is_recorded(self):
+        donation = self.donate('40.00', timezone.now())
+        Campaign.objects.filter(pk=self.campaign.pk).update(raised_amount=Decimal('1000.00'))
+        change_donation_status(Donation.objects.select_related('campaign').get(pk=donation.pk), 'COMPLETED')
+        self.assertEqual(
+            list(DonationLedgerEntry.objects.filter(donation=donation).values_list('event', flat=True).order_by('id')),
+            ['CREATED', 'COMPLETED'],
+        )
+
+    def test_balance_from_snapshot_and_tail(self):
+        day = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=10)
+        first = self.donate('10.00', day)
+        self.set_status(first, 'COMPLETED', day + timedelta(days=1))
+        second = self.donate('25.00', day + timedelta(days=2), donation_status='COMPLETED')
+        self.assertEqual(take_snapshots(as_of=day + timedelta(days=3)), 1)
+
+        self.set_status(second, 'REFUNDED', day + timedelta(days=4))
+        self.donate('5.00', day + timedelta(days=5), donation_status='COMPLETED')
+        self.assertEqual(take_snapshots(as_of=day + timedelta(days=6)), 1)
+        # Nothing new since
+        self.assertEqual(take_snapshots(as_of=day + timedelta(days=7)), 0)
+
+        expected = {
+            0: ('0', 0, 0),
+            1: ('0.00', 0, 1),
+            2: ('10.00', 1, 1),
+            3: ('35.00', 2, 2),
+            5: ('10.00', 1, 2),
+            6: ('15.00', 2, 3),
+            8: ('15.00', 2, 3),
+        }
+        for days, (raised, completed, total) in expected.items():
+            balance = balance_at(self.campaign.pk, day + timedelta(days=days))
+            self.assertEqual(balance, (Decimal(raised), completed, total), days)
+
+        # The snapshot at day 6 stands in for everything before it
+        CampaignBalanceSnapshot.objects.filter(as_of=day + timedelta(days=6)).update(raised_amount=Decimal('99.00'))
+        self.assertEqual(balance_at(self.campaign.pk, day + timedelta(days=8)).raised_amount, Decimal('99.00'))
+
+    def test_entries_outlive_deleted_donations_and_campaigns(self):
+        day = timezone.now() - timedelta(days=3)
+        donation = self.donate('10.00', day, donation_status='COMPLETED')
+        other = make_campaign(self.donor, Decimal('500.00'))
+        Donation.objects.create(donor=self.donor, campaign=other, amount=Decimal('5.00'))
+        record_donation_created(Donation.objects.select_related('campaign').get(campaign=other))
+        DonationLedgerEntry.objects.filter(campaign_id=other.pk).update(created_at=day)
+
+        donation_id, other_id = donation.pk, other.pk
+        donation.delete()
+        self.assertEqual(DonationLedgerEntry.objects.filter(donation_id=donation_id).count(), 1)
+        self.assertEqual(balance_at(self.campaign.pk, timezone.now()), (Decimal('10.00'), 1, 1))
+
+        other.delete()
+        self.assertEqual(DonationLedgerEntry.objects.filter(campaign_id=other_id).count(), 1)
+        # Only the campaign still around is snapshotted
+        self.assertEqual(take_snapshots(as_of=timezone.now()), 1)
+
+    def test_admin_balance_endpoint(self):
+        admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', phone_number='9000000003',
+            is_staff=True,
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        self.donate('10.00', timezone.make_aware(datetime(2025, 3, 31, 23, 0)), donation_status='COMPLETED')
+
+        url = f'/api/admin/campaigns/{self.campaign.pk}/balance/'
+        self.assertEqual(client.get(url, {'as_of': '2025-03-31'}).data['data']['raised_amount'], '10.00')
+        self.assertEqual(client.get(url, {'as_of': '2025-03-31T12:00:00'}).data['data']['raised_amount'], '0')
+        self.assertEqual(client.get(url, {'as_of': 'yesterday'}).status_code, 400)
+        self.assertEqual(client.get(url, {'as_of': '2025-02-30'}).status_code, 400)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, RECEIPT_DISPATCH='off')
+class ReconciliationTests(TestCase):
+    """Campaign totals are recomputed from the donations and drift is repaired"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.creator = User.objects.create_user(
+            email='creator@example.com', password='pass12345', full_name='Creator', phone_number='9000000001',
+        )
+        cls.campaigns = [make_campaign(cls.creator, Decimal('1000.00')) for _ in range(3)]
+        donations = []
+        for index, campaign in enumerate(cls.campaigns):
+            for donation_status in ['COMPLETED', 'COMPLETED', 'PENDING', 'FAILED'][:index + 2]:
+                donations.append(Donation(
+                    donor=cls.creator, campaign=campaign, amount=Decimal('12.50'), status=donation_status,
+                ))
+        Donation.objects.bulk_create(donations)
+        for campaign in cls.campaigns:
+            Campaign.objects.filter(pk=campaign.pk).update(**dict(zip(RECONCILED_FIELDS, exact_totals([campaign.pk])[campaign.pk])))
+
+    def test_id_ranges_cover_the_uuid_space(self):
+        ranges = id_ranges(4)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (None, None))
+        self.assertEqual(ranges[2][0], uuid.UUID('80000000-0000-0000-0000-000000000000'))
+        self.assertEqual(donation_totals(chunks=8, workers=0), donation_totals(chunks=1, workers=0))
+
+    def test_consistent_totals_report_nothing(self):
+        self.assertEqual(reconcile(chunks=4, workers=0), [])
+
+    def test_drift_is_reported_and_repaired(self):
+        drifted = self.campaigns[1]
+        # The double count the accounting used to produce
+        Campaign.objects.filter(pk=drifted.pk).update(raised_amount=Decimal('37.50'), donation_count=5)
+
+        drifts = reconcile(chunks=4, workers=0)
+        self.assertEqual([(drift.campaign_id, drift.recorded, drift.actual) for drift in drifts], [
+            (drifted.pk, (Decimal('37.50'), 2, 5), (Decimal('25.00'), 2, 3)),
+        ])
+        self.assertEqual(Campaign.objects.get(pk=drifted.pk).raised_amount, Decimal('37.50'))
+
+        reconcile(chunks=4, workers=0, repair=True)
+        drifted.refresh_from_db()
+        self.assertEqual((drifted.raised_amount, drifted.donation_count), (Decimal('25.00'), 3))
+        self.assertEqual(reconcile(chunks=4, workers=0), [])
+
+    def test_unfolded_shard_deltas_are_not_drift(self):
+        campaign = self.campaigns[0]
+        set_counter_shards(campaign.pk, 2)
+        donation = Donation.objects.create(
+            donor=self.creator, campaign=campaign, amount=Decimal('5.00'), status='COMPLETED',
+        )
+        record_donation_created(Donation.objects.select_related('campaign').get(pk=donation.pk))
+        self.assertEqual(reconcile(chunks=4, workers=0), [])
+
+        CampaignCounterShard.objects.filter(campaign=campaign, index=0).update(donation_count=F('donation_count') + 7)
+        output = io.StringIO()
+        call_command('reconcile_campaign_totals', '--workers=0', '--repair', stdout=output)
+        self.assertIn('donation_count 10 -> 3', output.getvalue())
+        self.assertEqual(reconcile(chunks=4, workers=0), [])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHER, RECEIPT_DISPATCH='off')
+class ConcurrentDonationTests(TransactionTestCase):
+    """Concurrent completions on one campaign: no lost updates, no overfunding"""
+
+    THREADS = 8
+    PER_THREAD = 5
+
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            email='creator@example.com', password='pass12345', full_name='Creator', phone_number='9000000001',
+        )
+        self.donors = [
+            User.objects.create_user(
+                email=f'donor{i}@example.com', password='pass12345', full_name=f'Donor {i}',
+                phone_number=f'91{i:08d}',
+            )
+            for i in range(self.THREADS)
+        ]
+
+    def run_threads(self, campaign, amount, shards=0):
+        if shards:
+            set_counter_shards(campaign.pk, shards)
+            campaign.refresh_from_db()
+        donations = [
+            [Donation.objects.create(donor=donor, campaign=campaign, amount=amount) for _ in range(self.PER_THREAD)]
+            for donor in self.donors
+        ]
+        with transaction.atomic():
+            for batch in donations:
+                for donation in batch:
+                    record_donation_created(donation)
+        barrier = threading.Barrier(self.THREADS)
+
+        def complete(batch):
+            try:
+                barrier.wait()
+                for donation in batch:
+                    change_donation_status(donation, 'COMPLETED')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=complete, args=(batch,)) for batch in donations]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        fold_counter_shards(campaign.pk)
+        campaign.refresh_from_db()
+
+    def test_no_lost_updates(self):
+        campaign = make_campaign(self.creator, Decimal('1000000.00'))
+        self.run_threads(campaign, Decimal('10.00'))
+
+        total = self.THREADS * self.PER_THREAD
+        self.assertEqual(campaign.raised_amount, Decimal('10.00') * total)
+        self.assertEqual(campaign.completed_donation_count, total)
+        self.assertEqual(campaign.donation_count, total)
+
+    def test_completions_past_the_goal_are_all_counted(self):
+        campaign = make_campaign(self.creator, Decimal('100.00'))
+        self.run_threads(campaign, Decimal('10.00'))
+
+        total = self.THREADS * self.PER_THREAD
+        self.assertEqual(campaign.raised_amount, Decimal('10.00') * total)
+        self.assertEqual(campaign.completed_donation_count, total)
+
+    def test_no_lost_updates_with_counter_shards(self):
+        campaign = make_campaign(self.creator, Decimal('1000000.00'))
+        self.run_threads(campaign, Decimal('10.00'), shards=4)
+
+        total = self.THREADS * self.PER_THREAD
+        self.assertEqual(campaign.raised_amount, Decimal('10.00') * total)
+        self.assertEqual(campaign.completed_donation_count, total)
+        self.assertEqual(campaign.donation_count, total)
+
+    def test_concurrent_first_donations_count_one_donor(self):
+        campaign = make_campaign(self.creator, Decimal('1000000.00'))
+        barrier = threading.Barrier(self.THREADS)
+
+        def donate():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    donation = Donation.objects.create(donor=self.donors[0], campaign=campaign, amount=Decimal('10.00'))
+                    record_donation_created(Donation.objects.select_related('campaign').get(pk=donation.pk))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=donate) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.donation_count, campaign.unique_donor_count), (self.THREADS, 1))
+
+    def test_concurrent_retries_wait_for_the_first_request(self):
+        campaign = make_campaign(self.creator, Decimal('1000000.00'))
+        token = RefreshToken.for_user(self.donors[0]).access_token
+        barrier = threading.Barrier(self.THREADS)
+        responses = []
+
+        def retry():
+            try:
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+                barrier.wait()
+                response = client.post(
+                    '/api/donations/', {'campaign': str(campaign.id), 'amount': '10.00'},
+                    format='json', HTTP_IDEMPOTENCY_KEY='same-key',
+                )
+                responses.append((response.status_code, response.json()))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=retry) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(Donation.objects.filter(campaign=campaign).count(), 1)
+        self.assertEqual(len(responses), self.THREADS)
+        self.assertTrue(all(response == responses[0] for response in responses))
+        self.assertEqual(responses[0][0], 201)
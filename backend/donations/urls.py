@@ -11,7 +11,14 @@ urlpatterns = [
     # Donation creation
     path('', views.create_donation, name='create_donation'),
     
+    # Year-end tax statement of the current user
+    path('tax-statements/<int:year>/', views.download_tax_statement, name='tax_statement'),
+    
+    # Write-behind intake progress
+    path('intake/<str:tracking_id>/', views.get_intake_status, name='intake_status'),
+    
     # Donation details
     path('<str:donation_id>/', views.get_donation_detail, name='donation_detail'),
     path('<str:donation_id>/status/', views.update_donation_status, name='update_donation_status'),
+    path('<str:donation_id>/receipt/', views.download_receipt, name='download_receipt'),
 ]
@@ -1,12 +1,31 @@
+import io
+import uuid
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from donations.models import Donation, DonationReceipt
 from donations.serializers import DonationSerializer, DonationCreateSerializer, DonationReceiptSerializer
 from campaigns.models import Campaign
+from donations.accounting import GoalReached, change_donation_status, record_donation_created
+from donations.intake import QUEUED, enqueue_donation, intake_status
+from donations.tax_statements import (
+    FISCAL_YEARS, donor_statement, statement_filename, statement_path, stored_statement_is_current,
+)
+from core.admin_views import is_admin
+from core.idempotency import idempotent
+from core.pagination import get_paginator
+from core.row_serializers import RowSerializer
+from django.conf import settings
 from django.db import transaction
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+
+
+def goal_reached_response():
+    return Response({
+        'error': 'Campaign goal has been reached. No more donations are being accepted for this campaign.'
+    }, status=status.HTTP_403_FORBIDDEN)
 
 
 # -------------------- DEBUG - COUNT USER DONATIONS --------------------
@@ -28,10 +47,13 @@ def get_donation_count(request):
 # -------------------- CREATE DONATION --------------------
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_donation(request):
     """
     Create a new donation
     POST /api/donations/
+    Retries with the same Idempotency-Key header replay the first response
+    With DONATION_INTAKE_BUFFER on, answers 202 with a tracking id to poll
     """
     serializer = DonationCreateSerializer(
         data=request.data,
@@ -47,18 +69,29 @@ def create_donation(request):
                 'error': 'Campaign not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if campaign goal has been reached
+        # Check if campaign goal has been reached (record_donation_created
+        # re-checks it atomically with the counter update)
         if campaign.goal_reached:
-            return Response({
-                'error': 'Campaign goal has been reached. No more donations are being accepted for this campaign.'
-            }, status=status.HTTP_403_FORBIDDEN)
+            return goal_reached_response()
         
-        donation = serializer.save()
+        if settings.DONATION_INTAKE_BUFFER:
+            # Stored later by process_donation_intake; the client polls the status URL
+            tracking_id = enqueue_donation(request.user, serializer.validated_data)
+            return Response({
+                'message': 'Donation accepted for processing',
+                'data': {
+                    'tracking_id': str(tracking_id),
+                    'status': QUEUED,
+                    'status_url': f'/api/donations/intake/{tracking_id}/',
+                }
+            }, status=status.HTTP_202_ACCEPTED)
         
-        # Update campaign raised amount
-        with transaction.atomic():
-            campaign.raised_amount += donation.amount
-            campaign.save()
+        try:
+            with transaction.atomic():
+                donation = serializer.save()
+                record_donation_created(donation)
+        except GoalReached:
+            return goal_reached_response()
         
         response_serializer = DonationSerializer(donation)
         
@@ -73,6 +106,31 @@ def create_donation(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+# -------------------- DONATION INTAKE STATUS --------------------
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_intake_status(request, tracking_id):
+    """
+    Progress of a donation accepted with 202
+    GET /api/donations/intake/<tracking_id>/
+    status is queued, persisted (donation_id is set) or rejected (error is set)
+    """
+    try:
+        tracking_id = uuid.UUID(tracking_id)
+    except ValueError:
+        tracking_id = None
+    state = intake_status(tracking_id, request.user) if tracking_id else None
+    if state is None:
+        return Response({
+            'error': 'Tracking id not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'message': 'Donation intake status retrieved successfully',
+        'data': {'tracking_id': str(tracking_id), **state}
+    }, status=status.HTTP_200_OK)
+
+
 # -------------------- GET USER DONATIONS --------------------
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -80,14 +138,19 @@ def get_user_donations(request):
     """
     Get current user's donation history
     GET /api/donations/
+    Cursor mode: ?cursor= (first page), then follow the opaque next/previous links
     """
     donations = Donation.objects.filter(donor=request.user)
     
     # Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = 10
-    paginated_queryset = paginator.paginate_queryset(donations, request)
+    paginator = get_paginator(request, page_size=10)
     
+    if settings.FAST_LIST_SERIALIZATION:
+        rows = RowSerializer(DonationSerializer(), extra_paths=('created_at', 'id'))
+        paginated_queryset = paginator.paginate_queryset(donations.values(*rows.paths), request)
+        return paginator.get_paginated_response(rows.serialize(paginated_queryset))
+    
+    paginated_queryset = paginator.paginate_queryset(donations.select_related('donor', 'campaign'), request)
     serializer = DonationSerializer(paginated_queryset, many=True)
     
     return paginator.get_paginated_response(serializer.data)
@@ -100,6 +163,7 @@ def get_campaign_donations(request, id=None, campaign_id=None):
     """
     Get all donations for a campaign
     GET /api/campaigns/<id>/donations/
+    Cursor mode: ?cursor= (first page), then follow the opaque next/previous links
     """
     # Accept both 'id' and 'campaign_id' parameters
     campaign_identifier = id or campaign_id
@@ -119,11 +183,10 @@ def get_campaign_donations(request, id=None, campaign_id=None):
     # Get recent donations, excluding anonymous ones for display
     donations = Donation.objects.filter(
         campaign=campaign
-    ).exclude(is_anonymous=True).order_by('-created_at')
+    ).exclude(is_anonymous=True).select_related('donor', 'campaign').order_by('-created_at')
     
     # Pagination
-    paginator = PageNumberPagination()
-    paginator.page_size = 10
+    paginator = get_paginator(request, page_size=10)
     paginated_queryset = paginator.paginate_queryset(donations, request)
     
     serializer = DonationSerializer(paginated_queryset, many=True)
@@ -163,10 +226,12 @@ def get_donation_detail(request, donation_id):
 # -------------------- UPDATE DONATION STATUS --------------------
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def update_donation_status(request, donation_id):
     """
     Update donation status (for admin/payment gateway)
     PUT /api/donations/<id>/status/
+    Retries with the same Idempotency-Key header replay the first response
     """
     try:
         donation = Donation.objects.get(id=donation_id)
@@ -185,16 +250,9 @@ def update_donation_status(request, donation_id):
     transaction_id = request.data.get('transaction_id')
     
     if status_update in ['PENDING', 'COMPLETED', 'FAILED', 'REFUNDED']:
-        with transaction.atomic():
-            # If status is changing to COMPLETED, update campaign raised amount
-            if status_update == 'COMPLETED' and donation.status != 'COMPLETED':
-                donation.campaign.raised_amount += donation.amount
-                donation.campaign.save()
-            
-            donation.status = status_update
-            if transaction_id:
-                donation.transaction_id = transaction_id
-            donation.save()
+        # Completing the donation adds it to the campaign's raised amount,
+        # even past the goal: the goal was checked when it was created
+        change_donation_status(donation, status_update, transaction_id)
     else:
         return Response({
             'error': 'Invalid status'
@@ -206,3 +264,67 @@ def update_donation_status(request, donation_id):
         'message': 'Donation status updated successfully',
         'data': serializer.data
     }, status=status.HTTP_200_OK)
+
+
+# -------------------- DOWNLOAD DONATION RECEIPT --------------------
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_receipt(request, donation_id):
+    """
+    Download the PDF receipt of a completed donation
+    GET /api/donations/<id>/receipt/
+    Streamed from the file storage; 404 until the receipt has been generated
+    """
+    try:
+        receipt = DonationReceipt.objects.select_related('donation').get(donation_id=donation_id)
+    except DonationReceipt.DoesNotExist:
+        receipt = None
+    
+    if receipt is not None and receipt.donation.donor_id != request.user.id and not is_admin(request.user):
+        return Response({
+            'error': 'You do not have permission to view this receipt'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if receipt is None or not receipt.receipt_pdf:
+        return Response({
+            'error': 'Receipt is not available yet'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return FileResponse(
+        receipt.receipt_pdf.open('rb'),
+        as_attachment=True,
+        filename=f'{receipt.receipt_number}.pdf',
+        content_type='application/pdf',
+    )
+
+
+# -------------------- DONOR TAX STATEMENT --------------------
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_tax_statement(request, year):
+    """
+    Download the current user's tax statement for a fiscal year
+    GET /api/donations/tax-statements/<year>/
+    Served from the batch generated by generate_tax_statements when it has
+    run for that year and none of the donor's donations changed or got a
+    receipt since, rendered on demand otherwise
+    """
+    if year not in FISCAL_YEARS:
+        return Response({
+            'error': 'Invalid fiscal year'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    path = statement_path(request.user.id, year)
+    filename = statement_filename(request.user.id, year)
+    if stored_statement_is_current(request.user.id, year):
+        return FileResponse(
+            default_storage.open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/pdf',
+        )
+    
+    pdf = donor_statement(request.user.id, year)
+    if pdf is None:
+        return Response({
+            'error': 'No completed donations in this fiscal year'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return FileResponse(io.BytesIO(pdf), as_attachment=True, filename=filename, content_type='application/pdf')